@@ -0,0 +1,176 @@
+// assets/social_clientside.js
+// Callbacks do navegador do dashboard social (modo SOCIAL_CLIENTSIDE).
+// Recortam por plataforma os agregados de `social-base` (SocialCube.profiles)
+// e montam as mesmas figuras que main_social.py montaria com plotly.express.
+(function () {
+    var ALL = 'Todas';
+    var FACET_SPACING = 0.02;
+
+    function selected(base, platform) {
+        // Índices das plataformas do filtro, na ordem do cubo
+        var idx = [];
+        base.platforms.forEach(function (name, i) {
+            if (platform === ALL || name === platform) {
+                idx.push(i);
+            }
+        });
+        return idx;
+    }
+
+    function sortedIndex(names) {
+        return names.map(function (_, i) { return i; }).sort(function (a, b) {
+            return names[a] < names[b] ? -1 : 1;
+        });
+    }
+
+    function facetDomain(i, k) {
+        var width = (1 - FACET_SPACING * (k - 1)) / k;
+        var start = i * (width + FACET_SPACING);
+        return [start, start + width];
+    }
+
+    function facetTitle(text, domain) {
+        return {
+            text: text, showarrow: false, font: {},
+            x: (domain[0] + domain[1]) / 2, xanchor: 'center', xref: 'paper',
+            y: 1.0, yanchor: 'bottom', yref: 'paper'
+        };
+    }
+
+    function baseLayout(base, extra) {
+        var colors = base.style.colors;
+        var layout = {
+            template: base.style.template,
+            plot_bgcolor: colors.plot_bg,
+            paper_bgcolor: colors.plot_bg,
+            font: {color: colors.text},
+            margin: {t: 30, b: 30, l: 30, r: 30}
+        };
+        return Object.assign(layout, extra);
+    }
+
+    function positiveSentiment(base, idx) {
+        var total = 0, rows = 0;
+        idx.forEach(function (i) {
+            total += base.sentiment[i][0];
+            rows += base.sentiment_rows[i];
+        });
+        return (total / rows).toFixed(1).replace('.', ',') + '%';
+    }
+
+    function sentimentFigure(base, idx) {
+        var labels = ['Positivo', 'Neutro', 'Negativo'];
+        var palette = base.style.sentiment;
+        idx = idx.filter(function (i) { return base.sentiment_rows[i] > 0; });
+        var data = [], annotations = [];
+        idx.forEach(function (i, facet) {
+            var rows = base.sentiment_rows[i];
+            var domain = facetDomain(facet, idx.length);
+            data.push({
+                type: 'pie', labels: labels, name: '', showlegend: true,
+                values: base.sentiment[i].map(function (v) { return v / rows; }),
+                marker: {colors: labels.map(function (label) { return palette[label]; })},
+                domain: {x: domain, y: [0, 1]}
+            });
+            annotations.push(facetTitle(base.platforms[i], domain));
+        });
+        return {data: data, layout: baseLayout(base, {legend: {title: {text: 'Sentimento'}}, annotations: annotations})};
+    }
+
+    function demographicsFigure(base, idx) {
+        var ages = sortedIndex(base.ages), genders = sortedIndex(base.genders);
+        var palette = base.style.genders;
+        var data = [], annotations = [];
+        var layout = baseLayout(base, {barmode: 'group', legend: {title: {text: 'Gênero'}, tracegroupgap: 0}});
+        // Facetas em ordem alfabética, como no groupby do servidor
+        idx = idx.slice().sort(function (a, b) {
+            return base.platforms[a] < base.platforms[b] ? -1 : 1;
+        });
+        idx.forEach(function (i, facet) {
+            var suffix = facet === 0 ? '' : String(facet + 1);
+            var domain = facetDomain(facet, idx.length);
+            layout['xaxis' + suffix] = {
+                anchor: 'y' + suffix, domain: domain,
+                title: {text: facet === 0 ? 'Faixa Etária' : 'age_group'}
+            };
+            layout['yaxis' + suffix] = facet === 0
+                ? {anchor: 'x', domain: [0, 1], title: {text: 'Porcentagem'}}
+                : {anchor: 'x' + suffix, domain: [0, 1], matches: 'y', showticklabels: false};
+            if (facet > 0) {
+                layout['xaxis' + suffix].matches = 'x';
+            }
+            annotations.push(facetTitle(base.platforms[i], domain));
+            genders.forEach(function (g, order) {
+                // Só as faixas com dados, como no groupby
+                var x = [], y = [];
+                ages.forEach(function (a) {
+                    var value = base.demographics[i][a][g];
+                    if (value !== 0) {
+                        x.push(base.ages[a]);
+                        y.push(value);
+                    }
+                });
+                data.push({
+                    type: 'bar', x: x, y: y, name: base.genders[g],
+                    legendgroup: base.genders[g], offsetgroup: base.genders[g],
+                    showlegend: facet === 0,
+                    marker: {color: palette[order % palette.length]},
+                    xaxis: 'x' + suffix, yaxis: 'y' + suffix
+                });
+            });
+        });
+        layout.annotations = annotations;
+        return {data: data, layout: layout};
+    }
+
+    function geoFigure(base, idx, platform) {
+        var blues = base.style.blues;
+        var totals = base.countries.map(function (_, c) {
+            return idx.reduce(function (sum, i) { return sum + base.geo[i][c]; }, 0);
+        });
+        var countries = sortedIndex(base.countries).filter(function (c) { return totals[c] > 0; });
+        var names = countries.map(function (c) { return base.countries[c]; });
+        var layout = baseLayout(base, {
+            height: 400,
+            geo: {domain: {x: [0, 1], y: [0, 1]}, center: {}},
+            coloraxis: {
+                colorbar: {title: {text: 'users'}},
+                colorscale: blues.map(function (color, i) { return [i / (blues.length - 1), color]; })
+            },
+            legend: {tracegroupgap: 0}
+        });
+        if (platform !== ALL) {
+            layout.annotations = [facetTitle(platform, [0, 1])];
+        }
+        return {
+            data: [{
+                type: 'choropleth', geo: 'geo', coloraxis: 'coloraxis', name: '',
+                locationmode: 'country names', locations: names, hovertext: names,
+                z: countries.map(function (c) { return totals[c]; })
+            }],
+            layout: layout
+        };
+    }
+
+    // Saídas por id do componente; `base.outputs` diz quais o servidor deixou para o navegador
+    var BUILDERS = {
+        'positive-sentiment': positiveSentiment,
+        'sentiment-analysis': sentimentFigure,
+        'audience-demographics': demographicsFigure,
+        'geographic-distribution': geoFigure
+    };
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        social: {
+            filterViews: function (platform, base) {
+                if (!base) {
+                    throw window.dash_clientside.PreventUpdate;
+                }
+                var idx = selected(base, platform);
+                return base.outputs.map(function (id) {
+                    return BUILDERS[id](base, idx, platform);
+                });
+            }
+        }
+    });
+})();
@@ -0,0 +1,390 @@
+# benchmarks/bench_callbacks.py
+"""Tempo, pico de memória e payload dos callbacks dos dois dashboards por escala de dados.
+
+    python -m benchmarks.bench_callbacks --scales 1e3,1e4,1e5 --json atual.json
+    python -m benchmarks.bench_callbacks --baseline anterior.json --threshold 0.2
+
+Para cada escala (número de linhas) os dados sintéticos substituem os dados
+dos módulos `main` e `main_social`, e cada callback é chamado diretamente,
+sem servidor e com o cache de figuras limpo antes de cada chamada. O payload
+é o JSON que o Dash enviaria ao navegador.
+
+Com `--baseline`, compara com um resultado anterior (mesmo formato do
+`--json`) e termina com código 1 se alguma medida piorar mais que
+`--threshold` (fração). Um callback que passa de `--max-seconds` em uma
+escala não é executado nas escalas seguintes.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from dash.exceptions import PreventUpdate
+from plotly.io.json import to_json_plotly
+
+from dashboard.cache import figure_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SOCIAL_PLATFORMS = ['Instagram', 'Facebook', 'Twitter', 'LinkedIn']
+AGE_GROUPS = ['18-24', '25-34', '35-44', '45-54', '55+']
+GENDERS = ['Masculino', 'Feminino', 'Outro']
+COUNTRIES = ['Brasil', 'EUA', 'Portugal', 'México', 'Argentina', 'Colômbia',
+             'Reino Unido', 'Espanha', 'França', 'Alemanha']
+SOCIAL_DAYS = 90
+
+# Mesma distribuição de tipos de write_synthetic_events
+EVENT_WEIGHTS = np.array([60, 4, 4, 6, 12, 8, 5, 1], dtype=float)
+
+# Diferenças abaixo disso são ruído de medição, não regressão
+NOISE_FLOOR = {'wall_ms': 1.0, 'peak_mb': 0.5, 'payload_bytes': 256}
+
+
+# ========== Dados Sintéticos ==========
+def social_data(n, rng):
+    """Tabelas de main_social com `n` linhas cada (granularidade menor que um dia)."""
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=SOCIAL_DAYS, freq='D')
+    dates = dates.strftime('%Y-%m-%d').to_numpy()
+    # Linhas em ordem de data, como viriam de um histórico
+    day = np.sort(rng.integers(0, SOCIAL_DAYS, n))
+    platforms = np.array(SOCIAL_PLATFORMS)[rng.integers(0, len(SOCIAL_PLATFORMS), n)]
+
+    followers_df = pd.DataFrame({
+        'date': dates[day],
+        'platform': platforms,
+        'followers': (rng.integers(5000, 20000, n) * (1.01 ** day)).astype(np.int64),
+    })
+    engagement_df = pd.DataFrame({
+        'date': dates[day],
+        'platform': platforms,
+        'likes': rng.integers(100, 1000, n),
+        'comments': rng.integers(10, 100, n),
+        'shares': rng.integers(5, 50, n),
+    })
+    positive = rng.integers(40, 70, n)
+    negative = rng.integers(5, 20, n)
+    sentiment_df = pd.DataFrame({
+        'platform': platforms,
+        'positive': positive,
+        'negative': negative,
+        'neutral': 100 - positive - negative,
+    })
+    demographics_df = pd.DataFrame({
+        'platform': platforms,
+        'age_group': np.array(AGE_GROUPS)[rng.integers(0, len(AGE_GROUPS), n)],
+        'gender': np.array(GENDERS)[rng.integers(0, len(GENDERS), n)],
+        'percentage': rng.uniform(1, 10, n),
+    })
+    geo_df = pd.DataFrame({
+        'platform': platforms,
+        'country': np.array(COUNTRIES)[rng.integers(0, len(COUNTRIES), n)],
+        'users': rng.integers(1, 100, n),
+    })
+    # O vocabulário da nuvem cresce com os dados, limitado a um tamanho plausível
+    word_data = {f'palavra{i}': int(count)
+                 for i, count in enumerate(rng.integers(10, 100, min(n, 10_000)))}
+    return {
+        'followers_df': followers_df, 'engagement_df': engagement_df,
+        'sentiment_df': sentiment_df, 'demographics_df': demographics_df,
+        'geo_df': geo_df, 'word_data': word_data,
+    }
+
+
+def esports_columns(n, feed, matches, rng, rate=1000.0):
+    """Lote de `n` eventos em colunas (EVENT_DTYPES) para as partidas de `matches`."""
+    from dashboard.feed import EVENT_TYPES
+
+    match_ids = matches['MatchID'].to_numpy()
+    teams = np.array([[feed.teams.code(row['Time1']), feed.teams.code(row['Time2'])]
+                      for _, row in matches.iterrows()])
+    players = np.array([[[feed.players.code(f"{row[side]}_{k}") for k in range(1, 6)]
+                         for side in ('Time1', 'Time2')]
+                        for _, row in matches.iterrows()])
+
+    idx = rng.integers(0, len(match_ids), n)
+    side = rng.integers(0, 2, n)
+    types = rng.choice(len(EVENT_TYPES), n, p=EVENT_WEIGHTS / EVENT_WEIGHTS.sum()).astype(np.int8)
+    positions = types == EVENT_TYPES.index('position')
+    weighted = np.isin(types, [EVENT_TYPES.index('damage'), EVENT_TYPES.index('gold')])
+
+    x = np.full(n, np.nan, dtype=np.float32)
+    y = np.full(n, np.nan, dtype=np.float32)
+    x[positions] = rng.integers(0, 100, positions.sum())
+    y[positions] = rng.integers(0, 100, positions.sum())
+    value = np.ones(n)
+    value[weighted] = rng.integers(50, 600, weighted.sum())
+    return {
+        't': np.arange(n) / rate,
+        'match': match_ids[idx].astype(np.int32),
+        'type': types,
+        'player': players[idx, side, rng.integers(0, 5, n)].astype(np.int32),
+        'team': teams[idx, side].astype(np.int32),
+        'x': x,
+        'y': y,
+        'value': value,
+    }
+
+
+# ========== Cenários ==========
+def load_main(n, rng):
+    """Reinicia o estado ao vivo de main.py e ingere `n` eventos; devolve os callbacks a medir."""
+    import main
+    from dashboard.feed import LiveFeed, MatchEventSource
+    from dashboard.heatmap import HeatmapAccumulator
+    from dashboard.player_stats import RollingPlayerStats
+    from dashboard.win_probability import WinProbabilityEngine
+
+    # As funções do módulo leem estes globais a cada chamada
+    main.live_feed = LiveFeed(MatchEventSource())
+    main.tactical_heatmap = HeatmapAccumulator(bins=(25, 25), x_range=(0, 100), y_range=(0, 100))
+    main.player_stats = RollingPlayerStats(window=600, bucket=10)
+    main.win_engine = WinProbabilityEngine()
+    main.match_replays = {}
+    main.live_feed.subscribe(main.on_match_events)
+
+    columns = esports_columns(n, main.live_feed, main.matches, rng)
+    match_id = int(main.matches['MatchID'].iloc[0])
+    middle = n / 1000.0 / 2
+    return [
+        # Ingestão do lote inteiro: heatmap, estatísticas, replays e modelo de vitória
+        ('ingest', main.live_feed.publish, (columns,)),
+        ('live-counters', main.update_live_counters, (1,)),
+        ('tactical-heatmap', main.update_tactical_heatmap, (1, None, 'live')),
+        ('tactical-heatmap:patch', main.update_tactical_heatmap, (1, -1, 'live')),
+        ('player-stats', main.update_player_stats, (1, None, 'live')),
+        ('player-stats:patch', main.update_player_stats, (1, -1, 'live')),
+        ('win-prediction', main.update_win_prediction, (1, match_id, None, 'live')),
+        ('win-prediction:patch', main.update_win_prediction, (1, match_id, [], 'live')),
+        ('replay-range', main.update_replay_range, ('replay', match_id, 1)),
+        ('replay', main.update_replay, (middle, 'replay', match_id)),
+        ('team-comparison', main.update_team_comparison, (match_id,)),
+    ]
+
+
+def load_social(n, rng):
+    """Substitui os dados de main_social por `n` linhas; devolve os callbacks a medir."""
+    import main_social
+    from dashboard.social_cube import SocialCube
+
+    frames = social_data(n, rng)
+    for name, value in frames.items():
+        setattr(main_social, name, value)
+
+    def build_cube():
+        # Cubo novo, com versão própria: as figuras em cache dos dados anteriores não valem
+        main_social.social_cube = SocialCube.from_frames(
+            frames['followers_df'], frames['engagement_df'], frames['sentiment_df'],
+            frames['demographics_df'], frames['geo_df']
+        )
+
+    calls = [('cube-build', build_cube, ())]
+    for platform_value in ('Todas', 'Instagram'):
+        calls += [
+            (f'total-followers[{platform_value}]', main_social.update_total_followers, (platform_value, '30')),
+            (f'total-engagement[{platform_value}]', main_social.update_total_engagement, (platform_value, '30')),
+            (f'conversion-rate[{platform_value}]', main_social.update_conversion_rate, (platform_value, '30')),
+            (f'positive-sentiment[{platform_value}]', main_social.update_positive_sentiment, (platform_value,)),
+            (f'followers-growth[{platform_value}]', main_social.update_followers_growth, (platform_value, '30')),
+            (f'engagement-analysis[{platform_value}]', main_social.update_engagement_analysis, (platform_value, '30')),
+            (f'sentiment-analysis[{platform_value}]', main_social.update_sentiment_analysis, (platform_value,)),
+            (f'audience-demographics[{platform_value}]', main_social.update_audience_demographics, (platform_value,)),
+            (f'geographic-distribution[{platform_value}]', main_social.update_geographic_distribution, (platform_value,)),
+            (f'wordcloud[{platform_value}]', main_social.update_wordcloud, (platform_value,)),
+            # O callback registrado: todas as saídas em uma requisição
+            (f'filtered-views[{platform_value}]', main_social.filtered_views, (platform_value, '30')),
+        ]
+    return calls
+
+
+SCENARIOS = {'main': load_main, 'social': load_social}
+
+# Etapas de carga que alteram o estado dos módulos e só podem rodar uma vez por escala
+STATEFUL = {'ingest', 'cube-build'}
+
+
+# ========== Medição ==========
+def traced(func, args):
+    figure_cache.clear()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def measure(func, args, repeat):
+    """Menor tempo e mediana (ms), pico de memória (MB) e bytes do payload JSON.
+
+    Com `repeat=0` a função roda uma única vez, já com o tracemalloc ligado
+    (para chamadas que alteram estado, como a ingestão).
+    """
+    times, result = [], None
+    for _ in range(repeat):
+        figure_cache.clear()
+        start = time.perf_counter()
+        result = func(*args)
+        times.append((time.perf_counter() - start) * 1000)
+
+    # Pico medido numa execução separada: o tracemalloc deixa as alocações mais lentas
+    traced_result, elapsed, peak = traced(func, args)
+    if not times:
+        result, times = traced_result, [elapsed]
+
+    return {
+        'wall_ms': round(min(times), 3),
+        'wall_ms_median': round(statistics.median(times), 3),
+        'peak_mb': round(peak / 2 ** 20, 3),
+        'payload_bytes': len(to_json_plotly(result)) if result is not None else 0,
+    }
+
+
+def run(apps, scales, repeat, max_seconds, only):
+    results = []
+    too_slow = set()
+    for n in scales:
+        for app in apps:
+            rng = np.random.default_rng(42)
+            calls = SCENARIOS[app](n, rng)
+            for name, func, args in calls:
+                # As etapas de carga rodam sempre: os callbacks dependem delas
+                if only and name not in STATEFUL and not any(pattern in name for pattern in only):
+                    continue
+                record = {'app': app, 'callback': name, 'rows': n}
+                if (app, name) in too_slow:
+                    record['status'] = 'skipped'
+                elif name in STATEFUL:
+                    # A ingestão altera o estado: uma única execução
+                    record.update(measure(func, args, 0), status='ok')
+                else:
+                    try:
+                        record.update(measure(func, args, repeat), status='ok')
+                    except PreventUpdate:
+                        record['status'] = 'prevented'
+                    except Exception as exc:  # o benchmark segue com os demais callbacks
+                        record.update(status='error', error=f'{type(exc).__name__}: {exc}')
+                if record.get('wall_ms', 0) > max_seconds * 1000:
+                    too_slow.add((app, name))
+                results.append(record)
+                print(format_record(record), flush=True)
+    return results
+
+
+def format_record(record):
+    if record['status'] != 'ok':
+        return f"{record['app']:7} {record['callback']:42} {record['rows']:>10,}  {record['status']}"
+    return (f"{record['app']:7} {record['callback']:42} {record['rows']:>10,} "
+            f"{record['wall_ms']:10.2f} ms {record['peak_mb']:9.2f} MB {record['payload_bytes']:>12,} B")
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import dash
+    import plotly
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plotly': plotly.__version__,
+        'dash': dash.__version__,
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+# ========== Regressões ==========
+def compare(current, baseline, threshold):
+    """Medidas de `current` piores que as de `baseline` em mais de `threshold` (fração)."""
+    previous = {(r['app'], r['callback'], r['rows']): r
+                for r in baseline['results'] if r.get('status') == 'ok'}
+    regressions = []
+    for record in current['results']:
+        old = previous.get((record['app'], record['callback'], record['rows']))
+        if old is None or record.get('status') != 'ok':
+            continue
+        for metric, floor in NOISE_FLOOR.items():
+            before, after = old.get(metric), record.get(metric)
+            if before is None or after is None:
+                continue
+            if after - before > max(before * threshold, floor):
+                regressions.append({
+                    'app': record['app'], 'callback': record['callback'], 'rows': record['rows'],
+                    'metric': metric, 'before': before, 'after': after,
+                    'ratio': round(after / before, 3) if before else None,
+                })
+    return regressions
+
+
+def parse_scales(text):
+    return [int(float(value)) for value in text.split(',') if value.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--apps', default='main,social', help='Lista separada por vírgulas: main, social')
+    parser.add_argument('--scales', default='1e3,1e4,1e5,1e6,1e7', help='Linhas por escala, ex.: 1e3,1e5')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float, default=60,
+                        help='Não repetir nas escalas maiores um callback que passou deste tempo')
+    parser.add_argument('--only', action='append', help='Medir só callbacks cujo nome contém o texto')
+    parser.add_argument('--json', help='Salvar os resultados em JSON')
+    parser.add_argument('--baseline', help='Resultado anterior (JSON) para detectar regressões')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Piora relativa tolerada antes de acusar regressão')
+    args = parser.parse_args()
+
+    apps = [app.strip() for app in args.apps.split(',') if app.strip()]
+    unknown = set(apps) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"apps desconhecidos: {', '.join(sorted(unknown))}")
+
+    # Os cenários controlam os dados; a fonte de eventos do ambiente não deve ser iniciada
+    os.environ.pop('ESPORTS_EVENTS', None)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    report = {
+        'environment': environment(),
+        'scales': parse_scales(args.scales),
+        'repeat': args.repeat,
+        'results': run(apps, parse_scales(args.scales), args.repeat, args.max_seconds, args.only),
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as source:
+            baseline = json.load(source)
+        report['baseline'] = {'file': args.baseline, 'commit': baseline.get('environment', {}).get('commit'),
+                              'threshold': args.threshold}
+        report['regressions'] = compare(report, baseline, args.threshold)
+        for item in report['regressions']:
+            print(f"REGRESSÃO {item['app']} {item['callback']} ({item['rows']:,} linhas): "
+                  f"{item['metric']} {item['before']} -> {item['after']}")
+        if report['regressions']:
+            status = 1
+        else:
+            print(f"sem regressões acima de {args.threshold:.0%} em relação a {args.baseline}")
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(report, output, indent=2)
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
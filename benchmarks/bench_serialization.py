@@ -0,0 +1,76 @@
+# benchmarks/bench_serialization.py
+"""Tamanho do payload e tempo de codificação das figuras, antes e depois da
+serialização compacta (typed arrays + orjson).
+
+    python -m benchmarks.bench_serialization [--repeat 5] [--json resultado.json]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from dashboard.serialization import compact_figure, use_fast_json
+
+
+def sample_figures(rng):
+    n = 100_000
+    return {
+        'heatmap 500x500': go.Figure(go.Heatmap(z=rng.random((500, 500)).tolist())),
+        'linha 100k pontos': go.Figure(go.Scatter(
+            x=np.arange(n).tolist(), y=np.cumsum(rng.normal(size=n)).tolist(), mode='lines'
+        )),
+        'barras 10k inteiros': go.Figure(go.Bar(
+            x=np.arange(10_000).tolist(), y=rng.integers(0, 5000, 10_000).tolist()
+        )),
+    }
+
+
+def measure(encode, repeat):
+    best, payload = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = encode()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(payload.encode() if isinstance(payload, str) else payload), best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='Salvar os resultados em JSON')
+    args = parser.parse_args()
+
+    figures = sample_figures(np.random.default_rng(42))
+    results = []
+    for name, fig in figures.items():
+        # Antes: listas JSON de floats com o encoder json padrão
+        pio.json.config.default_engine = 'json'
+        before_bytes, before_ms = measure(lambda: pio.to_json(fig.to_plotly_json(), validate=False), args.repeat)
+
+        # Depois: typed arrays compactos com o encoder mais rápido disponível
+        engine = 'orjson' if use_fast_json() else 'json'
+        after_bytes, after_ms = measure(
+            lambda: pio.to_json(compact_figure(fig), validate=False, engine=engine), args.repeat
+        )
+        results.append({
+            'figure': name,
+            'before_bytes': before_bytes, 'after_bytes': after_bytes,
+            'before_ms': round(before_ms, 2), 'after_ms': round(after_ms, 2),
+            'engine': engine,
+        })
+
+    print(f"{'figura':22} {'bytes antes':>12} {'bytes depois':>12} {'ms antes':>9} {'ms depois':>9}")
+    for r in results:
+        print(f"{r['figure']:22} {r['before_bytes']:12,} {r['after_bytes']:12,} "
+              f"{r['before_ms']:9.1f} {r['after_ms']:9.1f}")
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/bench_serving.py
+"""Requisições por segundo: servidor de desenvolvimento do Dash x modo de produção.
+
+    python -m benchmarks.bench_serving social --workers 4 --concurrency 32 --duration 10
+
+Sobe cada servidor em um subprocesso, espera a porta abrir, dispara
+requisições concorrentes (conexões keep-alive) contra `--path` e encerra o
+servidor. `--url` mede um servidor já em execução em vez de subir os dois.
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Script de cada app e a porta usada pelo seu servidor de desenvolvimento
+APP_FILES = {'main': ('main.py', 8051), 'social': ('main_social.py', 8050)}
+
+
+def wait_for_port(host, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Servidor não respondeu em {host}:{port}")
+
+
+def load(url, path, concurrency, duration):
+    parsed = urllib.parse.urlparse(url)
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+        local = []
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise http.client.HTTPException(response.status)
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def pick(q):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': pick(0.50),
+        'p95_ms': pick(0.95),
+        'p99_ms': pick(0.99),
+    }
+
+
+def run_server(command, port, args):
+    # Sessão própria para encerrar também o processo filho do reloader
+    process = subprocess.Popen(command, cwd=ROOT, start_new_session=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port('127.0.0.1', port)
+        load(f'http://127.0.0.1:{port}', args.path, 2, 1)  # aquecimento
+        return load(f'http://127.0.0.1:{port}', args.path, args.concurrency, args.duration)
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('app', choices=sorted(APP_FILES))
+    parser.add_argument('--path', default='/_dash-layout')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--url', help='Medir apenas um servidor já em execução')
+    parser.add_argument('--json', help='Salvar os resultados em JSON')
+    args = parser.parse_args()
+
+    if args.url:
+        results = {'server': load(args.url, args.path, args.concurrency, args.duration)}
+    else:
+        script, dev_port = APP_FILES[args.app]
+        prod_port = 18051
+        # Servidor de desenvolvimento exatamente como em `python main.py` (debug e reloader)
+        dev_command = [sys.executable, script]
+        prod_command = [sys.executable, '-m', 'dashboard.serve', args.app,
+                        '--bind', f'127.0.0.1:{prod_port}',
+                        '--workers', str(args.workers), '--threads', str(args.threads)]
+        results = {
+            'dev': run_server(dev_command, dev_port, args),
+            'production': run_server(prod_command, prod_port, args),
+        }
+
+    for name, result in results.items():
+        print(f"{name:12} {result['rps']:9.1f} req/s  p50 {result['p50_ms']} ms  "
+              f"p95 {result['p95_ms']} ms  erros {result['errors']}")
+    if 'dev' in results and results['dev']['rps']:
+        print(f"ganho: {results['production']['rps'] / results['dev']['rps']:.1f}x")
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+# dashboard/cache.py
+import collections
+import contextvars
+import functools
+import json
+import threading
+import time
+
+from plotly.basedatatypes import BaseFigure
+
+from dashboard.serialization import compact_figure
+
+
+# Contador opcional de consultas ao cache na execução atual (usado pela instrumentação de callbacks)
+lookup_outcomes = contextvars.ContextVar('figure_cache_lookups', default=None)
+
+
+def _note(outcome):
+    outcomes = lookup_outcomes.get()
+    if outcomes is not None:
+        outcomes[outcome] += 1
+
+
+class _Pending:
+    # Cálculo em andamento para uma chave; outras sessões aguardam o resultado
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class FigureCache:
+    """Cache de figuras compartilhado por todas as sessões do processo.
+
+    A chave é (callback, entradas, versão dos dados). Com 200 pessoas vendo a
+    mesma partida, a figura é calculada uma vez por versão e as demais
+    sessões recebem o mesmo objeto já convertido para dict. Chamadas
+    simultâneas para a mesma chave esperam o primeiro cálculo em vez de
+    repeti-lo. Entradas saem por LRU (`maxsize`) ou por idade (`ttl`, segundos).
+    """
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+
+    def get_or_compute(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    _note('hit')
+                    return value
+                del self._entries[key]
+                self._stats['expired'] += 1
+
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _Pending()
+                self._stats['misses'] += 1
+            else:
+                self._stats['waits'] += 1
+        _note('miss' if owner else 'wait')
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = compute()
+        except BaseException as exc:
+            # Exceções (inclusive PreventUpdate) não são guardadas no cache
+            pending.error = exc
+            raise
+        else:
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl, pending.value)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+            return pending.value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.done.set()
+
+    def cached(self, name, version=None):
+        """Decorador para callbacks: a chave inclui os argumentos e `version()`, se informado."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                key = (name, json.dumps(args, default=str), version() if version else None)
+                return self.get_or_compute(key, lambda: _serializable(func(*args)))
+            return wrapper
+        return decorator
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats.get('hits', 0) + stats.get('misses', 0)
+        stats['hit_ratio'] = round(stats.get('hits', 0) / lookups, 4) if lookups else None
+        return stats
+
+
+def _serializable(value):
+    # Converte figuras para dict compacto uma única vez; o mesmo dict é servido a todos
+    if isinstance(value, BaseFigure):
+        return compact_figure(value)
+    if isinstance(value, tuple):
+        return tuple(_serializable(item) for item in value)
+    return value
+
+
+def register_stats_route(server, cache, path='/_cache/stats'):
+    """Expõe as métricas de acerto/erro do cache como JSON no servidor Flask do app."""
+    from flask import jsonify
+
+    server.add_url_rule(path, 'figure_cache_stats', lambda: jsonify(cache.stats()))
+
+
+# Cache único do processo, usado por main.py e main_social.py
+figure_cache = FigureCache()
@@ -0,0 +1,61 @@
+# dashboard/downsample.py
+"""Redução de séries temporais longas para o número de pixels do gráfico.
+
+As funções devolvem índices dos pontos mantidos (sempre incluindo o
+primeiro e o último), para que o chamador possa recortar x, y e quaisquer
+outras colunas da mesma série.
+"""
+import numpy as np
+
+
+def _bucket_edges(n, n_buckets):
+    # Limites de `n_buckets` baldes cobrindo os índices 1..n-2 (o primeiro e o último ficam fixos)
+    return np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: índices de `n_out` pontos que preservam a forma da série.
+
+    Em cada balde fica o ponto que forma o maior triângulo com o ponto
+    escolhido no balde anterior e a média do balde seguinte. A escolha é
+    sequencial entre baldes, mas cada balde é avaliado de uma vez com NumPy.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = _bucket_edges(n, n_out - 2)
+    # Média de cada balde (o "terceiro vértice" do balde anterior a ele)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    mean_x = np.append(mean_x[1:], x[-1])
+    mean_y = np.append(mean_y[1:], y[-1])
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        bx, by = x[start:stop], y[start:stop]
+        # Dobro da área do triângulo (a, ponto do balde, média do próximo balde)
+        area = np.abs((x[a] - mean_x[i]) * (by - y[a]) - (x[a] - bx) * (mean_y[i] - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def relayout_x_range(relayout):
+    """Faixa do eixo x de um `relayoutData` do Plotly: [início, fim], None (zoom
+    desfeito) ou False se o evento não mexeu no eixo x (legenda, autosize...)."""
+    if not relayout:
+        return False
+    if relayout.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout and 'xaxis.range[1]' in relayout:
+        return [relayout['xaxis.range[0]'], relayout['xaxis.range[1]']]
+    if 'xaxis.range' in relayout:
+        return list(relayout['xaxis.range'])
+    return False
@@ -0,0 +1,419 @@
+# dashboard/feed.py
+"""Fonte de eventos de partida ao vivo para o dashboard de eSports.
+
+Eventos são objetos JSON, um por linha (NDJSON), por exemplo:
+
+    {"t": 12.5, "match": 1, "type": "position", "player": "Faker", "team": "T1", "x": 40, "y": 62}
+    {"t": 13.0, "match": 1, "type": "kill", "player": "Faker", "team": "T1", "value": 1}
+
+`t` é o tempo do evento em segundos. Uma thread de ingestão lê os eventos em
+lotes, converte cada lote em colunas NumPy e os entrega aos assinantes, que
+mantêm os agregados lidos pelos callbacks. Linhas ou eventos inválidos são
+registrados no log e descartados, sem derrubar a ingestão.
+"""
+import collections
+import json
+import logging
+import numbers
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # orjson é opcional, só acelera o parse
+    loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# Pausa mínima (tempo dos eventos) entre duas voltas do replay de um arquivo sem duração
+LOOP_GAP = 1.0
+
+EVENT_TYPES = ('position', 'kill', 'death', 'assist', 'damage', 'cs', 'gold', 'objective')
+
+
+def parse_event(line, source):
+    """Evento de uma linha NDJSON, ou None (com aviso) se a linha não é um evento válido."""
+    try:
+        event = loads(line)
+    except ValueError as exc:
+        logger.warning('%s: linha inválida descartada: %s', source, exc)
+        return None
+    if not isinstance(event, dict) or not isinstance(event.get('t'), numbers.Real) \
+            or isinstance(event['t'], bool):
+        logger.warning('%s: evento sem tempo "t" numérico descartado: %.200r', source, event)
+        return None
+    return event
+
+
+class MatchEventSource:
+    """Interface das fontes de eventos: `read_batch` devolve até `max_events`
+    eventos (dicts) já disponíveis, ou uma lista vazia se não houver nada novo."""
+
+    def read_batch(self, max_events):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FileTailSource(MatchEventSource):
+    """Acompanha um arquivo NDJSON que continua crescendo (como `tail -f`)."""
+
+    def __init__(self, path, from_start=True):
+        self.path = path
+        self.from_start = from_start
+        self._file = None
+        self._partial = b''
+
+    def read_batch(self, max_events):
+        if self._file is None:
+            if not os.path.exists(self.path):
+                return []
+            self._file = open(self.path, 'rb')
+            if not self.from_start:
+                self._file.seek(0, os.SEEK_END)
+
+        events = []
+        while len(events) < max_events:
+            line = self._file.readline()
+            if not line:
+                break
+            if not line.endswith(b'\n'):
+                # Linha ainda sendo escrita: guardar e completar na próxima leitura
+                self._partial += line
+                break
+            line, self._partial = self._partial + line, b''
+            if line.strip():
+                # Uma linha ruim não invalida as já lidas do lote (seus bytes já foram consumidos)
+                event = parse_event(line, self.path)
+                if event is not None:
+                    events.append(event)
+        return events
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class NDJSONReplaySource(MatchEventSource):
+    """Reproduz um arquivo NDJSON gravado respeitando o campo `t` dos eventos.
+
+    `speed` acelera a reprodução (10 = dez vezes mais rápido); com `loop`,
+    o arquivo recomeça ao terminar, com os tempos deslocados para continuar
+    crescendo. Entre o último evento de uma volta e o primeiro da seguinte
+    passa o último intervalo positivo entre eventos (ou `LOOP_GAP` segundos,
+    se todos têm o mesmo `t`): um arquivo sem duração não gira sem pausa.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        # Aberto na primeira leitura, já na thread de ingestão (e depois de um fork)
+        self._file = None
+        self._next = None
+        self._t0 = None
+        self._started = None
+        self._offset = 0.0
+        self._last_t = 0.0
+        self._prev_t = None
+        self._gap = 0.0
+
+    def _peek(self):
+        if self._file is None:
+            self._file = open(self.path, 'rb')
+        while self._next is None:
+            line = self._file.readline()
+            if not line:
+                if not self.loop or self._t0 is None:
+                    return None
+                self._file.seek(0)
+                self._offset = self._last_t - self._t0 + (self._gap or LOOP_GAP)
+                self._prev_t = None
+                continue
+            if line.strip():
+                event = parse_event(line, self.path)
+                if event is None:
+                    continue
+                if self._t0 is None:
+                    self._t0 = event['t']
+                    self._started = time.monotonic()
+                if self._prev_t is not None and event['t'] > self._prev_t:
+                    self._gap = event['t'] - self._prev_t
+                self._prev_t = event['t']
+                event['t'] += self._offset
+                self._next = event
+        return self._next
+
+    def read_batch(self, max_events):
+        events = []
+        while len(events) < max_events:
+            event = self._peek()
+            if event is None:
+                break
+            due = self._started + (event['t'] - self._t0) / self.speed
+            if due > time.monotonic():
+                break
+            self._last_t = event['t']
+            events.append(event)
+            self._next = None
+        return events
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class Interner:
+    """Mapeia nomes (jogadores, times) para códigos inteiros estáveis."""
+
+    def __init__(self):
+        self.codes = {}
+        self.names = []
+
+    def code(self, name):
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+class ColumnarBuffer:
+    """Colunas NumPy pré-alocadas que só recebem novas linhas.
+
+    A capacidade dobra quando necessário, então o custo de inserção é O(1)
+    amortizado por linha. Um snapshot devolve visões até o tamanho atual:
+    as linhas já escritas nunca mudam, e uma realocação cria arrays novos
+    sem afetar as visões antigas.
+    """
+
+    def __init__(self, dtypes, capacity=4096):
+        self.dtypes = dtypes
+        self._columns = {name: np.empty(capacity, dtype) for name, dtype in dtypes.items()}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def version(self):
+        return self._size
+
+    def append(self, columns):
+        n = len(next(iter(columns.values())))
+        with self._lock:
+            needed = self._size + n
+            capacity = len(next(iter(self._columns.values())))
+            if needed > capacity:
+                while capacity < needed:
+                    capacity *= 2
+                for name, old in self._columns.items():
+                    new = np.empty(capacity, old.dtype)
+                    new[:self._size] = old[:self._size]
+                    self._columns[name] = new
+            for name, values in columns.items():
+                self._columns[name][self._size:needed] = values
+            self._size = needed
+
+    def snapshot(self):
+        with self._lock:
+            return {name: column[:self._size] for name, column in self._columns.items()}
+
+
+EVENT_DTYPES = {
+    't': np.float64,
+    'match': np.int32,
+    'type': np.int8,
+    'player': np.int32,
+    'team': np.int32,
+    'x': np.float32,
+    'y': np.float32,
+    'value': np.float64,
+}
+
+
+class LiveFeed:
+    """Ingestão em segundo plano de uma `MatchEventSource` para os assinantes.
+
+    Os assinantes (`subscribe`) recebem cada lote já em colunas, na thread de
+    ingestão, e podem atualizar agregados incrementais (heatmap, estatísticas).
+    O feed em si guarda só os lotes dos últimos `window` segundos (tempo dos
+    eventos), usados por `live_counters`: a memória não cresce com a duração
+    da partida nem com as voltas do replay.
+    """
+
+    def __init__(self, source, batch_size=5000, poll_interval=0.2, window=60):
+        self.source = source
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.window = window
+        self.players = Interner()
+        self.teams = Interner()
+        self._types = {name: code for code, name in enumerate(EVENT_TYPES)}
+        self._listeners = []
+        self._recent = collections.deque()
+        self._recent_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def start(self):
+        # Idempotente; após um fork a thread herdada não está viva e é recriada
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                batch = self.source.read_batch(self.batch_size)
+                if batch:
+                    self.ingest(batch)
+            except Exception:
+                # A thread não pode morrer: o lote com problema é descartado
+                logger.exception('live-feed: erro lendo ou ingerindo eventos')
+                batch = []
+            if not batch:
+                self._stop.wait(self.poll_interval)
+
+    def _columns(self, events):
+        n = len(events)
+        player_code, team_code, types = self.players.code, self.teams.code, self._types
+        return {
+            't': np.fromiter((e['t'] for e in events), np.float64, n),
+            'match': np.fromiter((e.get('match', 0) for e in events), np.int32, n),
+            'type': np.fromiter((types.get(e.get('type'), -1) for e in events), np.int8, n),
+            'player': np.fromiter((player_code(e.get('player', '')) for e in events), np.int32, n),
+            'team': np.fromiter((team_code(e.get('team', '')) for e in events), np.int32, n),
+            'x': np.fromiter((e.get('x', np.nan) for e in events), np.float32, n),
+            'y': np.fromiter((e.get('y', np.nan) for e in events), np.float32, n),
+            'value': np.fromiter((e.get('value', 1) for e in events), np.float64, n),
+        }
+
+    def ingest(self, events):
+        """Converte uma lista de eventos em colunas e distribui para os assinantes.
+
+        Eventos que não convertem (sem `t`, campos de tipo errado) são
+        descartados um a um, com aviso no log; os demais seguem.
+        """
+        try:
+            columns = self._columns(events)
+        except (KeyError, TypeError, ValueError, OverflowError):
+            # Caminho lento, só em lotes com eventos ruins: converte evento a evento
+            parts = []
+            for event in events:
+                try:
+                    parts.append(self._columns([event]))
+                except (KeyError, TypeError, ValueError, OverflowError) as exc:
+                    logger.warning('live-feed: evento inválido descartado (%r): %.200r', exc, event)
+            if not parts:
+                return
+            columns = {name: np.concatenate([part[name] for part in parts]) for name in EVENT_DTYPES}
+        self.publish(columns)
+
+    def publish(self, columns):
+        """Distribui um lote já em colunas (EVENT_DTYPES, códigos dos Interners) aos assinantes."""
+        self._remember(columns)
+        for listener in self._listeners:
+            try:
+                listener(self, columns)
+            except Exception:
+                # Um assinante com defeito não impede os outros nem derruba a ingestão
+                logger.exception('live-feed: assinante %r falhou', listener)
+
+    def _remember(self, columns):
+        recent = {name: columns[name] for name in ('t', 'match', 'player')}
+        if not len(recent['t']):
+            return
+        with self._recent_lock:
+            self._recent.append(recent)
+            # Descarta lotes inteiros já fora da janela
+            latest = self._recent[-1]['t'][-1]
+            while self._recent[0]['t'][-1] < latest - self.window:
+                self._recent.popleft()
+
+    def live_counters(self, window=None):
+        """(partidas ativas, jogadores ativos, eventos por minuto) na última janela.
+
+        Usa o tempo dos eventos, e não o relógio, e assume eventos em ordem de
+        tempo, o que vale para as duas fontes. `window` não passa de `self.window`.
+        """
+        window = self.window if window is None else min(window, self.window)
+        with self._recent_lock:
+            batches = list(self._recent)
+        if not batches:
+            return 0, 0, 0
+        t = np.concatenate([batch['t'] for batch in batches])
+        start = np.searchsorted(t, t[-1] - window, side='right')
+        matches = len(np.unique(np.concatenate([batch['match'] for batch in batches])[start:]))
+        players = len(np.unique(np.concatenate([batch['player'] for batch in batches])[start:]))
+        events_min = round((len(t) - start) * 60 / window)
+        return matches, players, events_min
+
+
+def feed_configured():
+    return bool(os.environ.get('ESPORTS_EVENTS'))
+
+
+def feed_from_env():
+    """Cria o LiveFeed configurado por ESPORTS_EVENTS (arquivo NDJSON), ou None.
+
+    ESPORTS_EVENTS_MODE: 'tail' (padrão) acompanha o arquivo; 'replay' reproduz
+    respeitando os tempos, acelerado por ESPORTS_REPLAY_SPEED.
+
+    O feed e os agregados dos assinantes vivem na memória do processo: sirva o
+    app com um único processo (dashboard.serve força `--workers 1`), senão
+    cada worker lê o arquivo de novo e responde com o seu próprio estado.
+    """
+    if not feed_configured():
+        return None
+    path = os.environ['ESPORTS_EVENTS']
+    if os.environ.get('ESPORTS_EVENTS_MODE', 'tail') == 'replay':
+        speed = float(os.environ.get('ESPORTS_REPLAY_SPEED', '1'))
+        source = NDJSONReplaySource(path, speed=speed, loop=True)
+    else:
+        source = FileTailSource(path)
+    return LiveFeed(source)
+
+
+def write_synthetic_events(path, n_events, matches=((1, 'T1', 'DK'), (2, 'G2', 'RNG'), (3, 'IG', 'FPX')),
+                           rate=1000.0, seed=42):
+    """Grava `n_events` eventos sintéticos (para testes e replay local)."""
+    rng = random.Random(seed)
+    weights = [60, 4, 4, 6, 12, 8, 5, 1]
+    with open(path, 'w') as output:
+        for i in range(n_events):
+            match_id, team1, team2 = rng.choice(matches)
+            team = rng.choice((team1, team2))
+            event = {
+                't': round(i / rate, 3),
+                'match': match_id,
+                'type': rng.choices(EVENT_TYPES, weights)[0],
+                'player': f"{team}_{rng.randint(1, 5)}",
+                'team': team,
+            }
+            if event['type'] == 'position':
+                event['x'] = rng.randint(0, 100)
+                event['y'] = rng.randint(0, 100)
+            elif event['type'] in ('damage', 'gold'):
+                event['value'] = rng.randint(50, 600)
+            output.write(json.dumps(event) + '\n')
+
+
+if __name__ == '__main__':
+    # python -m dashboard.feed eventos.ndjson 100000
+    write_synthetic_events(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
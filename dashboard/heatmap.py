@@ -0,0 +1,128 @@
+# dashboard/heatmap.py
+import threading
+import time
+
+import numpy as np
+
+
+def _bin(values, lo, hi, n):
+    idx = np.floor((values - lo) * (n / (hi - lo))).astype(np.intp)
+    # O limite superior pertence à última célula
+    idx[values == hi] = n - 1
+    return idx
+
+
+def bin_counts(x, y, bins, x_range, y_range, weights=None):
+    """Contagem (ou soma de pesos) das posições em uma grade (ny, nx), com um único bincount.
+
+    Posições fora dos limites são ignoradas.
+    """
+    nx, ny = bins
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ix = _bin(x, *x_range, nx)
+    iy = _bin(y, *y_range, ny)
+    inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)[inside]
+    flat = iy[inside] * nx + ix[inside]
+    return np.bincount(flat, weights=weights, minlength=nx * ny).reshape(ny, nx)
+
+
+class HeatmapAccumulator:
+    """Grade 2D de resolução fixa atualizada de forma incremental.
+
+    Cada lote de posições vira um único `np.bincount` sobre os índices das
+    células, então o custo de desenhar o heatmap depende só do tamanho da
+    grade, e não de quantos eventos já chegaram.
+
+    Opcionalmente:
+      - `half_life`: decaimento exponencial (segundos até o peso cair à metade);
+      - `window`: janela deslizante (segundos), dividida em `slots` fatias que
+        são descartadas inteiras quando saem da janela.
+    """
+
+    def __init__(self, bins=(25, 25), x_range=(0, 100), y_range=(0, 100),
+                 half_life=None, window=None, slots=12, clock=time.time):
+        self.nx, self.ny = bins
+        self.x_range = x_range
+        self.y_range = y_range
+        self.half_life = half_life
+        self.window = window
+        self.clock = clock
+
+        self._grid = np.zeros((self.ny, self.nx))
+        self._lock = threading.Lock()
+        self._t = None
+        if window:
+            self._slots = np.zeros((slots, self.ny, self.nx))
+            self._slot_width = window / slots
+            self._slot = None
+        self.version = 0
+
+    @property
+    def x_centers(self):
+        x0, x1 = self.x_range
+        step = (x1 - x0) / self.nx
+        return x0 + step * (np.arange(self.nx) + 0.5)
+
+    @property
+    def y_centers(self):
+        y0, y1 = self.y_range
+        step = (y1 - y0) / self.ny
+        return y0 + step * (np.arange(self.ny) + 0.5)
+
+    def add(self, x, y, weights=None, t=None):
+        """Soma um lote de posições (arrays ou listas) à grade."""
+        counts = bin_counts(x, y, (self.nx, self.ny), self.x_range, self.y_range, weights)
+
+        with self._lock:
+            self._advance(self.clock() if t is None else t)
+            self._grid += counts
+            if self.window:
+                self._slots[self._slot % len(self._slots)] += counts
+            self.version += 1
+
+    def _advance(self, t):
+        # Aplica o decaimento e descarta as fatias que saíram da janela
+        changed = False
+        if self.half_life and self._t is not None and t > self._t:
+            factor = 0.5 ** ((t - self._t) / self.half_life)
+            self._grid *= factor
+            if self.window:
+                self._slots *= factor
+            changed = True
+        if self.window:
+            slot = int(t // self._slot_width)
+            if self._slot is None:
+                self._slot = slot
+            elif slot > self._slot:
+                n_slots = len(self._slots)
+                for expired in range(self._slot + 1, min(slot, self._slot + n_slots) + 1):
+                    pos = expired % n_slots
+                    self._grid -= self._slots[pos]
+                    self._slots[pos] = 0
+                # Evita resíduos negativos de arredondamento
+                np.maximum(self._grid, 0, out=self._grid)
+                self._slot = slot
+                changed = True
+        if self._t is None or t > self._t:
+            self._t = t
+        return changed
+
+    def snapshot(self, now=None):
+        """Retorna (versão, cópia da grade). Com decaimento ou janela, avança até `now`."""
+        with self._lock:
+            if (self.half_life or self.window) and self._t is not None:
+                if self._advance(self.clock() if now is None else now):
+                    self.version += 1
+            return self.version, self._grid.copy()
+
+    def reset(self):
+        with self._lock:
+            self._grid[:] = 0
+            if self.window:
+                self._slots[:] = 0
+                self._slot = None
+            self._t = None
+            self.version += 1
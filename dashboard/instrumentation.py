@@ -0,0 +1,230 @@
+# dashboard/instrumentation.py
+"""Métricas por callback dos apps Dash.
+
+`CallbackMetrics.instrument(app)` envolve `app.callback`: todo callback
+registrado depois disso mede o tempo de execução, conta acertos e erros do
+`figure_cache` feitos durante a chamada e, no `after_request` do Flask, o
+tamanho da resposta enviada ao navegador. Tudo vai para histogramas em
+memória, expostos em `/metrics` no formato texto do Prometheus.
+
+Com `profile_ms`, uma fração (`profile_rate`) das chamadas roda sob cProfile;
+as que passam do limite guardam as funções mais caras e a chave das
+entradas, consultáveis em `/metrics/profiles`. Os números são por processo:
+com vários workers do gunicorn, cada um expõe os seus. Callbacks com
+`background=True` executam no processo da tarefa e não aparecem aqui.
+"""
+import bisect
+import collections
+import cProfile
+import functools
+import hashlib
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+
+from dash.exceptions import PreventUpdate
+
+from dashboard.cache import lookup_outcomes
+
+# Limites superiores dos baldes (segundos e bytes), como nos histogramas do Prometheus
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PAYLOAD_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.total:.6g}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+def input_key(args):
+    """Hash curto das entradas do callback, para identificar chamadas lentas."""
+    return hashlib.sha1(json.dumps(args, default=str).encode()).hexdigest()[:12]
+
+
+class CallbackMetrics:
+    """Histogramas de duração e de payload, e contadores de cache, por callback."""
+
+    def __init__(self, app_name, profile_ms=None, profile_rate=0.1, max_profiles=20):
+        self.app_name = app_name
+        self.profile_ms = profile_ms
+        self.profile_rate = profile_rate
+        self._durations = collections.defaultdict(lambda: Histogram(DURATION_BUCKETS))
+        self._payloads = collections.defaultdict(lambda: Histogram(PAYLOAD_BUCKETS))
+        self._outcomes = collections.Counter()
+        self._cache = collections.Counter()
+        self._profiles = collections.deque(maxlen=max_profiles)
+        self._lock = threading.Lock()
+        # cProfile só admite um perfilador ativo por processo
+        self._profiler_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, app_name):
+        """DASH_PROFILE_MS liga a amostragem de perfis; DASH_PROFILE_RATE é a fração amostrada."""
+        profile_ms = os.environ.get('DASH_PROFILE_MS')
+        return cls(app_name, profile_ms=float(profile_ms) if profile_ms else None,
+                   profile_rate=float(os.environ.get('DASH_PROFILE_RATE', 0.1)))
+
+    # ---------- Registro ----------
+    def instrument(self, app):
+        """Passa a medir todo callback registrado com `app.callback` a partir daqui."""
+        original = app.callback
+
+        @functools.wraps(original)
+        def callback(*args, **kwargs):
+            register = original(*args, **kwargs)
+
+            def decorator(func):
+                register(self.wrap(func.__name__, func))
+                # Devolve a função original: chamadas diretas (benchmarks) não são medidas
+                return func
+            return decorator
+
+        app.callback = callback
+        app.server.after_request(self._record_payload)
+
+    def wrap(self, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            outcomes = collections.Counter()
+            token = lookup_outcomes.set(outcomes)
+            profiler = self._start_profiler()
+            outcome = 'ok'
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except PreventUpdate:
+                outcome = 'prevented'
+                raise
+            except Exception:
+                outcome = 'error'
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                lookup_outcomes.reset(token)
+                self._finish_profiler(profiler, name, args, elapsed)
+                self._record_call(name, elapsed, outcome, outcomes)
+        return wrapper
+
+    # ---------- Coleta ----------
+    def _record_call(self, name, elapsed, outcome, outcomes):
+        with self._lock:
+            self._durations[name].observe(elapsed)
+            self._outcomes[name, outcome] += 1
+            for cache_outcome, count in outcomes.items():
+                self._cache[name, cache_outcome] += count
+        _set_request_callback(name)
+
+    def _record_payload(self, response):
+        name = _request_callback()
+        if name is not None:
+            size = response.calculate_content_length()
+            if size is not None:
+                with self._lock:
+                    self._payloads[name].observe(size)
+        return response
+
+    def _start_profiler(self):
+        if self.profile_ms is None or random.random() >= self.profile_rate:
+            return None
+        if not self._profiler_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Outro perfilador (depurador, py-spy em modo trace...) já está ativo
+            self._profiler_lock.release()
+            return None
+        return profiler
+
+    def _finish_profiler(self, profiler, name, args, elapsed):
+        if profiler is None:
+            return
+        profiler.disable()
+        self._profiler_lock.release()
+        if elapsed * 1000 < self.profile_ms:
+            return
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(25)
+        with self._lock:
+            self._profiles.append({
+                'callback': name, 'input_key': input_key(args), 'ms': round(elapsed * 1000, 1),
+                'time': time.time(), 'stats': output.getvalue(),
+            })
+
+    # ---------- Exposição ----------
+    def render(self):
+        """Métricas no formato texto do Prometheus."""
+        with self._lock:
+            lines = ['# TYPE dash_callback_duration_seconds histogram']
+            for name, histogram in sorted(self._durations.items()):
+                lines.extend(histogram.lines('dash_callback_duration_seconds', self._labels(name)))
+            lines.append('# TYPE dash_callback_payload_bytes histogram')
+            for name, histogram in sorted(self._payloads.items()):
+                lines.extend(histogram.lines('dash_callback_payload_bytes', self._labels(name)))
+            lines.append('# TYPE dash_callback_calls_total counter')
+            for (name, outcome), count in sorted(self._outcomes.items()):
+                lines.append(f'dash_callback_calls_total{{{self._labels(name)},outcome="{outcome}"}} {count}')
+            lines.append('# TYPE dash_callback_cache_lookups_total counter')
+            for (name, outcome), count in sorted(self._cache.items()):
+                lines.append(f'dash_callback_cache_lookups_total{{{self._labels(name)},outcome="{outcome}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def profiles(self):
+        with self._lock:
+            return list(self._profiles)
+
+    def _labels(self, name):
+        return f'app="{self.app_name}",callback="{name}"'
+
+    def register_route(self, server, path='/metrics'):
+        """Rotas Flask `/metrics` (Prometheus) e `/metrics/profiles` (perfis das chamadas lentas)."""
+        from flask import Response
+
+        def metrics():
+            return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+        def profiles():
+            text = '\n'.join(
+                f"== {p['callback']} {p['ms']} ms entradas={p['input_key']} "
+                f"em {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(p['time']))}\n{p['stats']}"
+                for p in reversed(self.profiles())
+            )
+            return Response(text, mimetype='text/plain')
+
+        server.add_url_rule(path, 'callback_metrics', metrics)
+        server.add_url_rule(f'{path}/profiles', 'callback_profiles', profiles)
+
+
+def _set_request_callback(name):
+    # Guarda o callback da requisição para o after_request medir o payload
+    from flask import g, has_request_context
+
+    if has_request_context():
+        g.dash_callback = name
+
+
+def _request_callback():
+    from flask import g
+
+    return g.pop('dash_callback', None)
@@ -0,0 +1,25 @@
+# dashboard/live.py
+import threading
+
+
+class VersionedTable:
+    """DataFrame com um número de versão incrementado a cada substituição.
+
+    Os callbacks guardam a última versão enviada ao navegador (em um
+    dcc.Store) e só geram uma atualização quando a versão muda.
+    """
+
+    def __init__(self, df):
+        self._df = df
+        self._lock = threading.Lock()
+        self.version = 1
+
+    def update(self, df):
+        with self._lock:
+            self._df = df
+            self.version += 1
+
+    def snapshot(self):
+        with self._lock:
+            return self.version, self._df
+
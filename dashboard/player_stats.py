@@ -0,0 +1,107 @@
+# dashboard/player_stats.py
+import math
+import threading
+
+import numpy as np
+
+from dashboard.feed import EVENT_TYPES
+
+METRICS = ('kill', 'death', 'assist', 'damage', 'cs')
+
+# Tipo de evento -> coluna da métrica (-1 para eventos que não contam aqui)
+METRIC_OF_TYPE = np.full(len(EVENT_TYPES), -1, dtype=np.intp)
+for _column, _name in enumerate(METRICS):
+    METRIC_OF_TYPE[EVENT_TYPES.index(_name)] = _column
+
+
+class RollingPlayerStats:
+    """Métricas por jogador nos últimos `window` segundos (KDA, dano/min, CS/min).
+
+    Cada jogador ocupa uma linha em arrays pré-alocados, indexada pelo código
+    do jogador no LiveFeed. A janela é dividida em buckets de `bucket`
+    segundos guardados em um anel; somas correntes são mantidas por jogador,
+    então um evento custa O(1) e expirar um bucket custa uma subtração
+    vetorizada por bucket, não por evento.
+    """
+
+    def __init__(self, window=600, bucket=10, capacity=256):
+        self.window = window
+        self.bucket = bucket
+        self.n_buckets = math.ceil(window / bucket)
+        self._ring = np.zeros((capacity, self.n_buckets, len(METRICS)))
+        self._sums = np.zeros((capacity, len(METRICS)))
+        self._seen = np.zeros(capacity, dtype=bool)
+        self._current = None
+        self._first_t = None
+        self._last_t = None
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def _ensure_capacity(self, n_players):
+        capacity = len(self._sums)
+        if n_players <= capacity:
+            return
+        while capacity < n_players:
+            capacity *= 2
+        grow = capacity - len(self._sums)
+        self._ring = np.pad(self._ring, ((0, grow), (0, 0), (0, 0)))
+        self._sums = np.pad(self._sums, ((0, grow), (0, 0)))
+        self._seen = np.pad(self._seen, (0, grow))
+
+    def _advance(self, bucket):
+        # Expira os buckets que saíram da janela (no máximo um anel inteiro)
+        if self._current is None:
+            self._current = bucket
+            return
+        for expired in range(self._current + 1, min(bucket, self._current + self.n_buckets) + 1):
+            pos = expired % self.n_buckets
+            self._sums -= self._ring[:, pos]
+            self._ring[:, pos] = 0
+        self._current = max(self._current, bucket)
+
+    def update(self, t, player, event_type, value):
+        """Aplica um lote de eventos (arrays de LiveFeed); ignora tipos sem métrica."""
+        metric = METRIC_OF_TYPE[event_type]
+        counted = (metric >= 0) & (event_type >= 0)
+        if not counted.any():
+            return
+        t, player, metric, value = t[counted], player[counted], metric[counted], value[counted]
+        buckets = (t // self.bucket).astype(np.int64)
+
+        with self._lock:
+            self._ensure_capacity(int(player.max()) + 1)
+            self._seen[player] = True
+            if self._first_t is None:
+                self._first_t = float(t[0])
+            self._last_t = float(t[-1]) if self._last_t is None else max(self._last_t, float(t[-1]))
+
+            # Um lote costuma cobrir poucos buckets: um add.at por bucket
+            for bucket in np.unique(buckets):
+                self._advance(int(bucket))
+                if bucket <= self._current - self.n_buckets:
+                    continue  # evento atrasado, já fora da janela
+                in_bucket = buckets == bucket
+                pos = int(bucket) % self.n_buckets
+                np.add.at(self._ring[:, pos], (player[in_bucket], metric[in_bucket]), value[in_bucket])
+                np.add.at(self._sums, (player[in_bucket], metric[in_bucket]), value[in_bucket])
+            self.version += 1
+
+    def snapshot(self):
+        """Métricas dos jogadores já vistos, como arrays alinhados por `player`."""
+        with self._lock:
+            player = np.flatnonzero(self._seen)
+            sums = self._sums[player].copy()
+            version = self.version
+            elapsed = 0 if self._first_t is None else self._last_t - self._first_t
+        minutes = max(min(self.window, elapsed) / 60, 1 / 60)
+        kills, deaths, assists, damage, cs = np.maximum(sums, 0).T
+        return {
+            'version': version,
+            'player': player,
+            'kills': kills,
+            'deaths': deaths,
+            'assists': assists,
+            'kda': (kills + assists) / np.maximum(deaths, 1),
+            'damage_min': damage / minutes,
+            'cs_min': cs / minutes,
+        }
@@ -0,0 +1,171 @@
+# dashboard/replay.py
+"""Replay de partidas com busca rápida por tempo.
+
+O estado agregado de uma partida (heatmap, estatísticas por jogador e por
+time) é salvo em um keyframe a cada `keyframe_every` eventos; os eventos em
+si formam o log de deltas. Buscar o instante `t` custa uma cópia de keyframe
+mais, no máximo, `keyframe_every` eventos aplicados de forma vetorizada.
+
+Só os últimos `max_keyframes` trechos (keyframe + seus eventos) ficam em
+memória: com a ingestão contínua (o replay do feed recomeça ao terminar), o
+começo da partida vai sendo descartado e o intervalo buscável acompanha.
+"""
+import bisect
+import collections
+import threading
+
+import numpy as np
+
+from dashboard.feed import EVENT_TYPES, ColumnarBuffer
+from dashboard.heatmap import bin_counts
+from dashboard.win_probability import FEATURES
+
+TYPE_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+
+# Colunas de MatchState.players e MatchState.teams
+PLAYER_METRICS = ('kill', 'death', 'assist', 'damage', 'cs')
+# Os totais por time usam os mesmos atributos do modelo de vitória
+TEAM_METRICS = FEATURES
+
+REPLAY_DTYPES = {
+    't': np.float64,
+    'type': np.int8,
+    'player': np.int32,
+    'side': np.int8,
+    'x': np.float32,
+    'y': np.float32,
+    'value': np.float64,
+}
+
+
+class MatchState:
+    """Agregados de uma partida até um instante."""
+
+    def __init__(self, bins, x_range, y_range):
+        self.bins = bins
+        self.x_range = x_range
+        self.y_range = y_range
+        self.grid = np.zeros((bins[1], bins[0]))
+        # Indexado pelo código global do jogador (LiveFeed.players)
+        self.players = np.zeros((0, len(PLAYER_METRICS)))
+        self.teams = np.zeros((2, len(TEAM_METRICS)))
+        self.t = None
+
+    def copy(self):
+        state = MatchState.__new__(MatchState)
+        state.bins, state.x_range, state.y_range = self.bins, self.x_range, self.y_range
+        state.grid = self.grid.copy()
+        state.players = self.players.copy()
+        state.teams = self.teams.copy()
+        state.t = self.t
+        return state
+
+    def apply(self, events):
+        """Aplica um bloco de eventos (colunas REPLAY_DTYPES) ao estado."""
+        types = events['type']
+        if not len(types):
+            return
+        value = events['value']
+
+        positions = types == TYPE_CODES['position']
+        if positions.any():
+            self.grid += bin_counts(events['x'][positions], events['y'][positions],
+                                    self.bins, self.x_range, self.y_range)
+
+        players = events['player']
+        n_players = int(players.max()) + 1
+        if n_players > len(self.players):
+            self.players = np.pad(self.players, ((0, n_players - len(self.players)), (0, 0)))
+        for column, name in enumerate(PLAYER_METRICS):
+            mask = types == TYPE_CODES[name]
+            if mask.any():
+                self.players[:, column] += np.bincount(players[mask], weights=value[mask],
+                                                       minlength=len(self.players))
+
+        side = events['side']
+        for column, name in enumerate(TEAM_METRICS):
+            mask = (types == TYPE_CODES[name]) & (side >= 0)
+            if mask.any():
+                self.teams[:, column] += np.bincount(side[mask], weights=value[mask], minlength=2)
+
+        self.t = float(events['t'][-1])
+
+
+class MatchReplay:
+    """Log de eventos de uma partida com keyframes periódicos do estado agregado.
+
+    `extend` recebe os lotes da partida conforme chegam (em ordem de tempo)
+    e `seek` reconstrói o estado em qualquer instante entre `start_t` e
+    `end_t`. Os eventos ficam em trechos de `keyframe_every` linhas, cada um
+    com o keyframe do estado no seu início; além de `max_keyframes` trechos,
+    os mais antigos são descartados.
+    """
+
+    def __init__(self, team_codes, keyframe_every=1000, max_keyframes=200, bins=(25, 25),
+                 x_range=(0, 100), y_range=(0, 100)):
+        self.team_codes = np.asarray(team_codes)
+        self.keyframe_every = keyframe_every
+        self.max_keyframes = max_keyframes
+        self._state = MatchState(bins, x_range, y_range)
+        # keyframes[i] = estado antes do primeiro evento de segments[i]
+        self.keyframes = collections.deque([self._state.copy()])
+        self.segments = collections.deque([self._new_segment()])
+        self._lock = threading.Lock()
+
+    def _new_segment(self):
+        return ColumnarBuffer(REPLAY_DTYPES, capacity=self.keyframe_every)
+
+    @property
+    def start_t(self):
+        """Instante do evento mais antigo ainda em memória (None antes do primeiro)."""
+        with self._lock:
+            first = self.segments[0]
+            return float(first.snapshot()['t'][0]) if len(first) else None
+
+    @property
+    def end_t(self):
+        return self._state.t
+
+    def extend(self, columns):
+        """Acrescenta um lote (colunas de LiveFeed já filtradas para esta partida)."""
+        # Lado de cada evento: 0 para Time1, 1 para Time2, -1 se o time não é da partida
+        side = np.full(len(columns['t']), -1, dtype=np.int8)
+        for i, code in enumerate(self.team_codes):
+            side[columns['team'] == code] = i
+        batch = {name: columns[name] for name in REPLAY_DTYPES if name != 'side'}
+        batch['side'] = side
+
+        k = self.keyframe_every
+        with self._lock:
+            n = len(side)
+            i = 0
+            while i < n:
+                # Completa o trecho atual até o próximo limite de keyframe
+                segment = self.segments[-1]
+                take = min(n - i, k - len(segment))
+                chunk = {name: values[i:i + take] for name, values in batch.items()}
+                segment.append(chunk)
+                self._state.apply(chunk)
+                i += take
+                if len(segment) == k:
+                    self.keyframes.append(self._state.copy())
+                    self.segments.append(self._new_segment())
+                    while len(self.segments) > self.max_keyframes:
+                        self.keyframes.popleft()
+                        self.segments.popleft()
+
+    def seek(self, t):
+        """Estado da partida no instante `t` (tempo dos eventos), limitado a `start_t`."""
+        with self._lock:
+            segments = [segment.snapshot() for segment in self.segments]
+            keyframes = list(self.keyframes)
+        # Último trecho que começa até `t`; antes do primeiro, o estado do seu keyframe
+        starts = [events['t'][0] for events in segments if len(events['t'])]
+        base = max(bisect.bisect_right(starts, t) - 1, 0)
+        state = keyframes[base].copy()
+        events = segments[base]
+        idx = int(np.searchsorted(events['t'], t, side='right'))
+        state.apply({name: values[:idx] for name, values in events.items()})
+        if state.t is None:
+            state.t = t
+        return state
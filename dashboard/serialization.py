@@ -0,0 +1,109 @@
+# dashboard/serialization.py
+"""Serialização compacta das figuras enviadas pelos callbacks.
+
+Arrays numéricos dos traces viram typed arrays em base64
+(`{"dtype": "f4", "bdata": "...", "shape": "r, c"}`), formato aceito pelo
+Plotly.js usado pelo Plotly 6, em vez de listas JSON de números. Inteiros
+são reduzidos ao menor tipo que os comporta e floats para float32 só quando
+a conversão é exata (timestamps em segundos, por exemplo, ficam em float64).
+"""
+import base64
+
+import numpy as np
+import plotly.io as pio
+from plotly.basedatatypes import BaseFigure
+
+# Abaixo disso a lista JSON já é pequena e o ganho não compensa
+MIN_ARRAY_LENGTH = 16
+
+_INT_TYPES = (np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32)
+_DTYPE_CODES = {
+    np.dtype(np.int8): 'i1', np.dtype(np.uint8): 'u1',
+    np.dtype(np.int16): 'i2', np.dtype(np.uint16): 'u2',
+    np.dtype(np.int32): 'i4', np.dtype(np.uint32): 'u4',
+    np.dtype(np.float32): 'f4', np.dtype(np.float64): 'f8',
+}
+_CODE_DTYPES = {code: dtype for dtype, code in _DTYPE_CODES.items()}
+
+
+def use_fast_json():
+    """Usa orjson para codificar figuras (Dash usa o mesmo encoder do plotly.io), se instalado."""
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        return False
+    pio.json.config.default_engine = 'orjson'
+    return True
+
+
+def _downcast(arr):
+    if arr.dtype.kind == 'b':
+        return arr.astype(np.uint8)
+    if arr.dtype.kind in 'iu':
+        if not arr.size:
+            return arr.astype(np.int32)
+        lo, hi = arr.min(), arr.max()
+        for dtype in _INT_TYPES:
+            info = np.iinfo(dtype)
+            if info.min <= lo and hi <= info.max:
+                return arr.astype(dtype)
+        # Inteiros de 64 bits não têm typed array no Plotly.js
+        return arr.astype(np.float64)
+    with np.errstate(over='ignore', invalid='ignore'):
+        single = arr.astype(np.float32)
+        # Só quando a ida e volta é exata: qualquer tolerância junta valores grandes e distintos
+        if np.array_equal(single.astype(np.float64), arr, equal_nan=True):
+            return single
+    return arr.astype(np.float64)
+
+
+def compact_array(values):
+    """Typed array em base64 para uma sequência numérica, ou os próprios valores se não for numérica."""
+    if isinstance(values, dict):
+        if 'bdata' not in values or values.get('dtype') not in _CODE_DTYPES:
+            return values
+        # Typed array já codificado (ex.: pelo Plotly 6 em float64): tentar reduzir
+        arr = np.frombuffer(base64.b64decode(values['bdata']), dtype=_CODE_DTYPES[values['dtype']])
+        if 'shape' in values:
+            arr = arr.reshape([int(n) for n in str(values['shape']).split(',')])
+    else:
+        try:
+            arr = np.asarray(values)
+        except ValueError:  # listas irregulares
+            return values
+    if arr.dtype.kind not in 'biuf' or arr.ndim > 2 or arr.size < MIN_ARRAY_LENGTH:
+        return values
+
+    arr = _downcast(arr)
+    # Typed arrays do navegador são little-endian
+    arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder('<'))
+    spec = {
+        'dtype': _DTYPE_CODES[np.dtype(arr.dtype.type)],
+        'bdata': base64.b64encode(arr.tobytes()).decode('ascii')
+    }
+    if arr.ndim == 2:
+        spec['shape'] = f'{arr.shape[0]}, {arr.shape[1]}'
+    return spec
+
+
+def _compact(node):
+    if isinstance(node, dict):
+        if 'bdata' in node:
+            return compact_array(node)
+        return {key: _compact(value) for key, value in node.items()}
+    if isinstance(node, (list, tuple, np.ndarray)):
+        compacted = compact_array(node)
+        if compacted is not node:
+            return compacted
+        return [_compact(item) for item in node]
+    return node
+
+
+def compact_figure(fig):
+    """Dict da figura com os arrays numéricos dos traces em typed arrays compactos.
+
+    O layout fica como está: é pequeno e tem poucos arrays.
+    """
+    figure = fig.to_plotly_json() if isinstance(fig, BaseFigure) else dict(fig)
+    figure['data'] = [_compact(trace) for trace in figure.get('data', [])]
+    return figure
@@ -0,0 +1,115 @@
+# dashboard/serve.py
+"""Modo de produção dos dashboards: gunicorn com vários workers.
+
+    python -m dashboard.serve main --workers 4 --threads 8 --bind 0.0.0.0:8051
+    python -m dashboard.serve social --workers 4 --pidfile social.pid
+
+O módulo do app (e portanto os dados) é carregado uma vez no processo pai
+(`preload_app`); os workers são criados por fork e compartilham essa memória
+em copy-on-write. Depois do fork cada worker chama `on_worker_start()` do
+módulo, se existir, para iniciar suas threads de segundo plano.
+
+Recarga sem derrubar conexões: `kill -HUP $(cat app.pid)` troca os workers
+um a um. Com `preload_app` o código não é relido no HUP; para publicar uma
+nova versão use `--no-preload` (cada worker importa o app) ou reinicie o
+processo pai.
+
+Apps cuja ingestão ao vivo guarda o estado na memória do processo (o
+`main` com ESPORTS_EVENTS) rodam com um único worker: com vários, cada um
+leria a fonte de novo e as consultas cairiam em estados diferentes entre
+um poll e outro. Para mais vazão nesse caso, aumente `--threads`.
+"""
+import argparse
+import importlib
+import multiprocessing
+import os
+
+from gunicorn.app.base import BaseApplication
+
+from dashboard.feed import feed_configured
+
+APPS = {
+    'main': 'main',
+    'social': 'main_social',
+}
+
+# Apps que precisam de um único processo quando a condição vale
+SINGLE_PROCESS = {
+    'main': feed_configured,
+}
+
+
+class DashApplication(BaseApplication):
+    def __init__(self, module_name, options):
+        self.module_name = module_name
+        self.options = options
+        self.module = None
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if value is not None:
+                self.cfg.set(key, value)
+
+        def post_fork(server, worker):
+            self.worker_started()
+
+        self.cfg.set('post_fork', post_fork)
+
+    def load(self):
+        self.module = importlib.import_module(self.module_name)
+        return self.module.server
+
+    def worker_started(self):
+        # Sem preload, o módulo é importado no próprio worker e já iniciou tudo
+        if self.module is not None:
+            on_worker_start = getattr(self.module, 'on_worker_start', None)
+            if on_worker_start is not None:
+                on_worker_start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servir um dashboard Dash em modo de produção')
+    parser.add_argument('app', choices=sorted(APPS))
+    parser.add_argument('--bind', default='127.0.0.1:8050')
+    parser.add_argument('--workers', type=int,
+                        help='Padrão: um por CPU, ou 1 se o app tem ingestão ao vivo configurada')
+    parser.add_argument('--threads', type=int, default=4, help='Threads por worker')
+    parser.add_argument('--timeout', type=int, default=60)
+    parser.add_argument('--graceful-timeout', type=int, default=30)
+    parser.add_argument('--max-requests', type=int, default=0,
+                        help='Reciclar cada worker após N requisições (0 = nunca)')
+    parser.add_argument('--pidfile')
+    parser.add_argument('--no-preload', action='store_true',
+                        help='Importar o app em cada worker (permite recarregar código com HUP)')
+    args = parser.parse_args(argv)
+
+    single_process = SINGLE_PROCESS.get(args.app, lambda: False)()
+    if single_process and args.workers not in (None, 1):
+        parser.error(f'{args.app} com ingestão ao vivo (ESPORTS_EVENTS) exige --workers 1; '
+                     'use --threads para mais vazão')
+    workers = args.workers or (1 if single_process else multiprocessing.cpu_count())
+
+    preload = not args.no_preload
+    if preload:
+        # O app não deve iniciar threads no pai; elas não sobreviveriam ao fork
+        os.environ['DASH_PRELOAD'] = '1'
+
+    options = {
+        'bind': args.bind,
+        'workers': workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests // 10 if args.max_requests else 0,
+        'preload_app': preload,
+        'pidfile': args.pidfile,
+        'accesslog': None,
+    }
+    DashApplication(APPS[args.app], options).run()
+
+
+if __name__ == '__main__':
+    main()
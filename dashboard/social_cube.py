@@ -0,0 +1,257 @@
+# dashboard/social_cube.py
+"""Agregados pré-calculados do dashboard de mídias sociais.
+
+As tabelas diárias (seguidores e engajamento) são reduzidas a matrizes
+plataforma × dia, com somas acumuladas ao longo dos dias: o total de uma
+janela "últimos N dias" é uma subtração, e a série de um gráfico é uma
+fatia. Sentimento, demografia e geografia viram somas por plataforma. Os
+callbacks passam a custar O(plataformas × dias), independente do número de
+linhas, e novos dias entram por `extend` sem recalcular o histórico.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dashboard.feed import Interner
+
+ALL_PLATFORMS = 'Todas'
+ENGAGEMENT_METRICS = ('likes', 'comments', 'shares')
+SENTIMENT_METRICS = ('positive', 'neutral', 'negative')
+
+
+def _factorize(values, axis):
+    # Códigos do eixo `axis` (Interner) para cada valor, sem laço por linha
+    codes, uniques = pd.factorize(values)
+    mapping = np.array([axis.code(value) for value in uniques], dtype=np.int64)
+    return mapping[codes]
+
+
+def _grow(arr, shape):
+    # Amplia as últimas dimensões com zeros, mantendo os valores existentes
+    if arr.shape == shape:
+        return arr
+    out = np.zeros(shape, dtype=arr.dtype)
+    out[tuple(slice(0, n) for n in arr.shape)] = arr
+    return out
+
+
+class SocialCube:
+    """Matrizes plataforma × dia (e plataforma × categoria) das tabelas de main_social."""
+
+    def __init__(self):
+        self.platforms = Interner()
+        self.ages = Interner()
+        self.genders = Interner()
+        self.countries = Interner()
+        self.dates = np.array([], dtype=object)
+        # (plataforma, dia): soma dos seguidores e número de linhas
+        self.followers = np.zeros((0, 0))
+        self.rows = np.zeros((0, 0), dtype=np.int64)
+        # (métrica, plataforma, dia) e somas acumuladas com uma coluna zero à esquerda
+        self.engagement = np.zeros((len(ENGAGEMENT_METRICS), 0, 0))
+        self._engagement_cum = np.zeros((len(ENGAGEMENT_METRICS), 0, 1))
+        # (plataforma, métrica) e linhas por plataforma, para médias
+        self.sentiment = np.zeros((0, len(SENTIMENT_METRICS)))
+        self.sentiment_rows = np.zeros(0, dtype=np.int64)
+        self.demographics = np.zeros((0, 0, 0))  # (plataforma, faixa etária, gênero)
+        self.geo = np.zeros((0, 0))  # (plataforma, país)
+        self.version = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frames(cls, followers_df, engagement_df, sentiment_df=None, demographics_df=None, geo_df=None):
+        cube = cls()
+        cube.extend(followers_df, engagement_df)
+        cube.set_profiles(sentiment_df, demographics_df, geo_df)
+        return cube
+
+    # ---------- Atualização ----------
+    def extend(self, followers_df=None, engagement_df=None):
+        """Acrescenta linhas diárias (colunas date, platform e as métricas) aos agregados.
+
+        Dias novos no fim do eixo só acrescentam colunas; linhas de dias já
+        conhecidos são somadas aos agregados existentes.
+        """
+        frames = [df for df in (followers_df, engagement_df) if df is not None and len(df)]
+        if not frames:
+            return
+        with self._lock:
+            for df in frames:
+                _factorize(df['platform'], self.platforms)
+            dates = np.union1d(self.dates, np.concatenate([pd.unique(df['date']) for df in frames]))
+            if len(dates) != len(self.dates):
+                self._insert_dates(dates.astype(object))
+            n_platforms, n_days = len(self.platforms.names), len(self.dates)
+            self.followers = _grow(self.followers, (n_platforms, n_days))
+            self.rows = _grow(self.rows, (n_platforms, n_days))
+            self.engagement = _grow(self.engagement, (len(ENGAGEMENT_METRICS), n_platforms, n_days))
+
+            size = n_platforms * n_days
+            if followers_df is not None and len(followers_df):
+                cell = self._cells(followers_df)
+                self.followers += np.bincount(cell, weights=followers_df['followers'].to_numpy(np.float64),
+                                              minlength=size).reshape(n_platforms, n_days)
+                self.rows += np.bincount(cell, minlength=size).reshape(n_platforms, n_days)
+            if engagement_df is not None and len(engagement_df):
+                cell = self._cells(engagement_df)
+                for i, metric in enumerate(ENGAGEMENT_METRICS):
+                    self.engagement[i] += np.bincount(cell, weights=engagement_df[metric].to_numpy(np.float64),
+                                                      minlength=size).reshape(n_platforms, n_days)
+
+            # Somas acumuladas: O(plataformas × dias), não depende do número de linhas
+            cum = np.zeros(self.engagement.shape[:2] + (n_days + 1,))
+            np.cumsum(self.engagement, axis=2, out=cum[:, :, 1:])
+            self._engagement_cum = cum
+            self.version += 1
+
+    def _insert_dates(self, dates):
+        # Realoca as colunas existentes para as posições no novo eixo de dias
+        position = np.searchsorted(dates, self.dates)
+        for name in ('followers', 'rows', 'engagement'):
+            old = getattr(self, name)
+            new = np.zeros(old.shape[:-1] + (len(dates),), dtype=old.dtype)
+            new[..., position] = old
+            setattr(self, name, new)
+        self.dates = dates
+
+    def _cells(self, df):
+        # Índice plano (plataforma, dia) de cada linha
+        platform = _factorize(df['platform'], self.platforms)
+        codes, uniques = pd.factorize(df['date'])
+        day = np.searchsorted(self.dates, np.asarray(uniques, dtype=object))[codes]
+        return platform * len(self.dates) + day
+
+    def set_profiles(self, sentiment_df=None, demographics_df=None, geo_df=None):
+        """Substitui os agregados por plataforma (sem dimensão de tempo)."""
+        with self._lock:
+            for df in (sentiment_df, demographics_df, geo_df):
+                if df is not None:
+                    _factorize(df['platform'], self.platforms)
+            n_platforms = len(self.platforms.names)
+            self.followers = _grow(self.followers, (n_platforms, len(self.dates)))
+            self.rows = _grow(self.rows, (n_platforms, len(self.dates)))
+            self.engagement = _grow(self.engagement, (len(ENGAGEMENT_METRICS), n_platforms, len(self.dates)))
+            self._engagement_cum = _grow(self._engagement_cum,
+                                         (len(ENGAGEMENT_METRICS), n_platforms, len(self.dates) + 1))
+
+            if sentiment_df is not None:
+                platform = _factorize(sentiment_df['platform'], self.platforms)
+                self.sentiment = np.stack([
+                    np.bincount(platform, weights=sentiment_df[metric].to_numpy(np.float64), minlength=n_platforms)
+                    for metric in SENTIMENT_METRICS
+                ], axis=1)
+                self.sentiment_rows = np.bincount(platform, minlength=n_platforms)
+            if demographics_df is not None:
+                platform = _factorize(demographics_df['platform'], self.platforms)
+                age = _factorize(demographics_df['age_group'], self.ages)
+                gender = _factorize(demographics_df['gender'], self.genders)
+                shape = (n_platforms, len(self.ages.names), len(self.genders.names))
+                cell = np.ravel_multi_index((platform, age, gender), shape)
+                self.demographics = np.bincount(
+                    cell, weights=demographics_df['percentage'].to_numpy(np.float64), minlength=np.prod(shape)
+                ).reshape(shape)
+            if geo_df is not None:
+                platform = _factorize(geo_df['platform'], self.platforms)
+                country = _factorize(geo_df['country'], self.countries)
+                shape = (n_platforms, len(self.countries.names))
+                self.geo = np.bincount(
+                    platform * shape[1] + country, weights=geo_df['users'].to_numpy(np.float64),
+                    minlength=np.prod(shape)
+                ).reshape(shape)
+            self.sentiment = _grow(self.sentiment, (n_platforms, len(SENTIMENT_METRICS)))
+            self.sentiment_rows = _grow(self.sentiment_rows, (n_platforms,))
+            self.demographics = _grow(self.demographics, (n_platforms,) + self.demographics.shape[1:])
+            self.geo = _grow(self.geo, (n_platforms,) + self.geo.shape[1:])
+            self.version += 1
+
+    # ---------- Consultas ----------
+    def select(self, platform):
+        """Códigos das plataformas do filtro ('Todas' seleciona todas)."""
+        if platform == ALL_PLATFORMS:
+            return np.arange(len(self.platforms.names))
+        code = self.platforms.codes.get(platform)
+        return np.array([] if code is None else [code], dtype=np.int64)
+
+    def window(self, period):
+        """Fatia do eixo de dias com os últimos `period` dias."""
+        n_days = len(self.dates)
+        return slice(max(n_days - int(period), 0), n_days)
+
+    def total_followers(self, platform, period):
+        """Seguidores no último dia da janela com dados das plataformas selecionadas."""
+        with self._lock:
+            selected, days = self.select(platform), self.window(period)
+            present = self.rows[selected, days].any(axis=0)
+            if not present.any():
+                return 0
+            last = days.start + int(np.flatnonzero(present)[-1])
+            return int(self.followers[selected, last].sum())
+
+    def total_engagement(self, platform, period):
+        """Curtidas + comentários + compartilhamentos na janela."""
+        with self._lock:
+            selected, days = self.select(platform), self.window(period)
+            cum = self._engagement_cum[:, selected]
+            return int((cum[:, :, days.stop] - cum[:, :, days.start]).sum())
+
+    def engagement_by_platform(self, platform, period):
+        """(nomes das plataformas, matriz métrica × plataforma) somados na janela."""
+        with self._lock:
+            selected, days = self.select(platform), self.window(period)
+            cum = self._engagement_cum[:, selected]
+            totals = cum[:, :, days.stop] - cum[:, :, days.start]
+            # Só plataformas com linhas de engajamento na janela, como no groupby
+            active = (self.engagement[:, selected, days] != 0).any(axis=(0, 2))
+            return [self.platforms.names[i] for i in selected[active]], totals[:, active]
+
+    def followers_series(self, platform, period):
+        """(datas, nomes das plataformas, matriz plataforma × dia, máscara de dias com dados)."""
+        with self._lock:
+            selected, days = self.select(platform), self.window(period)
+            return (self.dates[days], [self.platforms.names[i] for i in selected],
+                    self.followers[selected, days], self.rows[selected, days] > 0)
+
+    def positive_sentiment(self, platform):
+        """Média de sentimento positivo nas linhas das plataformas selecionadas."""
+        with self._lock:
+            selected = self.select(platform)
+            rows = self.sentiment_rows[selected].sum()
+            return self.sentiment[selected, 0].sum() / rows if rows else float('nan')
+
+    def sentiment_by_platform(self, platform):
+        """(nomes das plataformas, médias plataforma × (positivo, neutro, negativo))."""
+        with self._lock:
+            selected = self.select(platform)
+            selected = selected[self.sentiment_rows[selected] > 0]
+            means = self.sentiment[selected] / self.sentiment_rows[selected, None]
+            return [self.platforms.names[i] for i in selected], means
+
+    def demographics_by_platform(self, platform):
+        """(plataformas, faixas etárias, gêneros, somas plataforma × faixa × gênero)."""
+        with self._lock:
+            selected = self.select(platform)
+            return ([self.platforms.names[i] for i in selected], list(self.ages.names),
+                    list(self.genders.names), self.demographics[selected])
+
+    def geo_by_platform(self, platform):
+        """(países, usuários por país) somados nas plataformas selecionadas."""
+        with self._lock:
+            selected = self.select(platform)
+            return list(self.countries.names), self.geo[selected].sum(axis=0)
+
+    def profiles(self):
+        """Agregados por plataforma em tipos JSON, para recortes feitos no navegador."""
+        with self._lock:
+            return {
+                'version': self.version,
+                'platforms': list(self.platforms.names),
+                # Somas plataforma × (positivo, neutro, negativo) e linhas por plataforma
+                'sentiment': self.sentiment.tolist(),
+                'sentiment_rows': self.sentiment_rows.tolist(),
+                'ages': list(self.ages.names),
+                'genders': list(self.genders.names),
+                'demographics': self.demographics.tolist(),
+                'countries': list(self.countries.names),
+                'geo': self.geo.tolist(),
+            }
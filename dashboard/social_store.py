@@ -0,0 +1,234 @@
+# dashboard/social_store.py
+"""Camada de dados colunar do dashboard de mídias sociais.
+
+Os dados são gerados (ou ingeridos) com NumPy vetorizado e gravados em
+Parquet, particionados no estilo Hive:
+
+    <dir>/followers/platform=Instagram/date=2025-01-31/part-....parquet
+    <dir>/engagement/platform=.../date=.../...
+    <dir>/sentiment/platform=.../...   (demographics e geo também por plataforma)
+    <dir>/words/...
+
+A leitura usa `pyarrow.dataset`: só as colunas pedidas e só as partições que
+passam no filtro são lidas do disco, em lotes. O dashboard carrega apenas os
+últimos dias no cubo de agregados, então o tempo de inicialização e a memória
+não crescem com o histórico.
+
+    python -m dashboard.social_store dados_sociais --days 1095
+"""
+import argparse
+import datetime
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from dashboard.social_cube import SocialCube
+
+PLATFORMS = ('Instagram', 'Facebook', 'Twitter', 'LinkedIn')
+AGE_GROUPS = ('18-24', '25-34', '35-44', '45-54', '55+')
+GENDERS = ('Masculino', 'Feminino', 'Outro')
+COUNTRIES = ('Brasil', 'EUA', 'Portugal', 'México', 'Argentina', 'Colômbia',
+             'Reino Unido', 'Espanha', 'França', 'Alemanha')
+WORDS = ("conteúdo", "social", "marketing", "digital", "marca", "engajamento", "seguidores",
+         "campanha", "viral", "trending", "hashtag", "influenciador", "alcance", "conversão",
+         "ROI", "SEO", "compartilhamento", "publicação", "visualizações", "fãs", "cliques",
+         "comentários", "likes", "comunicação", "audiência", "plataforma", "estratégia")
+
+# Colunas de partição de cada tabela
+PARTITIONS = {
+    'followers': ('platform', 'date'),
+    'engagement': ('platform', 'date'),
+    'sentiment': ('platform',),
+    'demographics': ('platform',),
+    'geo': ('platform',),
+    'words': (),
+}
+
+
+def generate_social_data(days=30, end=None, seed=None):
+    """Tabelas do dashboard para `days` dias até `end` (hoje), sem laços por linha.
+
+    Devolve um dict com followers, engagement, sentiment, demographics e geo
+    (DataFrames) e words (dict palavra -> frequência).
+    """
+    rng = np.random.default_rng(seed)
+    end = end or datetime.date.today()
+    dates = pd.date_range(end=end, periods=days, freq='D').strftime('%Y-%m-%d').to_numpy()
+    n_platforms = len(PLATFORMS)
+
+    # Uma linha por (plataforma, dia), plataforma a plataforma
+    platform_col = np.repeat(np.array(PLATFORMS, dtype=object), days)
+    date_col = np.tile(dates, n_platforms)
+    base = rng.integers(5000, 20000, n_platforms)[:, None]
+    growth = rng.uniform(0.005, 0.015, n_platforms)[:, None]
+    # Em históricos longos o crescimento diário é diluído para não explodir o exponencial
+    exponent = np.arange(days) * min(1.0, 30 / days)
+    followers = (base * (1 + growth) ** exponent).astype(np.int64)
+    followers_df = pd.DataFrame({'date': date_col, 'platform': platform_col, 'followers': followers.ravel()})
+
+    n = n_platforms * days
+    engagement_df = pd.DataFrame({
+        'date': date_col,
+        'platform': platform_col,
+        'likes': rng.integers(100, 1001, n),
+        'comments': rng.integers(10, 101, n),
+        'shares': rng.integers(5, 51, n),
+    })
+
+    positive = rng.integers(40, 71, n_platforms)
+    negative = rng.integers(5, 21, n_platforms)
+    sentiment_df = pd.DataFrame({
+        'platform': list(PLATFORMS),
+        'positive': positive,
+        'negative': negative,
+        'neutral': 100 - positive - negative,
+    })
+
+    platform_idx, age_idx, gender_idx = np.meshgrid(
+        np.arange(n_platforms), np.arange(len(AGE_GROUPS)), np.arange(len(GENDERS)), indexing='ij'
+    )
+    demographics_df = pd.DataFrame({
+        'platform': np.array(PLATFORMS, dtype=object)[platform_idx.ravel()],
+        'age_group': np.array(AGE_GROUPS, dtype=object)[age_idx.ravel()],
+        'gender': np.array(GENDERS, dtype=object)[gender_idx.ravel()],
+        'percentage': rng.uniform(1, 10, platform_idx.size),
+    })
+
+    # 100% dos usuários de cada plataforma repartidos entre os países
+    shares = rng.multinomial(100, rng.dirichlet(np.ones(len(COUNTRIES)), n_platforms))
+    geo_df = pd.DataFrame({
+        'platform': np.repeat(np.array(PLATFORMS, dtype=object), len(COUNTRIES)),
+        'country': np.tile(np.array(COUNTRIES, dtype=object), n_platforms),
+        'users': shares.ravel(),
+    })
+
+    words = dict(zip(WORDS, rng.integers(10, 101, len(WORDS)).tolist()))
+    return {
+        'followers': followers_df, 'engagement': engagement_df, 'sentiment': sentiment_df,
+        'demographics': demographics_df, 'geo': geo_df, 'words': words,
+    }
+
+
+class SocialStore:
+    """Tabelas do dashboard em Parquet particionado, lidas sob demanda."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, table):
+        return os.path.join(self.directory, table)
+
+    def exists(self, table='followers'):
+        return os.path.isdir(self._path(table))
+
+    def _date_dirs(self, table):
+        # (dia, diretório) das partições, só pelos nomes dos diretórios
+        root = self._path(table)
+        for platform_dir in os.scandir(root):
+            if platform_dir.is_dir():
+                for date_dir in os.scandir(platform_dir.path):
+                    if date_dir.is_dir() and date_dir.name.startswith('date='):
+                        yield date_dir.name[len('date='):], date_dir.path
+
+    def dataset(self, table, since=None):
+        """Dataset da tabela; com `since`, só os arquivos das partições a partir desse dia.
+
+        Nada é lido até o scan. Sem `since` o pyarrow descobre todos os
+        arquivos; com ele, a descoberta se limita aos diretórios da janela.
+        """
+        partitioning = None
+        if PARTITIONS[table]:
+            partitioning = ds.partitioning(
+                pa.schema([(name, pa.string()) for name in PARTITIONS[table]]), flavor='hive'
+            )
+        root = self._path(table)
+        if since is None or 'date' not in PARTITIONS[table]:
+            return ds.dataset(root, format='parquet', partitioning=partitioning)
+        files = [entry.path for date, path in self._date_dirs(table) if date >= since
+                 for entry in os.scandir(path) if entry.name.endswith('.parquet')]
+        return ds.dataset(files, format='parquet', partitioning=partitioning, partition_base_dir=root)
+
+    def write(self, table, data):
+        """Acrescenta linhas (DataFrame, ou dict de frequências para `words`) à tabela.
+
+        Cada escrita cria arquivos novos; partições já existentes ganham mais
+        um arquivo em vez de serem reescritas.
+        """
+        if table == 'words':
+            data = pd.DataFrame({'word': list(data), 'count': list(data.values())})
+        pq.write_to_dataset(
+            pa.Table.from_pandas(data, preserve_index=False),
+            self._path(table),
+            partition_cols=list(PARTITIONS[table]) or None,
+            basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore',
+            # Anos de histórico em uma escrita: plataformas × dias partições
+            max_partitions=1 << 20,
+        )
+
+    def write_all(self, tables):
+        for table, data in tables.items():
+            self.write(table, data)
+
+    def dates(self, table='followers'):
+        """Dias com dados, lidos dos nomes das partições (sem abrir os arquivos)."""
+        return sorted({date for date, _ in self._date_dirs(table)})
+
+    def _filter(self, platform=None, since=None):
+        expression = None
+        if platform is not None:
+            expression = ds.field('platform') == platform
+        if since is not None:
+            condition = ds.field('date') >= since
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def scan(self, table, columns=None, platform=None, since=None, batch_size=1 << 20):
+        """DataFrames em lotes, com só as `columns` e as partições do filtro."""
+        scanner = self.dataset(table, since).scanner(columns=columns, filter=self._filter(platform, since),
+                                              batch_size=batch_size)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def read(self, table, columns=None, platform=None, since=None):
+        frame = self.dataset(table, since).to_table(columns=columns, filter=self._filter(platform, since)).to_pandas()
+        for name in PARTITIONS[table]:
+            if name in frame:
+                # Colunas de partição chegam como categorias; o resto do app usa texto
+                frame[name] = frame[name].astype(object)
+        return frame
+
+    def read_words(self):
+        frame = self.read('words')
+        return dict(zip(frame['word'], frame['count'].astype(int)))
+
+    def build_cube(self, days=30):
+        """Cubo de agregados com os últimos `days` dias, lido em lotes."""
+        cube = SocialCube()
+        dates = self.dates()
+        since = dates[-days] if len(dates) >= days else None
+        for batch in self.scan('followers', ['date', 'platform', 'followers'], since=since):
+            cube.extend(followers_df=batch)
+        for batch in self.scan('engagement', ['date', 'platform', 'likes', 'comments', 'shares'], since=since):
+            cube.extend(engagement_df=batch)
+        cube.set_profiles(self.read('sentiment'), self.read('demographics'), self.read('geo'))
+        return cube
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gerar um histórico sintético em Parquet para o dashboard social')
+    parser.add_argument('directory')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    SocialStore(args.directory).write_all(generate_social_data(args.days, seed=args.seed))
+
+
+if __name__ == '__main__':
+    main()
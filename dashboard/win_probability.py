@@ -0,0 +1,126 @@
+# dashboard/win_probability.py
+import collections
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from dashboard.feed import EVENT_TYPES
+
+# Atributos do modelo, calculados como diferença Time1 - Time2
+FEATURES = ('gold', 'kill', 'objective')
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'win_model.json')
+
+# Tipo de evento -> índice do atributo (-1 para eventos que não entram no modelo)
+FEATURE_OF_TYPE = np.full(len(EVENT_TYPES), -1, dtype=np.intp)
+for _index, _name in enumerate(FEATURES):
+    FEATURE_OF_TYPE[EVENT_TYPES.index(_name)] = _index
+
+
+class WinModel:
+    """Modelo logístico: P(Time1 vence) = sigmoid(intercept + diffs · coeficientes)."""
+
+    def __init__(self, intercept, coefficients):
+        self.intercept = float(intercept)
+        self.weights = np.array([coefficients[name] for name in FEATURES], dtype=float)
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or os.environ.get('ESPORTS_WIN_MODEL') or DEFAULT_MODEL_PATH
+        with open(path) as model_file:
+            data = json.load(model_file)
+        return cls(data.get('intercept', 0.0), data['coefficients'])
+
+    def predict(self, diffs):
+        """`diffs` com forma (..., len(FEATURES)); retorna as probabilidades do Time1."""
+        return 1 / (1 + np.exp(-(diffs @ self.weights + self.intercept)))
+
+
+class WinProbabilityEngine:
+    """Probabilidade de vitória de todas as partidas, atualizada pelos eventos.
+
+    Os totais por partida e por time ficam em um array (partidas, 2, atributos);
+    `score` avalia todas as partidas de uma vez, com um único produto
+    matricial, e só recalcula quando chegaram eventos novos.
+    """
+
+    def __init__(self, model=None, capacity=16):
+        self.model = model or WinModel.load()
+        self._slots = {}
+        self._match_ids = []
+        self._teams = np.full((capacity, 2), -1, dtype=np.int64)
+        self._totals = np.zeros((capacity, 2, len(FEATURES)))
+        self._lock = threading.Lock()
+        self._scores = {}
+        self._scored_version = None
+        self._latencies = collections.deque(maxlen=1000)
+        self.version = 0
+
+    def register_match(self, match_id, team1_code, team2_code):
+        with self._lock:
+            if match_id in self._slots:
+                return
+            slot = self._slots[match_id] = len(self._match_ids)
+            self._match_ids.append(match_id)
+            if slot >= len(self._teams):
+                grow = len(self._teams)
+                self._teams = np.pad(self._teams, ((0, grow), (0, 0)), constant_values=-1)
+                self._totals = np.pad(self._totals, ((0, grow), (0, 0), (0, 0)))
+            self._teams[slot] = (team1_code, team2_code)
+
+    def update(self, columns):
+        """Aplica um lote de LiveFeed; eventos de partidas não registradas são ignorados."""
+        feature = FEATURE_OF_TYPE[columns['type']]
+        counted = (feature >= 0) & (columns['type'] >= 0)
+        if not counted.any():
+            return
+        match = columns['match'][counted]
+        team = columns['team'][counted]
+        feature = feature[counted]
+        value = columns['value'][counted]
+
+        with self._lock:
+            lookup = {match_id: self._slots.get(int(match_id), -1) for match_id in np.unique(match)}
+            slot = np.fromiter((lookup[m] for m in match), np.intp, len(match))
+            known = slot >= 0
+            teams = self._teams[slot[known]]
+            team = team[known]
+            side = np.where(team == teams[:, 0], 0, np.where(team == teams[:, 1], 1, -1))
+            valid = side >= 0
+            np.add.at(self._totals,
+                      (slot[known][valid], side[valid], feature[known][valid]),
+                      value[known][valid])
+            self.version += 1
+
+    def score(self):
+        """{match_id: probabilidade do Time1}, recalculado em lote só se houve eventos novos."""
+        with self._lock:
+            if self._scored_version == self.version:
+                return self._scores
+            started = time.perf_counter()
+            n = len(self._match_ids)
+            totals = self._totals[:n]
+            probabilities = self.model.predict(totals[:, 0] - totals[:, 1])
+            self._scores = dict(zip(self._match_ids, probabilities.tolist()))
+            self._scored_version = self.version
+            self._latencies.append((time.perf_counter() - started) * 1000)
+            return self._scores
+
+    def latency_stats(self):
+        """Latência do cálculo em lote, em milissegundos."""
+        with self._lock:
+            latencies = np.array(self._latencies)
+            matches = len(self._match_ids)
+        if not len(latencies):
+            return {'count': 0, 'matches': matches}
+        return {
+            'count': len(latencies),
+            'matches': matches,
+            'last_ms': float(latencies[-1]),
+            'mean_ms': float(latencies.mean()),
+            'p95_ms': float(np.percentile(latencies, 95)),
+            'max_ms': float(latencies.max()),
+        }
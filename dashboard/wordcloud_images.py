@@ -0,0 +1,154 @@
+# dashboard/wordcloud_images.py
+"""Nuvens de palavras renderizadas fora da thread da requisição.
+
+Cada imagem é identificada por um hash das frequências e dos parâmetros de
+renderização. O callback só registra as frequências e devolve a URL
+`/wordcloud/<chave>.png`; a renderização roda em um pool de processos (ou
+de threads, ver `WordCloudImages`) e a rota serve o PNG com ETag e cache de
+longa duração (a URL muda quando o conteúdo muda).
+"""
+import collections
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# random_state fixo: a mesma chave (URL e ETag imutáveis) precisa dar os mesmos bytes
+# em qualquer worker e a cada nova renderização depois de sair do LRU
+RENDER_PARAMS = {'background_color': 'white', 'width': 800, 'height': 400, 'max_words': 100,
+                 'random_state': 42}
+
+
+def image_key(frequencies, params):
+    """Hash estável de (frequências, parâmetros), usado como nome do arquivo e ETag."""
+    payload = json.dumps([sorted(frequencies.items()), sorted(params.items())], ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+def render_png(frequencies, params):
+    """Roda no processo do pool: gera a nuvem e devolve os bytes do PNG."""
+    from wordcloud import WordCloud
+
+    wc = WordCloud(**params).generate_from_frequencies(frequencies)
+    output = io.BytesIO()
+    wc.to_image().save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+class WordCloudImages:
+    """Registro de nuvens de palavras por chave, com renderização em um pool de processos.
+
+    `register` só guarda as frequências: feito na importação do app, antes
+    do fork dos workers, o registro é herdado por todos eles, e cada processo
+    renderiza (uma vez) na primeira vez que a imagem é pedida. Os PNGs
+    prontos ficam em um LRU de até `maxsize` imagens.
+
+    Quando as frequências mudam durante a execução, uma chave registrada em
+    um worker pode ser pedida a outro; `fallback`, se informado, devolve as
+    frequências atuais para registrar e gerar a chave também nesse processo.
+
+    Os processos do pool são criados com spawn, que reimporta o `__main__`
+    em cada filho. Só use `processes=True` quando o `__main__` puder ser
+    importado sem efeitos (gunicorn, `python -m dashboard.serve`); com o app
+    rodando como script, `processes=False` renderiza em threads.
+    """
+
+    def __init__(self, max_workers=1, maxsize=32, fallback=None, processes=True):
+        self.max_workers = max_workers
+        self.maxsize = maxsize
+        self.fallback = fallback
+        self.processes = processes
+        self._sources = collections.OrderedDict()
+        self._images = collections.OrderedDict()
+        self._futures = {}
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # O pool não sobrevive ao fork: cada processo cria o seu na primeira renderização
+        if self._executor is None or self._pid != os.getpid():
+            if self.processes:
+                # spawn, e não fork: o servidor tem várias threads rodando
+                self._executor = ProcessPoolExecutor(self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            else:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='wordcloud')
+            self._pid = os.getpid()
+            self._futures = {}
+        return self._executor
+
+    def register(self, frequencies, **params):
+        """Registra as frequências e devolve a chave da imagem, sem renderizar."""
+        params = {**RENDER_PARAMS, **params}
+        key = image_key(frequencies, params)
+        with self._lock:
+            if key not in self._sources:
+                self._sources[key] = (dict(frequencies), params)
+            self._sources.move_to_end(key)
+            # Frequências antigas saem junto com as imagens que não cabem mais no LRU
+            while len(self._sources) > self.maxsize:
+                self._sources.popitem(last=False)
+        return key
+
+    def prefetch(self, key):
+        """Inicia a renderização em segundo plano, se a imagem ainda não existe."""
+        with self._lock:
+            if key in self._images or key not in self._sources:
+                return
+            pool = self._pool()
+            if key not in self._futures:
+                frequencies, params = self._sources[key]
+                self._futures[key] = pool.submit(render_png, frequencies, params)
+
+    def get(self, key, timeout=60):
+        """PNG da chave (espera a renderização em andamento), ou None se a chave é desconhecida."""
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                return image
+            unknown = key not in self._sources
+        if unknown and self.fallback is not None:
+            self.register(self.fallback())
+        self.prefetch(key)
+        with self._lock:
+            future = self._futures.get(key)
+        if future is None:
+            return None
+        try:
+            image = future.result(timeout=timeout)
+        except Exception:
+            # Falha na renderização: a próxima requisição tenta de novo
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+            raise
+        with self._lock:
+            self._futures.pop(key, None)
+            self._images[key] = image
+            while len(self._images) > self.maxsize:
+                self._images.popitem(last=False)
+        return image
+
+    def register_route(self, server, path='/wordcloud/<key>.png'):
+        """Rota Flask que serve as imagens com ETag e Cache-Control."""
+        from flask import abort, make_response, request
+
+        def serve(key):
+            image = self.get(key)
+            if image is None:
+                abort(404)
+            response = make_response(image)
+            response.mimetype = 'image/png'
+            response.set_etag(key)
+            # O conteúdo de uma chave nunca muda
+            response.cache_control.public = True
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+            return response.make_conditional(request)
+
+        server.add_url_rule(path, 'wordcloud_image', serve)
@@ -1,11 +1,27 @@
+import math
+import os
+import sys
+
 import dash
-from dash import dcc, html, Input, Output, dash_table
+import flask
+from dash import dcc, html, Input, Output, State, Patch, dash_table
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 from dash_bootstrap_components import themes
 
+from dashboard.cache import figure_cache, register_stats_route
+from dashboard.feed import EVENT_TYPES, feed_from_env
+from dashboard.heatmap import HeatmapAccumulator
+from dashboard.instrumentation import CallbackMetrics
+from dashboard.live import VersionedTable
+from dashboard.player_stats import RollingPlayerStats
+from dashboard.replay import MatchReplay
+from dashboard.serialization import compact_array, compact_figure, use_fast_json
+from dashboard.win_probability import WinProbabilityEngine
+
 # ========== Dados Simulados ==========
 # Dados de jogadores
 players = pd.DataFrame({
@@ -41,8 +57,111 @@ prediction_data = pd.DataFrame({
     'Win Probability': [78, 65, 82, 58]
 })
 
+# Fontes versionadas: cada gráfico só é atualizado quando a versão dos seus dados muda
+tactical_heatmap = HeatmapAccumulator(bins=(25, 25), x_range=(0, 100), y_range=(0, 100))
+player_table = VersionedTable(players)
+prediction_table = VersionedTable(prediction_data)
+
+# ========== Eventos ao Vivo ==========
+# Com ESPORTS_EVENTS apontando para um arquivo NDJSON, os dados vêm da thread
+# de ingestão; sem ele, o dashboard usa os dados simulados acima.
+live_feed = feed_from_env()
+POSITION = EVENT_TYPES.index('position')
+
+# Com CHAT_LIVE_COUNTERS (o mesmo nome de segmento do servidor de chat), os cartões
+# de status mostram salas ativas, usuários conectados e eventos/min do ChatConsumer,
+# lidos da memória compartilhada (realtime_project/chat/live_counters.py)
+CHAT_LIVE_COUNTERS = os.environ.get('CHAT_LIVE_COUNTERS')
+if CHAT_LIVE_COUNTERS:
+    # Mesmo ajuste de caminho de realtime_project/asgi.py; o leitor não carrega o Django
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'realtime_project'))
+    from chat.live_counters import LiveCounterReader
+    chat_counters = LiveCounterReader(CHAT_LIVE_COUNTERS)
+else:
+    chat_counters = None
+
+# Estatísticas por jogador nos últimos 10 minutos, atualizadas a cada lote
+player_stats = RollingPlayerStats(window=600, bucket=10)
+
+# Probabilidade de vitória de todas as partidas, calculada em lote (modelo em dashboard/win_model.json)
+win_engine = WinProbabilityEngine()
+
+# Replay por partida (keyframes + log de eventos), alimentado pela mesma ingestão
+match_replays = {}
+
+def get_replay(match_id):
+    replay = match_replays.get(match_id)
+    if replay is None:
+        row = matches[matches['MatchID'] == match_id]
+        team_codes = ([live_feed.teams.code(row.iloc[0]['Time1']), live_feed.teams.code(row.iloc[0]['Time2'])]
+                      if len(row) else [])
+        replay = match_replays[match_id] = MatchReplay(team_codes, bins=(25, 25))
+        if team_codes:
+            win_engine.register_match(match_id, *team_codes)
+    return replay
+
+def on_match_events(feed, columns):
+    # Chamado na thread de ingestão com cada lote já em colunas
+    positions = columns['type'] == POSITION
+    if positions.any():
+        tactical_heatmap.add(columns['x'][positions], columns['y'][positions],
+                             t=float(columns['t'][-1]))
+    player_stats.update(columns['t'], columns['player'], columns['type'], columns['value'])
+    for match_id in np.unique(columns['match']):
+        in_match = columns['match'] == match_id
+        get_replay(int(match_id)).extend({name: values[in_match] for name, values in columns.items()})
+    win_engine.update(columns)
+
+def on_worker_start():
+    # Threads não sobrevivem ao fork: o worker inicia a ingestão depois dele.
+    # O estado é deste processo, então dashboard/serve.py usa um único worker
+    # quando há feed configurado
+    if live_feed is not None:
+        live_feed.start()
+
+if live_feed is not None:
+    live_feed.subscribe(on_match_events)
+    if not os.environ.get('DASH_PRELOAD'):
+        on_worker_start()
+else:
+    tactical_heatmap.add(tactical_data['x'], tactical_data['y'])
+
+def player_stats_version():
+    return player_table.version if live_feed is None else player_stats.version
+
+def player_stats_snapshot():
+    # (nomes, KDA, Dano/Min) do motor ao vivo ou dos dados simulados, sem groupby
+    if live_feed is None:
+        _, player_df = player_table.snapshot()
+        return player_df['Jogador'].tolist(), player_df['KDA'].to_numpy(), player_df['Dano/Min'].to_numpy()
+    snapshot = player_stats.snapshot()
+    names = [live_feed.players.names[i] for i in snapshot['player']]
+    return names, snapshot['kda'], snapshot['damage_min']
+
+def prediction_version(selected_match):
+    return prediction_table.version if live_feed is None else [selected_match, win_engine.version]
+
+def prediction_snapshot(selected_match):
+    # (times, probabilidades em %) do motor ao vivo ou da tabela simulada
+    if live_feed is None:
+        _, prediction_df = prediction_table.snapshot()
+        return prediction_df['Time'].tolist(), prediction_df['Win Probability'].tolist()
+    row = matches[matches['MatchID'] == selected_match].iloc[0]
+    team1_probability = win_engine.score().get(selected_match, 0.5)
+    return [row['Time1'], row['Time2']], [team1_probability * 100, (1 - team1_probability) * 100]
+
 # ========== Layout do Dashboard ==========
 app = dash.Dash(__name__, external_stylesheets=[themes.BOOTSTRAP])
+# Aplicação WSGI para servidores de produção (python -m dashboard.serve main)
+server = app.server
+use_fast_json()
+register_stats_route(app.server, figure_cache)
+# Tempo, payload e cache de cada callback em /metrics (DASH_PROFILE_MS liga os perfis)
+callback_metrics = CallbackMetrics.from_env('main')
+callback_metrics.instrument(app)
+callback_metrics.register_route(app.server)
+app.server.add_url_rule('/_win_probability/stats', 'win_probability_stats',
+                        lambda: flask.jsonify(win_engine.latency_stats()))
 
 app.layout = html.Div([
     html.Div([
@@ -76,6 +195,22 @@ app.layout = html.Div([
                     for _, row in matches.iterrows()],
             value=1,
             className='m-3'
+        ),
+        # Modo replay: escolher um instante da partida selecionada
+        dcc.RadioItems(
+            id='dashboard-mode',
+            options=[
+                {'label': ' Ao vivo', 'value': 'live'},
+                {'label': ' Replay', 'value': 'replay', 'disabled': live_feed is None}
+            ],
+            value='live',
+            inline=True,
+            className='mx-3'
+        ),
+        dcc.Slider(
+            id='replay-slider', min=0, max=0, value=0, step=1,
+            disabled=True, updatemode='mouseup',
+            marks=None, tooltip={'placement': 'bottom', 'always_visible': False}
         )
     ]),
     
@@ -83,7 +218,11 @@ app.layout = html.Div([
     html.Div([
         html.Div([
             dcc.Graph(id='tactical-heatmap'),
-            dcc.Interval(id='live-update', interval=5000, n_intervals=0)
+            dcc.Interval(id='live-update', interval=5000, n_intervals=0),
+            # Última versão de dados recebida por este navegador, por gráfico
+            dcc.Store(id='tactical-version'),
+            dcc.Store(id='players-version'),
+            dcc.Store(id='prediction-version')
         ], className='col-md-8'),
         
         html.Div([
@@ -116,47 +255,199 @@ app.layout = html.Div([
 # ========== Callbacks ==========
 @app.callback(
     [
-        Output('tactical-heatmap', 'figure'),
-        Output('player-stats', 'figure'),
-        Output('win-prediction', 'figure'),
-        Output('team-comparison', 'data')
+        Output('live-matches', 'children'),
+        Output('live-players', 'children'),
+        Output('events-min', 'children')
     ],
+    Input('live-update', 'n_intervals')
+)
+def update_live_counters(n):
+    # Contadores do chat, quando o servidor de chat está publicando; senão, os da fonte de eventos
+    counts = chat_counters.read() if chat_counters is not None else None
+    if counts is not None:
+        return str(counts.rooms), str(counts.users), str(counts.events_per_minute)
+    # Sem fonte de eventos, os cartões mantêm os valores simulados do layout
+    if live_feed is None:
+        raise PreventUpdate
+    matches_count, players_count, events_min = live_feed.live_counters()
+    return str(matches_count), str(players_count), str(events_min)
+
+# Na primeira chamada (versão do cliente vazia) o gráfico é enviado inteiro;
+# depois, só quando a versão dos dados muda, e como atualização parcial (Patch).
+@app.callback(
+    [Output('tactical-heatmap', 'figure'), Output('tactical-version', 'data')],
+    Input('live-update', 'n_intervals'),
+    [State('tactical-version', 'data'), State('dashboard-mode', 'value')]
+)
+def update_tactical_heatmap(n, client_version, mode):
+    version = tactical_heatmap.version
+    if mode == 'replay' or client_version == version:
+        raise PreventUpdate
+    return render_tactical_heatmap(version, client_version is None), version
+
+# Figuras e Patches são compartilhados entre as sessões: um cálculo por versão
+@figure_cache.cached('tactical-heatmap')
+def render_tactical_heatmap(version, full):
+    # O custo depende só do tamanho da grade, não do número de posições recebidas
+    _, grid = tactical_heatmap.snapshot()
+
+    if full:
+        tactical_fig = go.Figure(go.Heatmap(
+            z=grid,
+            x=tactical_heatmap.x_centers,
+            y=tactical_heatmap.y_centers,
+            colorscale='Viridis'
+        ))
+        tactical_fig.update_layout(
+            title='Mapa Tático - Posicionamento dos Jogadores',
+            xaxis_title='x', yaxis_title='y'
+        )
+        return tactical_fig
+
+    # Apenas a matriz muda; eixos e layout ficam como estão no navegador
+    patch = Patch()
+    patch['data'][0]['z'] = compact_array(grid)
+    return patch
+
+@app.callback(
+    [Output('player-stats', 'figure'), Output('players-version', 'data')],
+    Input('live-update', 'n_intervals'),
+    [State('players-version', 'data'), State('dashboard-mode', 'value')]
+)
+def update_player_stats(n, client_version, mode):
+    version = player_stats_version()
+    if mode == 'replay' or client_version == version:
+        raise PreventUpdate
+    return render_player_stats(version, client_version is None), version
+
+@figure_cache.cached('player-stats')
+def render_player_stats(version, full):
+    names, kda, damage_min = player_stats_snapshot()
+
+    if full:
+        return px.bar(
+            x=names, y=kda, color=damage_min,
+            labels={'x': 'Jogador', 'y': 'KDA', 'color': 'Dano/Min'},
+            title='Performance dos Jogadores (KDA)'
+        )
+
+    # Só os valores mudam; layout e estilos ficam como estão no navegador
+    patch = Patch()
+    patch['data'][0]['x'] = names
+    patch['data'][0]['y'] = compact_array(kda)
+    patch['data'][0]['marker']['color'] = compact_array(damage_min)
+    return patch
+
+@app.callback(
+    [Output('win-prediction', 'figure'), Output('prediction-version', 'data')],
+    [Input('live-update', 'n_intervals'), Input('match-selector', 'value')],
+    [State('prediction-version', 'data'), State('dashboard-mode', 'value')]
+)
+def update_win_prediction(n, selected_match, client_version, mode):
+    version = prediction_version(selected_match)
+    if mode == 'replay' or client_version == version:
+        raise PreventUpdate
+    return render_win_prediction(version, client_version is None, selected_match), version
+
+@figure_cache.cached('win-prediction')
+def render_win_prediction(version, full, selected_match):
+    teams, probabilities = prediction_snapshot(selected_match)
+
+    if full:
+        return px.pie(
+            names=teams, values=probabilities,
+            title='Probabilidade de Vitória',
+            hole=0.4
+        )
+
+    patch = Patch()
+    patch['data'][0]['labels'] = teams
+    patch['data'][0]['values'] = probabilities
+    return patch
+
+# ========== Replay ==========
+@app.callback(
+    [Output('replay-slider', 'max'), Output('replay-slider', 'disabled')],
+    [Input('dashboard-mode', 'value'), Input('match-selector', 'value'), Input('live-update', 'n_intervals')]
+)
+def update_replay_range(mode, selected_match, n):
+    replay = match_replays.get(selected_match)
+    if mode != 'replay' or replay is None or replay.end_t is None:
+        return 0, True
+    # Só o intervalo ainda em memória: o começo de partidas longas é descartado
+    return math.ceil(replay.end_t - replay.start_t), False
+
+@app.callback(
     [
-        Input('match-selector', 'value'),
-        Input('live-update', 'n_intervals')
-    ]
+        Output('tactical-heatmap', 'figure', allow_duplicate=True),
+        Output('player-stats', 'figure', allow_duplicate=True),
+        Output('win-prediction', 'figure', allow_duplicate=True),
+        Output('tactical-version', 'data', allow_duplicate=True),
+        Output('players-version', 'data', allow_duplicate=True),
+        Output('prediction-version', 'data', allow_duplicate=True)
+    ],
+    [Input('replay-slider', 'value'), Input('dashboard-mode', 'value')],
+    State('match-selector', 'value'),
+    prevent_initial_call=True
 )
-def update_dashboard(selected_match, n):
-    # Heatmap Tático Atualizado
-    tactical_fig = px.density_heatmap(
-        tactical_data, x='x', y='y', 
-        title='Mapa Tático - Posicionamento dos Jogadores',
-        color_continuous_scale='Viridis'
+def update_replay(offset, mode, selected_match):
+    # Versões zeradas: ao voltar para o modo ao vivo os gráficos são redesenhados inteiros
+    if mode != 'replay':
+        return dash.no_update, dash.no_update, dash.no_update, None, None, None
+    replay = match_replays.get(selected_match)
+    if replay is None or replay.start_t is None:
+        raise PreventUpdate
+
+    # Um keyframe mais, no máximo, `keyframe_every` eventos
+    state = replay.seek(replay.start_t + offset)
+    minutes = max(offset / 60, 1 / 60)
+
+    tactical_fig = go.Figure(go.Heatmap(
+        z=state.grid,
+        x=tactical_heatmap.x_centers,
+        y=tactical_heatmap.y_centers,
+        colorscale='Viridis'
+    ))
+    tactical_fig.update_layout(
+        title=f'Mapa Tático - Replay ({int(offset // 60)}:{int(offset % 60):02d})',
+        xaxis_title='x', yaxis_title='y'
     )
-    
-    # Estatísticas dos Jogadores
+
+    active = np.flatnonzero(state.players.any(axis=1))
+    kills, deaths, assists, damage, cs = state.players[active].T
     player_fig = px.bar(
-        players, x='Jogador', y='KDA',
-        title='Performance dos Jogadores (KDA)',
-        color='Dano/Min'
+        x=[live_feed.players.names[i] for i in active],
+        y=(kills + assists) / np.maximum(deaths, 1),
+        color=damage / minutes,
+        labels={'x': 'Jogador', 'y': 'KDA', 'color': 'Dano/Min'},
+        title='Performance dos Jogadores (KDA)'
     )
-    
-    # Previsão de Resultados
+
+    row = matches[matches['MatchID'] == selected_match].iloc[0]
+    team1_probability = float(win_engine.model.predict(state.teams[0] - state.teams[1]))
     prediction_fig = px.pie(
-        prediction_data, names='Time', values='Win Probability',
+        names=[row['Time1'], row['Time2']],
+        values=[team1_probability * 100, (1 - team1_probability) * 100],
         title='Probabilidade de Vitória',
         hole=0.4
     )
-    
+    return (compact_figure(tactical_fig), compact_figure(player_fig), compact_figure(prediction_fig),
+            None, None, None)
+
+# A tabela comparativa depende só da partida escolhida, não do intervalo
+@app.callback(
+    Output('team-comparison', 'data'),
+    Input('match-selector', 'value')
+)
+def update_team_comparison(selected_match):
     # Dados Comparativos dos Times
-    selected_match_data = matches[matches['MatchID'] == selected_match].iloc[0]
     comparison_data = [
         {'Estatística': 'KDA Médio', 'Time1': 4.8, 'Time2': 5.1},
         {'Estatística': 'Dano/Min', 'Time1': 620, 'Time2': 590},
         {'Estatística': 'Objetivos', 'Time1': 3, 'Time2': 2}
     ]
     
-    return tactical_fig, player_fig, prediction_fig, comparison_data
+    return comparison_data
 
 # ========== Executar o App ==========
 if __name__ == '__main__':
@@ -1,122 +1,111 @@
 import dash
 from dash import dcc, html, dash_table
-from dash.dependencies import Input, Output
+from dash.dependencies import ClientsideFunction, Input, Output
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import os
 import random
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import base64
-from io import BytesIO
+import sys
 
-# Geração de dados fictícios para o dashboard
+from dashboard.cache import figure_cache, register_stats_route
+from dashboard.downsample import lttb, relayout_x_range
+from dashboard.instrumentation import CallbackMetrics
+from dashboard.serialization import use_fast_json
+from dashboard.social_cube import SocialCube
+from dashboard.social_store import SocialStore, generate_social_data
+from dashboard.wordcloud_images import RENDER_PARAMS, WordCloudImages
+
+# Geração de dados fictícios para o dashboard (vetorizada, ver dashboard/social_store.py)
 def generate_fake_data():
-    # Datas (últimos 30 dias)
-    dates = [datetime.now() - timedelta(days=i) for i in range(30)]
-    dates.reverse()
-    dates_str = [date.strftime('%Y-%m-%d') for date in dates]
-    
-    # Plataformas
-    platforms = ['Instagram', 'Facebook', 'Twitter', 'LinkedIn']
-    
-    # Seguidores
-    followers_data = []
-    for platform in platforms:
-        base = random.randint(5000, 20000)
-        growth_rate = random.uniform(0.005, 0.015)
-        followers = [int(base * (1 + growth_rate) ** i) for i in range(30)]
-        for i, date in enumerate(dates_str):
-            followers_data.append({
-                'date': date,
-                'platform': platform,
-                'followers': followers[i]
-            })
-    followers_df = pd.DataFrame(followers_data)
-    
-    # Engajamento
-    engagement_data = []
-    for platform in platforms:
-        for date in dates_str:
-            engagement_data.append({
-                'date': date,
-                'platform': platform,
-                'likes': random.randint(100, 1000),
-                'comments': random.randint(10, 100),
-                'shares': random.randint(5, 50)
-            })
-    engagement_df = pd.DataFrame(engagement_data)
-    
-    # Sentimento
-    sentiment_data = []
-    for platform in platforms:
-        total = 100
-        positive = random.randint(40, 70)
-        negative = random.randint(5, 20)
-        neutral = total - positive - negative
-        sentiment_data.append({
-            'platform': platform,
-            'positive': positive,
-            'negative': negative,
-            'neutral': neutral
-        })
-    sentiment_df = pd.DataFrame(sentiment_data)
-    
-    # Dados demográficos
-    demographics_data = []
-    age_groups = ['18-24', '25-34', '35-44', '45-54', '55+']
-    genders = ['Masculino', 'Feminino', 'Outro']
-    
-    for platform in platforms:
-        for age in age_groups:
-            for gender in genders:
-                demographics_data.append({
-                    'platform': platform,
-                    'age_group': age,
-                    'gender': gender,
-                    'percentage': random.uniform(1, 10)
-                })
-    demographics_df = pd.DataFrame(demographics_data)
-    
-    # Dados geográficos
-    countries = ['Brasil', 'EUA', 'Portugal', 'México', 'Argentina', 'Colômbia', 'Reino Unido', 'Espanha', 'França', 'Alemanha']
-    geo_data = []
-    for platform in platforms:
-        remaining = 100
-        for country in countries[:-1]:
-            value = random.randint(1, remaining - len(countries) + len(geo_data) + 1)
-            remaining -= value
-            geo_data.append({
-                'platform': platform,
-                'country': country,
-                'users': value
-            })
-        geo_data.append({
-            'platform': platform,
-            'country': countries[-1],
-            'users': remaining
-        })
-    geo_df = pd.DataFrame(geo_data)
-    
-    # Palavras populares para a nuvem de palavras
-    words = ["conteúdo", "social", "marketing", "digital", "marca", "engajamento", "seguidores", 
-             "campanha", "viral", "trending", "hashtag", "influenciador", "alcance", "conversão", 
-             "ROI", "SEO", "compartilhamento", "publicação", "visualizações", "fãs", "cliques", 
-             "comentários", "likes", "comunicação", "audiência", "plataforma", "estratégia"]
-    
-    word_data = {}
-    for word in words:
-        word_data[word] = random.randint(10, 100)
-        
-    return followers_df, engagement_df, sentiment_df, demographics_df, geo_df, word_data
+    tables = generate_social_data(days=30)
+    return (tables['followers'], tables['engagement'], tables['sentiment'],
+            tables['demographics'], tables['geo'], tables['words'])
+
+# Dias carregados no cubo: o maior período do filtro
+HISTORY_DAYS = int(os.environ.get('SOCIAL_HISTORY_DAYS', 30))
+
+# Com SOCIAL_DATA_DIR, os dados vêm do Parquet particionado nesse diretório (criado
+# com dados fictícios se estiver vazio) e só os últimos HISTORY_DAYS dias são lidos;
+# sem ele, os dados fictícios ficam apenas em memória.
+SOCIAL_DATA_DIR = os.environ.get('SOCIAL_DATA_DIR')
+if SOCIAL_DATA_DIR:
+    social_store = SocialStore(SOCIAL_DATA_DIR)
+    if not social_store.exists():
+        social_store.write_all(generate_social_data(days=HISTORY_DAYS))
+    word_data = social_store.read_words()
+    # Agregados plataforma × dia: os callbacks consultam o cubo em vez de filtrar as tabelas.
+    # Novos dias entram com social_cube.extend(...); a versão do cubo invalida as figuras em cache.
+    social_cube = social_store.build_cube(days=HISTORY_DAYS)
+else:
+    social_store = None
+    followers_df, engagement_df, sentiment_df, demographics_df, geo_df, word_data = generate_fake_data()
+    social_cube = SocialCube.from_frames(followers_df, engagement_df, sentiment_df, demographics_df, geo_df)
+
+# Com CHAT_ANALYTICS_DB, a nuvem de palavras e o sentimento vêm das mensagens reais do
+# chat, pelo índice incremental de realtime_project/chat/analytics.py (mantido por
+# `manage.py analyze_messages --follow`). O chat não tem plataforma: esses painéis
+# mostram as salas com mais mensagens e não dependem do filtro de plataforma.
+CHAT_ANALYTICS_DB = os.environ.get('CHAT_ANALYTICS_DB')
+if CHAT_ANALYTICS_DB:
+    # Mesmo ajuste de caminho de realtime_project/asgi.py; o índice não carrega o Django
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'realtime_project'))
+    from chat.analytics import AnalyticsStore
+    chat_analytics = AnalyticsStore(CHAT_ANALYTICS_DB)
+else:
+    chat_analytics = None
 
-# Gerar os dados
-followers_df, engagement_df, sentiment_df, demographics_df, geo_df, word_data = generate_fake_data()
+# Salas mostradas no gráfico de sentimento
+CHAT_ROOMS = 4
+
+# Com SOCIAL_CLIENTSIDE=1, os filtros que só recortam tabelas pequenas rodam no navegador
+SOCIAL_CLIENTSIDE = os.environ.get('SOCIAL_CLIENTSIDE', '') not in ('', '0')
+
+# Com SOCIAL_BACKGROUND_DIR, demografia e mapa rodam em processos de segundo plano,
+# com resultados em um diskcache nesse diretório (compartilhado pelos workers)
+SOCIAL_BACKGROUND_DIR = os.environ.get('SOCIAL_BACKGROUND_DIR')
+
+# Pontos por série no gráfico de crescimento, da ordem da largura do gráfico em pixels
+MAX_SERIES_POINTS = int(os.environ.get('SOCIAL_MAX_POINTS', 1000))
 
 # Iniciar o app Dash
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
+# Aplicação WSGI para servidores de produção (python -m dashboard.serve social)
+server = app.server
+register_stats_route(app.server, figure_cache)
+# Tempo, payload e cache de cada callback em /metrics (DASH_PROFILE_MS liga os perfis)
+callback_metrics = CallbackMetrics.from_env('social')
+callback_metrics.instrument(app)
+callback_metrics.register_route(app.server)
+def chat_since():
+    # Primeiro dia da janela lida do índice do chat
+    return (datetime.now().date() - timedelta(days=HISTORY_DAYS - 1)).isoformat()
+
+def current_words():
+    # Frequências da nuvem: termos do chat na janela, ou as palavras dos dados sociais
+    if chat_analytics is not None:
+        return chat_analytics.term_frequencies(since=chat_since(), limit=RENDER_PARAMS['max_words']) or word_data
+    return word_data
+
+def analytics_version():
+    # Versão das saídas de palavras e sentimento: o cubo e, com o chat, a marca d'água
+    # do índice e o início da janela, que avança na virada do dia mesmo sem mensagens novas
+    if chat_analytics is None:
+        return social_cube.version, None
+    return social_cube.version, chat_analytics.version(), chat_since()
+
+# Nuvens de palavras renderizadas em outro processo e servidas em /wordcloud/<chave>.png;
+# chaves criadas por outro worker são refeitas a partir das frequências atuais.
+# Como script (`python main_social.py`), cada processo spawn reimportaria este
+# arquivo e montaria o dashboard inteiro de novo: nesse caso, renderiza em threads
+wordcloud_images = WordCloudImages(fallback=current_words, processes=__name__ != '__main__')
+wordcloud_images.register_route(app.server)
+# Registrada já na importação: com preload, todos os workers conhecem a chave
+wordcloud_images.register(current_words())
+use_fast_json()
 
 # Definir cores para o tema
 colors = {
@@ -130,23 +119,6 @@ colors = {
     'linkedin': '#0077B5',
 }
 
-# Define uma função para criar a nuvem de palavras
-def create_wordcloud(word_data):
-    wc = WordCloud(background_color="white", width=800, height=400, max_words=100)
-    wc.generate_from_frequencies(word_data)
-    
-    # Converte a imagem para base64 para exibir no Dash
-    img = BytesIO()
-    plt.figure(figsize=(10, 5))
-    plt.imshow(wc, interpolation='bilinear')
-    plt.axis("off")
-    plt.tight_layout(pad=0)
-    plt.savefig(img, format='png')
-    plt.close()
-    img.seek(0)
-    
-    return 'data:image/png;base64,{}'.format(base64.b64encode(img.getvalue()).decode())
-
 # Layout do Dashboard
 app.layout = html.Div(style={'backgroundColor': colors['background'], 'padding': '20px'}, children=[
     # Cabeçalho
@@ -181,6 +153,8 @@ app.layout = html.Div(style={'backgroundColor': colors['background'], 'padding':
                 style={'width': '100%'}
             ),
         ], style={'width': '30%', 'display': 'inline-block', 'padding': '10px'}),
+        # Progresso dos gráficos calculados em segundo plano (modo SOCIAL_BACKGROUND_DIR)
+        html.Progress(id='background-progress', style={'width': '100%', 'visibility': 'hidden'}),
     ], style={'backgroundColor': colors['plot_bg'], 'padding': '15px', 'borderRadius': '5px', 'marginBottom': '20px'}),
     
     # Visão geral (KPIs)
@@ -255,68 +229,33 @@ app.layout = html.Div(style={'backgroundColor': colors['background'], 'padding':
         ], style={'width': '49%', 'display': 'inline-block', 'backgroundColor': colors['plot_bg'], 'padding': '15px', 'borderRadius': '5px', 'float': 'right'}),
     ], style={'marginBottom': '20px'}),
     
+    # Agregados por plataforma para os callbacks do navegador (modo SOCIAL_CLIENTSIDE)
+    dcc.Store(id='social-base'),
+    
     # Rodapé
     html.Div([
         html.P("Dados atualizados em: " + datetime.now().strftime("%d/%m/%Y %H:%M"), style={'textAlign': 'center', 'color': colors['text']}),
     ], style={'marginTop': '30px'})
 ])
 
-# Callbacks para atualizar os gráficos e métricas
+# Funções de cada saída; todas são chamadas pelo estágio único de filtragem no fim do arquivo
 
 # Callback para o total de seguidores
-@app.callback(
-    Output('total-followers', 'children'),
-    [Input('platform-filter', 'value'),
-     Input('period-filter', 'value')]
-)
+@figure_cache.cached('total-followers', version=lambda: social_cube.version)
 def update_total_followers(platform, period):
-    filtered_df = followers_df
-    
-    # Filtra por período
-    period = int(period)
-    latest_dates = sorted(filtered_df['date'].unique())[-period:]
-    filtered_df = filtered_df[filtered_df['date'].isin(latest_dates)]
-    
-    # Filtra por plataforma
-    if platform != 'Todas':
-        filtered_df = filtered_df[filtered_df['platform'] == platform]
-    
-    # Obtém os últimos valores de seguidores para cada plataforma
-    latest_date = max(filtered_df['date'])
-    latest_followers = filtered_df[filtered_df['date'] == latest_date]
-    
-    total = latest_followers['followers'].sum()
+    # Último dia da janela com dados das plataformas selecionadas (consulta ao cubo)
+    total = social_cube.total_followers(platform, period)
     return f"{total:,}".replace(",", ".")
 
 # Callback para engajamento total
-@app.callback(
-    Output('total-engagement', 'children'),
-    [Input('platform-filter', 'value'),
-     Input('period-filter', 'value')]
-)
+@figure_cache.cached('total-engagement', version=lambda: social_cube.version)
 def update_total_engagement(platform, period):
-    filtered_df = engagement_df
-    
-    # Filtra por período
-    period = int(period)
-    latest_dates = sorted(filtered_df['date'].unique())[-period:]
-    filtered_df = filtered_df[filtered_df['date'].isin(latest_dates)]
-    
-    # Filtra por plataforma
-    if platform != 'Todas':
-        filtered_df = filtered_df[filtered_df['platform'] == platform]
-    
-    # Soma likes, comentários e compartilhamentos
-    total_engagement = filtered_df['likes'].sum() + filtered_df['comments'].sum() + filtered_df['shares'].sum()
+    # Soma de likes, comentários e compartilhamentos na janela (somas acumuladas do cubo)
+    total_engagement = social_cube.total_engagement(platform, period)
     
     return f"{total_engagement:,}".replace(",", ".")
 
 # Callback para taxa média de conversão (fictício - seria baseado em dados reais)
-@app.callback(
-    Output('avg-conversion-rate', 'children'),
-    [Input('platform-filter', 'value'),
-     Input('period-filter', 'value')]
-)
 def update_conversion_rate(platform, period):
     # Em um cenário real, este seria calculado com dados reais de conversão
     # Para este exemplo, geramos um valor aleatório
@@ -334,39 +273,41 @@ def update_conversion_rate(platform, period):
     return f"{rate:.2f}%".replace(".", ",")
 
 # Callback para sentimento positivo
-@app.callback(
-    Output('positive-sentiment', 'children'),
-    [Input('platform-filter', 'value')]
-)
+@figure_cache.cached('positive-sentiment', version=analytics_version)
 def update_positive_sentiment(platform):
-    filtered_df = sentiment_df
-    
-    # Filtra por plataforma
-    if platform != 'Todas':
-        filtered_df = filtered_df[filtered_df['platform'] == platform]
-    
-    # Calcula média de sentimento positivo
-    avg_positive = filtered_df['positive'].mean()
+    if chat_analytics is not None:
+        # Mensagens positivas entre todas as mensagens do chat na janela
+        rows = chat_analytics.sentiment_by_room(since=chat_since())
+        messages = sum(row[4] for row in rows)
+        avg_positive = 100 * sum(row[1] for row in rows) / messages if messages else float('nan')
+    else:
+        # Média de sentimento positivo das plataformas selecionadas
+        avg_positive = social_cube.positive_sentiment(platform)
     
     return f"{avg_positive:.1f}%".replace(".", ",")
 
 # Callback para o gráfico de crescimento de seguidores
-@app.callback(
-    Output('followers-growth', 'figure'),
-    [Input('platform-filter', 'value'),
-     Input('period-filter', 'value')]
-)
-def update_followers_growth(platform, period):
-    filtered_df = followers_df
-    
-    # Filtra por período
-    period = int(period)
-    latest_dates = sorted(filtered_df['date'].unique())[-period:]
-    filtered_df = filtered_df[filtered_df['date'].isin(latest_dates)]
-    
-    # Filtra por plataforma
-    if platform != 'Todas':
-        filtered_df = filtered_df[filtered_df['platform'] == platform]
+@figure_cache.cached('followers-growth', version=lambda: social_cube.version)
+def update_followers_growth(platform, period, x_range=None):
+    # Fatia plataforma × dia do cubo; cada série é reduzida a MAX_SERIES_POINTS
+    # pontos (LTTB), só dentro da faixa visível quando há zoom (`x_range`)
+    dates, names, values, present = social_cube.followers_series(platform, period)
+    x = pd.to_datetime(dates).asi8
+    visible = np.ones(len(dates), dtype=bool)
+    if x_range:
+        start, end = pd.Timestamp(x_range[0]).value, pd.Timestamp(x_range[1]).value
+        visible = (x >= start) & (x <= end)
+    series = []
+    for i, name in enumerate(names):
+        idx = np.flatnonzero(present[i] & visible)
+        idx = idx[lttb(x[idx], values[i, idx], MAX_SERIES_POINTS)]
+        series.append(pd.DataFrame({
+            'date': dates[idx],
+            'platform': name,
+            'followers': values[i, idx].astype(np.int64)
+        }))
+    filtered_df = (pd.concat(series, ignore_index=True) if series
+                   else pd.DataFrame({'date': [], 'platform': [], 'followers': []}))
     
     # Cria o gráfico
     fig = px.line(filtered_df, x='date', y='followers', color='platform',
@@ -384,35 +325,24 @@ def update_followers_growth(platform, period):
         xaxis_title="Data",
         yaxis_title="Número de Seguidores",
         legend_title="Plataforma",
-        hovermode="x unified"
+        hovermode="x unified",
+        # Mantém o zoom do usuário quando a figura é refeita com mais detalhe
+        uirevision=f'{platform}-{period}'
     )
     
     return fig
 
 # Callback para análise de engajamento
-@app.callback(
-    Output('engagement-analysis', 'figure'),
-    [Input('platform-filter', 'value'),
-     Input('period-filter', 'value')]
-)
+@figure_cache.cached('engagement-analysis', version=lambda: social_cube.version)
 def update_engagement_analysis(platform, period):
-    filtered_df = engagement_df
-    
-    # Filtra por período
-    period = int(period)
-    latest_dates = sorted(filtered_df['date'].unique())[-period:]
-    filtered_df = filtered_df[filtered_df['date'].isin(latest_dates)]
-    
-    # Filtra por plataforma
-    if platform != 'Todas':
-        filtered_df = filtered_df[filtered_df['platform'] == platform]
-    
-    # Agrupa por plataforma
-    platform_engagement = filtered_df.groupby('platform').agg({
-        'likes': 'sum',
-        'comments': 'sum',
-        'shares': 'sum'
-    }).reset_index()
+    # Totais por plataforma na janela, já somados no cubo
+    names, totals = social_cube.engagement_by_platform(platform, period)
+    platform_engagement = pd.DataFrame({
+        'platform': names,
+        'likes': totals[0].astype(np.int64),
+        'comments': totals[1].astype(np.int64),
+        'shares': totals[2].astype(np.int64)
+    }).sort_values('platform')
     
     # Melta os dados para o formato adequado
     melted_df = pd.melt(platform_engagement, id_vars=['platform'], value_vars=['likes', 'comments', 'shares'],
@@ -442,17 +372,26 @@ def update_engagement_analysis(platform, period):
     
     return fig
 
+def sentiment_means(platform):
+    # (nomes, % positivo/neutro/negativo): plataformas do cubo ou as salas do chat com mais mensagens
+    if chat_analytics is None:
+        return social_cube.sentiment_by_platform(platform)
+    rows = chat_analytics.sentiment_by_room(since=chat_since())[:CHAT_ROOMS]
+    counts = np.array([row[1:4] for row in rows], dtype=np.float64).reshape(-1, 3)
+    messages = np.array([row[4] for row in rows], dtype=np.float64)
+    return [row[0] for row in rows], 100 * counts / messages[:, None]
+
 # Callback para análise de sentimento
-@app.callback(
-    Output('sentiment-analysis', 'figure'),
-    [Input('platform-filter', 'value')]
-)
+@figure_cache.cached('sentiment-analysis', version=analytics_version)
 def update_sentiment_analysis(platform):
-    filtered_df = sentiment_df
-    
-    # Filtra por plataforma
-    if platform != 'Todas':
-        filtered_df = filtered_df[filtered_df['platform'] == platform]
+    # Médias por plataforma do cubo (ou por sala do chat)
+    names, means = sentiment_means(platform)
+    filtered_df = pd.DataFrame({
+        'platform': names,
+        'positive': means[:, 0],
+        'neutral': means[:, 1],
+        'negative': means[:, 2]
+    })
     
     # Melta os dados para o formato adequado
     melted_df = pd.melt(filtered_df, id_vars=['platform'], value_vars=['positive', 'neutral', 'negative'],
@@ -487,21 +426,17 @@ def update_sentiment_analysis(platform):
     return fig
 
 # Callback para demografia do público
-@app.callback(
-    Output('audience-demographics', 'figure'),
-    [Input('platform-filter', 'value')]
-)
+@figure_cache.cached('audience-demographics', version=lambda: social_cube.version)
 def update_audience_demographics(platform):
-    filtered_df = demographics_df
-    
-    # Filtra por plataforma
-    if platform != 'Todas':
-        filtered_df = filtered_df[filtered_df['platform'] == platform]
-    
-    # Agrupa por faixa etária e gênero
-    grouped_df = filtered_df.groupby(['platform', 'age_group', 'gender']).agg({
-        'percentage': 'sum'
-    }).reset_index()
+    # Somas plataforma × faixa etária × gênero do cubo, na ordem do groupby
+    names, ages, genders, sums = social_cube.demographics_by_platform(platform)
+    platform_idx, age_idx, gender_idx = np.nonzero(sums)
+    grouped_df = pd.DataFrame({
+        'platform': np.array(names, dtype=object)[platform_idx],
+        'age_group': np.array(ages, dtype=object)[age_idx],
+        'gender': np.array(genders, dtype=object)[gender_idx],
+        'percentage': sums[platform_idx, age_idx, gender_idx]
+    }).sort_values(['platform', 'age_group', 'gender'])
     
     # Cria o gráfico
     fig = px.bar(grouped_df, x='age_group', y='percentage', color='gender', barmode='group',
@@ -522,21 +457,14 @@ def update_audience_demographics(platform):
     return fig
 
 # Callback para distribuição geográfica
-@app.callback(
-    Output('geographic-distribution', 'figure'),
-    [Input('platform-filter', 'value')]
-)
+@figure_cache.cached('geographic-distribution', version=lambda: social_cube.version)
 def update_geographic_distribution(platform):
-    filtered_df = geo_df
-    
-    # Filtra por plataforma
+    # Usuários por país somados no cubo (todas as plataformas ou só a escolhida)
+    countries, users = social_cube.geo_by_platform(platform)
+    filtered_df = pd.DataFrame({'country': countries, 'users': users.astype(np.int64)})
+    filtered_df = filtered_df[filtered_df['users'] > 0].sort_values('country')
     if platform != 'Todas':
-        filtered_df = filtered_df[filtered_df['platform'] == platform]
-    else:
-        # Se 'Todas' for selecionado, agrupe os dados por país
-        filtered_df = filtered_df.groupby('country').agg({
-            'users': 'sum'
-        }).reset_index()
+        filtered_df['platform'] = platform
     
     # Cria o gráfico
     if platform != 'Todas':
@@ -562,14 +490,140 @@ def update_geographic_distribution(platform):
     return fig
 
 # Callback para nuvem de palavras
-@app.callback(
-    Output('wordcloud-image', 'src'),
-    [Input('platform-filter', 'value')]
-)
+@figure_cache.cached('wordcloud-image', version=analytics_version)
 def update_wordcloud(platform):
     # Em um cenário real, poderíamos filtrar as palavras por plataforma
     # Aqui, estamos retornando a mesma nuvem de palavras
-    return create_wordcloud(word_data)
+    key = wordcloud_images.register(current_words())
+    # A renderização começa agora; o navegador pede a imagem logo em seguida
+    wordcloud_images.prefetch(key)
+    return app.get_relative_path(f'/wordcloud/{key}.png')
+
+# Estágio único de filtragem: uma mudança de filtro é uma requisição, e não nove.
+# Cada saída é memorizada no servidor por (filtro, versão do cubo); ao mudar só o
+# período, as saídas que dependem apenas da plataforma não são reenviadas.
+OUTPUTS = {
+    update_total_followers: Output('total-followers', 'children'),
+    update_total_engagement: Output('total-engagement', 'children'),
+    update_conversion_rate: Output('avg-conversion-rate', 'children'),
+    update_followers_growth: Output('followers-growth', 'figure'),
+    update_engagement_analysis: Output('engagement-analysis', 'figure'),
+    update_positive_sentiment: Output('positive-sentiment', 'children'),
+    update_sentiment_analysis: Output('sentiment-analysis', 'figure'),
+    update_audience_demographics: Output('audience-demographics', 'figure'),
+    update_geographic_distribution: Output('geographic-distribution', 'figure'),
+    update_wordcloud: Output('wordcloud-image', 'src'),
+}
+PERIOD_OUTPUTS = (
+    update_total_followers,
+    update_total_engagement,
+    update_conversion_rate,
+    update_followers_growth,
+    update_engagement_analysis,
+)
+# Recortes por plataforma de tabelas pequenas: no modo SOCIAL_CLIENTSIDE rodam no navegador
+# (o sentimento do chat é lido do índice e fica no servidor)
+CLIENTSIDE_OUTPUTS = (() if chat_analytics is not None else (
+    update_positive_sentiment,
+    update_sentiment_analysis,
+)) + (
+    update_audience_demographics,
+    update_geographic_distribution,
+)
+# Figuras mais caras; com SOCIAL_BACKGROUND_DIR saem do estágio e vão para um callback em segundo plano
+BACKGROUND_OUTPUTS = () if SOCIAL_CLIENTSIDE or not SOCIAL_BACKGROUND_DIR else (
+    update_audience_demographics,
+    update_geographic_distribution,
+)
+PLATFORM_OUTPUTS = tuple(
+    output for output in OUTPUTS
+    if output not in PERIOD_OUTPUTS and output not in BACKGROUND_OUTPUTS
+    and not (SOCIAL_CLIENTSIDE and output in CLIENTSIDE_OUTPUTS)
+)
+
+def filtered_views(platform, period, period_only=False):
+    period_values = [output(platform, period) for output in PERIOD_OUTPUTS]
+    if period_only:
+        platform_values = [dash.no_update] * len(PLATFORM_OUTPUTS)
+    else:
+        platform_values = [output(platform) for output in PLATFORM_OUTPUTS]
+    return period_values + platform_values
+
+@app.callback(
+    [OUTPUTS[output] for output in PERIOD_OUTPUTS + PLATFORM_OUTPUTS],
+    [Input('platform-filter', 'value'),
+     Input('period-filter', 'value'),
+     Input('followers-growth', 'relayoutData')]
+)
+def update_filtered_views(platform, period, relayout):
+    if dash.ctx.triggered_id == 'followers-growth':
+        # Zoom no gráfico de crescimento: só ele é refeito, com detalhe na faixa visível
+        x_range = relayout_x_range(relayout)
+        if x_range is False:
+            raise PreventUpdate
+        outputs = [dash.no_update] * (len(PERIOD_OUTPUTS) + len(PLATFORM_OUTPUTS))
+        outputs[PERIOD_OUTPUTS.index(update_followers_growth)] = update_followers_growth(platform, period, x_range)
+        return outputs
+    return filtered_views(platform, period, period_only=dash.ctx.triggered_id == 'period-filter')
+
+# ========== Modo SOCIAL_CLIENTSIDE ==========
+# Os agregados por plataforma vão para o navegador uma vez (social-base) e a
+# troca de plataforma recorta sentimento, demografia e geografia em JavaScript
+# (assets/social_clientside.js), sem ida ao servidor.
+@figure_cache.cached('social-base', version=lambda: social_cube.version)
+def clientside_base_data():
+    base = social_cube.profiles()
+    # Saídas montadas pelo navegador, na ordem do callback
+    base['outputs'] = [OUTPUTS[output].component_id for output in CLIENTSIDE_OUTPUTS]
+    base['style'] = {
+        'colors': colors,
+        'sentiment': {'Positivo': '#54A24B', 'Neutro': '#EECA3B', 'Negativo': '#E45756'},
+        'genders': px.colors.qualitative.Set2,
+        'blues': px.colors.sequential.Blues,
+        # Mesmo tema das figuras montadas no servidor
+        'template': go.Figure().to_plotly_json()['layout']['template'],
+    }
+    return base
+
+if SOCIAL_CLIENTSIDE:
+    # Chamado uma vez por carregamento da página (o id do Store não muda)
+    @app.callback(Output('social-base', 'data'), Input('social-base', 'id'))
+    def load_clientside_base(_):
+        return clientside_base_data()
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='social', function_name='filterViews'),
+        [OUTPUTS[output] for output in CLIENTSIDE_OUTPUTS],
+        [Input('platform-filter', 'value'), Input('social-base', 'data')]
+    )
+
+# ========== Modo SOCIAL_BACKGROUND_DIR ==========
+# Demografia e mapa rodam em um processo por tarefa (DiskcacheManager, sem broker
+# externo) e não prendem a thread do worker. Se o filtro muda antes do fim, o
+# navegador envia o job antigo em `oldJob` e o Dash encerra o processo. O
+# resultado fica no disco por (plataforma, versão do cubo) para todos os workers.
+if BACKGROUND_OUTPUTS:
+    import diskcache
+    from dash import DiskcacheManager
+
+    background_manager = DiskcacheManager(diskcache.Cache(SOCIAL_BACKGROUND_DIR),
+                                          cache_by=[lambda: social_cube.version], expire=3600)
+
+    @app.callback(
+        [OUTPUTS[output] for output in BACKGROUND_OUTPUTS],
+        Input('platform-filter', 'value'),
+        background=True,
+        manager=background_manager,
+        progress=[Output('background-progress', 'value'), Output('background-progress', 'max')],
+        running=[(Output('background-progress', 'style'),
+                  {'width': '100%', 'visibility': 'visible'}, {'width': '100%', 'visibility': 'hidden'})],
+    )
+    def update_background_views(set_progress, platform):
+        values = []
+        for done, output in enumerate(BACKGROUND_OUTPUTS):
+            set_progress((str(done), str(len(BACKGROUND_OUTPUTS))))
+            values.append(output(platform))
+        return values
 
 # Executar o servidor
 if __name__ == '__main__':
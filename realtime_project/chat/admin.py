@@ -3,4 +3,5 @@ from django.contrib import admin
 # Register your models here.
 from .models import *
 admin.site.register(ChatRoom)
-admin.site.register(Message)
\ No newline at end of file
+admin.site.register(Message)
+admin.site.register(Mention)
\ No newline at end of file
@@ -0,0 +1,116 @@
+# chat/admission.py
+import asyncio
+import functools
+import random
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+ACCEPT = 'accept'
+DEGRADED = 'degraded'
+REJECT = 'reject'
+
+# Código de fechamento enviado quando a conexão é recusada por sobrecarga
+# (faixa 4000-4999 é livre para a aplicação; 4503 espelha o HTTP 503)
+RETRY_AFTER_CLOSE_CODE = 4503
+
+DEFAULTS = {
+    # Sockets abertos neste processo
+    'DEGRADED_SOCKETS': 2000,
+    'MAX_SOCKETS': 5000,
+    # Atraso do event loop, em segundos
+    'DEGRADED_LOOP_LAG': 0.1,
+    'MAX_LOOP_LAG': 0.5,
+    # Chamadas aguardando a thread de banco do Channels
+    'DEGRADED_DB_QUEUE': 20,
+    'MAX_DB_QUEUE': 100,
+    # Segundos sugeridos ao cliente antes de tentar novamente
+    'RETRY_AFTER': 5,
+    'LAG_SAMPLE_INTERVAL': 0.25,
+}
+
+
+class AdmissionController:
+    """Decide se uma nova conexão WebSocket entra normalmente, entra em modo
+    degradado (sem histórico) ou é recusada com um pedido de retry.
+
+    Observa três sinais do processo: número de sockets abertos, atraso do
+    event loop (medido por uma tarefa que dorme em intervalos fixos) e a fila
+    de chamadas ao banco feitas via `database_call`.
+
+    `decide` já reserva o slot do socket quando admite a conexão, na mesma
+    etapa síncrona em que compara o limite: conexões simultâneas não passam
+    todas pela verificação antes de alguma ser contada. Quem recebeu ACCEPT ou
+    DEGRADED deve chamar `socket_closed` ao desistir ou ao desconectar.
+    """
+
+    def __init__(self, config=None):
+        config = config or {}
+        unknown = set(config) - set(DEFAULTS)
+        if unknown:
+            raise ImproperlyConfigured(f"CHAT_ADMISSION: chaves desconhecidas {sorted(unknown)}")
+        # Os valores de DEFAULTS valem para o que não for informado
+        self.config = {**DEFAULTS, **config}
+        self.open_sockets = 0
+        self.db_pending = 0
+        self.loop_lag = 0.0
+        self._monitor = None
+
+    @classmethod
+    def from_settings(cls):
+        return cls(getattr(settings, 'CHAT_ADMISSION', None))
+
+    def ensure_monitor(self):
+        # Inicia o monitor de atraso no loop atual (uma vez por loop)
+        if self._monitor is None or self._monitor.done():
+            self._monitor = asyncio.get_running_loop().create_task(self._monitor_loop_lag())
+
+    async def _monitor_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        interval = self.config['LAG_SAMPLE_INTERVAL']
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - start - interval)
+            # Sobe imediatamente, desce suavizado para evitar oscilação
+            self.loop_lag = lag if lag > self.loop_lag else 0.8 * self.loop_lag + 0.2 * lag
+
+    def decide(self):
+        self.ensure_monitor()
+        c = self.config
+        if (self.open_sockets >= c['MAX_SOCKETS']
+                or self.loop_lag >= c['MAX_LOOP_LAG']
+                or self.db_pending >= c['MAX_DB_QUEUE']):
+            return REJECT
+        degraded = (self.open_sockets >= c['DEGRADED_SOCKETS']
+                    or self.loop_lag >= c['DEGRADED_LOOP_LAG']
+                    or self.db_pending >= c['DEGRADED_DB_QUEUE'])
+        # Reserva o slot sem nenhum await entre a verificação e a contagem
+        self.open_sockets += 1
+        return DEGRADED if degraded else ACCEPT
+
+    def retry_after(self):
+        # Jitter para que os clientes recusados não voltem todos ao mesmo tempo
+        base = self.config['RETRY_AFTER']
+        return round(base + random.uniform(0, base), 1)
+
+    def socket_closed(self):
+        self.open_sockets = max(0, self.open_sockets - 1)
+
+    def database_call(self, func):
+        """Como `database_sync_to_async`, mas contabiliza a fila de chamadas ao banco."""
+        call = database_sync_to_async(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            self.db_pending += 1
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                self.db_pending -= 1
+
+        return wrapper
+
+
+admission = AdmissionController.from_settings()
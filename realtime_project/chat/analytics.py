@@ -0,0 +1,254 @@
+# chat/analytics.py
+"""Índice incremental de termos e sentimento das mensagens do chat.
+
+Só biblioteca padrão: o dashboard (main_social.py) lê o índice sem carregar
+o Django. O comando `analyze_messages` lê as mensagens novas (id acima da
+marca d'água), tokeniza em lotes e soma os contadores por (dia, sala):
+
+    terms      (day, room, term)  -> count
+    sentiment  (day, room)        -> positive, neutral, negative, messages
+
+Contadores e marca d'água são gravados na mesma transação, então cada
+mensagem entra no índice exatamente uma vez, mesmo se o comando cair no
+meio de um lote. As leituras somam só os dias pedidos: o custo depende de
+dias × salas × termos, e não do número de mensagens.
+"""
+import collections
+import os
+import re
+import sqlite3
+import threading
+import time
+
+URL_RE = re.compile(r'https?://\S+|www\.\S+')
+MENTION_RE = re.compile(r'@[\w.@+-]+')
+# Palavras (só letras), com hífen ou apóstrofo internos: "bem-vindo", "d'água"
+TOKEN_RE = re.compile(r"[^\W\d_]+(?:['-][^\W\d_]+)*")
+MIN_TERM_LENGTH = 3
+
+STOPWORDS = frozenset("""
+a o as os um uma uns umas de do da dos das em no na nos nas por pelo pela pelos pelas para pra
+com sem sob sobre entre até após que se não nem mas mais menos muito muita muitos muitas pouco
+e ou é são foi era ser ter tem têm tinha está estão estava vai vou isso isto esse essa este esta
+aquele aquela ele ela eles elas eu tu você vocês nós me te lhe nos meu minha seu sua já também
+só então quando onde como porque porquê aqui ali lá bem tá né aí the and for are but not you
+all any can had her was one our out has his how its may new now see way who did get him let
+this that with have from they will what there their would about which when your been just
+""".split())
+
+POSITIVE = frozenset("""
+bom boa bons boas ótimo ótima ótimos excelente incrível maravilhoso maravilhosa perfeito perfeita
+legal massa top show adorei adoro amei amo gostei gosto feliz parabéns obrigado obrigada valeu
+lindo linda sucesso melhor vitória venceu ganhou ganhamos fácil rápido eficiente recomendo
+good great awesome amazing excellent love loved like liked nice happy thanks perfect best win won
+""".split())
+NEGATIVE = frozenset("""
+ruim ruins péssimo péssima horrível terrível odeio odiei detesto chato chata triste raiva problema
+problemas erro erros bug bugs falha falhou lento lenta travou trava caiu pior derrota perdeu
+perdemos difícil demora demorou reclamação decepção decepcionado cancelar lixo
+bad awful terrible hate hated sad angry error bug slow broken worst lost fail failed problem
+""".split())
+# "no" fica de fora: em português é a contração de "em" + "o"
+NEGATORS = frozenset('não nem nunca jamais sem not never'.split())
+# Tokens após uma negação cuja polaridade é invertida
+NEGATION_WINDOW = 2
+
+
+def tokenize(text):
+    """Tokens em minúsculas, sem URLs nem menções."""
+    text = MENTION_RE.sub(' ', URL_RE.sub(' ', text))
+    return TOKEN_RE.findall(text.casefold())
+
+
+def terms(tokens):
+    return [token for token in tokens if len(token) >= MIN_TERM_LENGTH and token not in STOPWORDS]
+
+
+def sentiment(tokens):
+    """'positive', 'neutral' ou 'negative' pelo saldo do léxico, com negação ("não gostei")."""
+    score = 0
+    negated = 0
+    for token in tokens:
+        if token in NEGATORS:
+            negated = NEGATION_WINDOW
+            continue
+        polarity = (token in POSITIVE) - (token in NEGATIVE)
+        score += -polarity if negated else polarity
+        negated = max(negated - 1, 0)
+    if score > 0:
+        return 'positive'
+    if score < 0:
+        return 'negative'
+    return 'neutral'
+
+
+SENTIMENT_COLUMNS = ('positive', 'neutral', 'negative')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watermark (
+    name TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    day TEXT NOT NULL,
+    room TEXT NOT NULL,
+    term TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, room, term)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sentiment (
+    day TEXT NOT NULL,
+    room TEXT NOT NULL,
+    positive INTEGER NOT NULL,
+    neutral INTEGER NOT NULL,
+    negative INTEGER NOT NULL,
+    messages INTEGER NOT NULL,
+    PRIMARY KEY (day, room)
+) WITHOUT ROWID;
+"""
+
+
+class AnalyticsStore:
+    """Contadores por (dia, sala) em um arquivo SQLite, com a marca d'água das mensagens.
+
+    Em modo WAL, o dashboard lê enquanto o comando grava. Cada operação abre
+    a sua conexão, então a mesma instância pode ser usada por várias threads.
+    """
+
+    def __init__(self, path, version_ttl=1.0):
+        self.path = os.fspath(path)
+        self.version_ttl = version_ttl
+        self._version = None
+        self._version_at = 0.0
+        self._lock = threading.Lock()
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _query(self, sql, params=()):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    # ---------- Gravação ----------
+    def watermark(self):
+        """Id da última mensagem indexada (0 se nenhuma)."""
+        rows = self._query("SELECT last_id FROM watermark WHERE name = 'messages'")
+        return rows[0][0] if rows else 0
+
+    def apply(self, last_id, term_counts, sentiment_counts):
+        """Soma os contadores de um lote e avança a marca d'água, atomicamente.
+
+        `term_counts`: {(dia, sala, termo): n}; `sentiment_counts`: {(dia, sala):
+        [positivas, neutras, negativas, mensagens]}.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    'INSERT INTO terms (day, room, term, count) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (day, room, term) DO UPDATE SET count = count + excluded.count',
+                    [(*key, count) for key, count in term_counts.items()]
+                )
+                conn.executemany(
+                    'INSERT INTO sentiment (day, room, positive, neutral, negative, messages) '
+                    'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (day, room) DO UPDATE SET '
+                    'positive = positive + excluded.positive, neutral = neutral + excluded.neutral, '
+                    'negative = negative + excluded.negative, messages = messages + excluded.messages',
+                    [(*key, *counts) for key, counts in sentiment_counts.items()]
+                )
+                conn.execute(
+                    "INSERT INTO watermark (name, last_id) VALUES ('messages', ?) "
+                    'ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id',
+                    (last_id,)
+                )
+        finally:
+            conn.close()
+
+    def prune(self, before):
+        """Remove os contadores dos dias anteriores a `before` ('AAAA-MM-DD')."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM terms WHERE day < ?', (before,))
+                conn.execute('DELETE FROM sentiment WHERE day < ?', (before,))
+        finally:
+            conn.close()
+
+    def reset(self):
+        conn = self._connect()
+        try:
+            with conn:
+                for table in ('terms', 'sentiment', 'watermark'):
+                    conn.execute(f'DELETE FROM {table}')
+        finally:
+            conn.close()
+
+    # ---------- Leitura ----------
+    def version(self):
+        """Marca d'água lida no máximo a cada `version_ttl` segundos (chave de cache do dashboard)."""
+        with self._lock:
+            now = time.monotonic()
+            if self._version is None or now - self._version_at > self.version_ttl:
+                self._version = self.watermark()
+                self._version_at = now
+            return self._version
+
+    def _where(self, since, room):
+        clauses, params = [], []
+        if since is not None:
+            clauses.append('day >= ?')
+            params.append(since)
+        if room is not None:
+            clauses.append('room = ?')
+            params.append(room)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def term_frequencies(self, since=None, room=None, limit=200):
+        """{termo: ocorrências} dos `limit` termos mais frequentes a partir do dia `since`."""
+        where, params = self._where(since, room)
+        rows = self._query(
+            f'SELECT term, SUM(count) AS total FROM terms{where} GROUP BY term ORDER BY total DESC LIMIT ?',
+            (*params, limit)
+        )
+        return dict(rows)
+
+    def sentiment_by_room(self, since=None, room=None):
+        """[(sala, positivas, neutras, negativas, mensagens)], das salas com mais mensagens."""
+        where, params = self._where(since, room)
+        return self._query(
+            f'SELECT room, SUM(positive), SUM(neutral), SUM(negative), SUM(messages) AS total '
+            f'FROM sentiment{where} GROUP BY room ORDER BY total DESC',
+            params
+        )
+
+
+def index_batch(store, rows):
+    """Indexa um lote de mensagens (id, sala, dia 'AAAA-MM-DD', texto) em ordem de id.
+
+    Devolve o último id do lote, ou None se o lote estava vazio.
+    """
+    term_counts = collections.Counter()
+    sentiment_counts = collections.defaultdict(lambda: [0, 0, 0, 0])
+    last_id = None
+    for message_id, room, day, content in rows:
+        tokens = tokenize(content)
+        for term in terms(tokens):
+            term_counts[day, room, term] += 1
+        counts = sentiment_counts[day, room]
+        counts[SENTIMENT_COLUMNS.index(sentiment(tokens))] += 1
+        counts[3] += 1
+        last_id = message_id
+    if last_id is not None:
+        store.apply(last_id, term_counts, sentiment_counts)
+    return last_id
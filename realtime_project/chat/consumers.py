@@ -1,14 +1,23 @@
 # chat/consumers.py
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import ChatRoom, Message
+from .admission import DEGRADED, REJECT, RETRY_AFTER_CLOSE_CODE, admission
+from .live_counters import LiveCounterWriter
+from .mentions import parse_mentions, username_index
+from .models import ChatRoom, Mention, Message
+from .traffic import CONNECT, DISCONNECT, RECEIVE, recorder
+
+# Salas ativas, usuários conectados e eventos por minuto para os cartões do dashboard
+live_counters = LiveCounterWriter.from_name(settings.CHAT_LIVE_COUNTERS)
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.room_name = self.scope['url_route']['kwargs']['room_name']
         self.room_group_name = f'chat_{self.room_name}'
+        self.admitted = False
+        self.holds_slot = False
 
         # Verificar se o usuário está autenticado
         if self.scope["user"].is_anonymous:
@@ -16,19 +25,57 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
 
-        # Juntar-se ao grupo da sala
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
-
-        # Aceitar a conexão WebSocket
-        await self.accept()
-
-        # Enviar mensagens anteriores ao usuário que acabou de se conectar
-        messages = await self.get_messages(self.room_name)
-        for message in messages:
-            await self.send(text_data=json.dumps(message))
+        # Controle de admissão: sob sobrecarga, pedir ao cliente que volte depois.
+        # Fora do REJECT, o slot já fica reservado aqui e precisa ser liberado
+        decision = admission.decide()
+        if decision == REJECT:
+            await self.accept()
+            await self.send(text_data=json.dumps({
+                'type': 'retry',
+                'retry_after': admission.retry_after()
+            }))
+            await self.close(code=RETRY_AFTER_CLOSE_CODE)
+            return
+        self.holds_slot = True
+
+        try:
+            # Juntar-se ao grupo da sala
+            await self.channel_layer.group_add(
+                self.room_group_name,
+                self.channel_name
+            )
+
+            # Juntar-se ao grupo pessoal, onde chegam as menções de qualquer sala
+            self.user_group_name = f'user_{self.scope["user"].id}'
+            await self.channel_layer.group_add(
+                self.user_group_name,
+                self.channel_name
+            )
+
+            # Aceitar a conexão WebSocket
+            await self.accept()
+        except BaseException:
+            # Inclui o cancelamento da tarefa: o slot reservado não pode vazar
+            self.release_slot()
+            raise
+        self.admitted = True
+        if live_counters:
+            live_counters.connected(self.room_name, self.scope["user"].id)
+        if recorder:
+            self.traffic_id = recorder.new_connection_id()
+            recorder.record(CONNECT, self.traffic_id, self.room_name, self.scope["user"].username)
+
+        if decision == DEGRADED:
+            # Entrada degradada: sem replay do histórico para poupar o banco
+            await self.send(text_data=json.dumps({
+                'type': 'notification',
+                'message': 'Servidor sob carga: histórico não carregado'
+            }))
+        else:
+            # Enviar mensagens anteriores ao usuário que acabou de se conectar
+            messages = await self.get_messages(self.room_name)
+            for message in messages:
+                await self.send(text_data=json.dumps(message))
 
         # Notificar outros usuários sobre a nova conexão
         await self.channel_layer.group_send(
@@ -39,12 +86,31 @@ class ChatConsumer(AsyncWebsocketConsumer):
             }
         )
 
+    def release_slot(self):
+        # Libera o slot reservado por admission.decide(), uma única vez
+        if getattr(self, 'holds_slot', False):
+            self.holds_slot = False
+            admission.socket_closed()
+
     async def disconnect(self, close_code):
+        self.release_slot()
+        # Conexões recusadas nunca entraram nos grupos
+        if not getattr(self, 'admitted', False):
+            return
+        if live_counters:
+            live_counters.disconnected(self.room_name, self.scope["user"].id)
+        if recorder:
+            recorder.record(DISCONNECT, self.traffic_id, self.room_name, self.scope["user"].username)
+
         # Sair do grupo da sala
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
+        await self.channel_layer.group_discard(
+            self.user_group_name,
+            self.channel_name
+        )
 
         # Notificar outros usuários sobre a desconexão
         await self.channel_layer.group_send(
@@ -59,13 +125,20 @@ class ChatConsumer(AsyncWebsocketConsumer):
     async def receive(self, text_data):
         text_data_json = json.loads(text_data)
         message = text_data_json['message']
-
-        # Salvar mensagem no banco de dados
-        await self.save_message(
-            username=self.scope["user"].username,
+        username = self.scope["user"].username
+        if live_counters:
+            live_counters.event()
+        if recorder:
+            recorder.record(RECEIVE, self.traffic_id, self.room_name, username, message)
+
+        # Salvar mensagem no banco de dados (e as menções encontradas nela)
+        mentioned_ids = await self.save_message(
+            username=username,
             room_name=self.room_name,
-            message=message
+            message=message,
+            mentions=parse_mentions(message)
         )
+        timestamp = await self.get_timestamp()
 
         # Enviar mensagem para o grupo da sala
         await self.channel_layer.group_send(
@@ -73,11 +146,24 @@ class ChatConsumer(AsyncWebsocketConsumer):
             {
                 'type': 'chat_message',
                 'message': message,
-                'username': self.scope["user"].username,
-                'timestamp': await self.get_timestamp()
+                'username': username,
+                'timestamp': timestamp
             }
         )
 
+        # Notificar cada usuário mencionado em todas as suas conexões
+        for user_id in mentioned_ids:
+            await self.channel_layer.group_send(
+                f'user_{user_id}',
+                {
+                    'type': 'mention_notification',
+                    'room': self.room_name,
+                    'message': message,
+                    'username': username,
+                    'timestamp': timestamp
+                }
+            )
+
     # Receber mensagem do grupo
     async def chat_message(self, event):
         # Enviar mensagem para o WebSocket
@@ -87,6 +173,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'timestamp': event['timestamp']
         }))
 
+    # Notificação de menção (grupo pessoal do usuário)
+    async def mention_notification(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'mention',
+            'room': event['room'],
+            'message': event['message'],
+            'username': event['username'],
+            'timestamp': event['timestamp']
+        }))
+
     # Notificação de entrada de usuário
     async def user_join(self, event):
         await self.send(text_data=json.dumps({
@@ -102,7 +198,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         }))
 
     # Métodos auxiliares para interagir com o banco de dados
-    @database_sync_to_async
+    @admission.database_call
     def get_messages(self, room_name):
         room = ChatRoom.objects.get(name=room_name)
         messages = Message.objects.filter(room=room).order_by('timestamp')[:50]
@@ -115,13 +211,24 @@ class ChatConsumer(AsyncWebsocketConsumer):
             for message in messages
         ]
 
-    @database_sync_to_async
-    def save_message(self, username, room_name, message):
+    @admission.database_call
+    def save_message(self, username, room_name, message, mentions=()):
         user = User.objects.get(username=username)
         room = ChatRoom.objects.get(name=room_name)
-        Message.objects.create(user=user, room=room, content=message)
+        saved = Message.objects.create(user=user, room=room, content=message)
+
+        # Resolver as menções pelo índice em cache e registrá-las em lote
+        mentioned_ids = [
+            user_id for name, user_id in username_index.resolve(mentions).items()
+            if name != username
+        ]
+        Mention.objects.bulk_create([
+            Mention(message=saved, room=room, user_id=user_id)
+            for user_id in mentioned_ids
+        ])
+        return mentioned_ids
 
-    @database_sync_to_async
+    @admission.database_call
     def get_timestamp(self):
         from django.utils import timezone
         return timezone.now().strftime('%H:%M:%S')
\ No newline at end of file
@@ -0,0 +1,113 @@
+# chat/export.py
+import csv
+import datetime
+import json
+import zlib
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Message
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+CSV_HEADER = ['id', 'timestamp', 'username', 'message']
+
+# Linhas lidas do banco por vez e tamanho aproximado de cada bloco enviado
+DB_CHUNK_SIZE = 2000
+OUTPUT_CHUNK_BYTES = 64 * 1024
+
+
+def parse_bound(value):
+    """Converte 'AAAA-MM-DD' ou um datetime ISO 8601 em datetime com fuso."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(f"Data inválida: {value}")
+        parsed = datetime.datetime.combine(date, datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def room_messages(room, start=None, end=None):
+    # Ordem por id segue a ordem de inserção e usa a chave primária
+    messages = Message.objects.filter(room=room)
+    if start is not None:
+        messages = messages.filter(timestamp__gte=start)
+    if end is not None:
+        messages = messages.filter(timestamp__lt=end)
+    return (
+        messages.select_related('user')
+        .only('id', 'content', 'timestamp', 'user__username')
+        .order_by('id')
+    )
+
+
+def _rows(messages):
+    # iterator() lê o resultado em blocos sem popular o cache do queryset
+    for message in messages.iterator(chunk_size=DB_CHUNK_SIZE):
+        yield message.id, message.timestamp.isoformat(), message.user.username, message.content
+
+
+def iter_ndjson(messages):
+    for message_id, timestamp, username, content in _rows(messages):
+        yield json.dumps({
+            'id': message_id,
+            'timestamp': timestamp,
+            'username': username,
+            'message': content
+        }, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    # Buffer "falso" para o csv.writer devolver cada linha em vez de gravá-la
+    def write(self, value):
+        return value
+
+
+def iter_csv(messages):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for row in _rows(messages):
+        yield writer.writerow(row)
+
+
+def _chunked(lines):
+    # Agrupa linhas pequenas em blocos para reduzir o número de escritas
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= OUTPUT_CHUNK_BYTES:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _gzipped(chunks):
+    # wbits=31 produz um stream no formato gzip
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_transcript(room, fmt='ndjson', start=None, end=None, compress=False):
+    """Gera o histórico da sala em blocos de bytes, com memória constante."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato inválido: {fmt}")
+    messages = room_messages(room, start, end)
+    lines = iter_ndjson(messages) if fmt == 'ndjson' else iter_csv(messages)
+    chunks = _chunked(lines)
+    return _gzipped(chunks) if compress else chunks
@@ -0,0 +1,212 @@
+# chat/live_counters.py
+"""Contadores ao vivo do chat em memória compartilhada, lidos pelo dashboard.
+
+O ChatConsumer (escritor) mantém salas ativas, usuários conectados e eventos
+por minuto em um segmento `multiprocessing.shared_memory`; o processo do
+Dash (leitor) copia o segmento inteiro (cerca de 1 KB) a cada leitura, sem
+consultar o banco e sem depender do Django.
+
+Sem locks entre processos: o escritor usa um seqlock. Ele torna o número de
+sequência ímpar, grava os campos e o torna par de novo; o leitor descarta a
+cópia se a sequência estava ímpar ou mudou durante a cópia, e tenta de novo.
+Há um único escritor por segmento (o servidor de chat); com vários processos
+de chat, cada um usa o seu nome de segmento.
+
+Vivacidade por batimento: o escritor regrava o instante atual a cada
+`HEARTBEAT` segundos, mesmo sem atividade, e o leitor ignora um segmento sem
+batimento há mais de `STALE_AFTER` segundos. Um pid não serviria: em
+contêineres, escritor e leitor podem estar em namespaces de pid diferentes.
+
+Eventos por minuto ficam em um anel de baldes de um segundo: o leitor soma
+os baldes dos últimos `WINDOW` segundos, então a taxa cai sozinha quando o
+chat fica em silêncio.
+"""
+import atexit
+import collections
+import logging
+import os
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'CHLC'
+FORMAT_VERSION = 2
+WINDOW = 60
+HEARTBEAT = 1.0
+STALE_AFTER = 5.0
+
+# magic, versão, sequência, pid do escritor, última mudança, batimento, salas, usuários, conexões
+HEADER = struct.Struct('<4sIQqddQQQ')
+# segundo (epoch) e contagem de cada balde
+BUCKET = struct.Struct('<qQ')
+SIZE = HEADER.size + WINDOW * BUCKET.size
+SEQ_OFFSET = 8
+
+LiveCounts = collections.namedtuple('LiveCounts', 'rooms users connections events_per_minute updated_at')
+
+
+def _fresh(heartbeat):
+    return time.time() - heartbeat <= STALE_AFTER
+
+
+class LiveCounterWriter:
+    """Lado do servidor de chat: atualiza o segmento a cada conexão, saída ou mensagem,
+    e uma thread renova o batimento enquanto o processo vive."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rooms = collections.Counter()
+        self.users = collections.Counter()
+        self.connections = 0
+        self.seq = 0
+        self.updated_at = time.time()
+        # Event loop e thread de batimento escrevem no segmento: um de cada vez
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._shm = self._open(name)
+        self._buf = self._shm.buf
+        self._buf[:SIZE] = bytes(SIZE)
+        self._publish()
+        self._heartbeat = threading.Thread(target=self._beat, name='live-counters-heartbeat', daemon=True)
+        self._heartbeat.start()
+
+    @classmethod
+    def from_name(cls, name):
+        """Escritor para o segmento `name`, ou None (com aviso) se outro processo vivo já o usa."""
+        if not name:
+            return None
+        try:
+            writer = cls(name)
+        except RuntimeError as exc:
+            logger.warning('Contadores ao vivo desligados: %s', exc)
+            return None
+        atexit.register(writer.close)
+        return writer
+
+    @staticmethod
+    def _open(name):
+        try:
+            return shared_memory.SharedMemory(name=name, create=True, size=SIZE)
+        except FileExistsError:
+            pass
+        # Segmento de uma execução anterior: reaproveitado se o escritor parou de bater.
+        # Até o Python 3.12, abrir um segmento existente o registra no resource_tracker,
+        # que o apagaria ao fim deste processo mesmo sem ser o dono
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        magic, version, _, pid, _, heartbeat, *_ = HEADER.unpack_from(shm.buf)
+        if magic == MAGIC and version == FORMAT_VERSION and _fresh(heartbeat):
+            shm.close()
+            raise RuntimeError(f'o segmento {name!r} já é escrito pelo processo {pid}')
+        if shm.size < SIZE:
+            shm.close()
+            shared_memory.SharedMemory(name=name).unlink()
+            return shared_memory.SharedMemory(name=name, create=True, size=SIZE)
+        # Agora o segmento é deste processo
+        resource_tracker.register(shm._name, 'shared_memory')
+        return shm
+
+    def _publish(self, bucket=None, changed=True):
+        with self._lock:
+            if self._buf is None:
+                return
+            now = time.time()
+            if changed:
+                self.updated_at = now
+            # Seqlock: sequência ímpar durante a escrita
+            self.seq += 1
+            struct.pack_into('<Q', self._buf, SEQ_OFFSET, self.seq)
+            HEADER.pack_into(self._buf, 0, MAGIC, FORMAT_VERSION, self.seq, os.getpid(), self.updated_at, now,
+                             len(self.rooms), len(self.users), self.connections)
+            if bucket is not None:
+                index, second, count = bucket
+                BUCKET.pack_into(self._buf, HEADER.size + index * BUCKET.size, second, count)
+            self.seq += 1
+            struct.pack_into('<Q', self._buf, SEQ_OFFSET, self.seq)
+
+    def _beat(self):
+        while not self._stop.wait(HEARTBEAT):
+            self._publish(changed=False)
+
+    def connected(self, room, user_id):
+        self.rooms[room] += 1
+        self.users[user_id] += 1
+        self.connections += 1
+        self._publish()
+
+    def disconnected(self, room, user_id):
+        for counter, key in ((self.rooms, room), (self.users, user_id)):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+        self.connections = max(self.connections - 1, 0)
+        self._publish()
+
+    def event(self, count=1):
+        second = int(time.time())
+        index = second % WINDOW
+        offset = HEADER.size + index * BUCKET.size
+        stored_second, stored_count = BUCKET.unpack_from(self._buf, offset)
+        # Balde de um minuto atrás: recomeça a contagem
+        total = stored_count + count if stored_second == second else count
+        self._publish((index, second, total))
+
+    def close(self):
+        if self._shm is None:
+            return
+        self._stop.set()
+        with self._lock:
+            self._buf = None
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        self._shm = None
+
+
+class LiveCounterReader:
+    """Lado do dashboard: leitura em tempo constante, ou None se não há escritor vivo
+    (segmento ausente ou sem batimento recente)."""
+
+    def __init__(self, name, retries=10):
+        self.name = name
+        self.retries = retries
+        self._shm = None
+
+    def _attach(self):
+        if self._shm is None:
+            try:
+                self._shm = shared_memory.SharedMemory(name=self.name)
+            except FileNotFoundError:
+                return None
+            # O leitor não é dono do segmento: quem o apaga é o escritor (ver _open)
+            resource_tracker.unregister(self._shm._name, 'shared_memory')
+        return self._shm
+
+    def _detach(self):
+        self._shm.close()
+        self._shm = None
+
+    def read(self):
+        shm = self._attach()
+        if shm is None:
+            return None
+        for _ in range(self.retries):
+            data = bytes(shm.buf[:SIZE])
+            magic, version, seq, pid, updated_at, heartbeat, rooms, users, connections = HEADER.unpack_from(data)
+            # Cópia consistente: sequência par e igual à do fim da cópia
+            if seq % 2 == 0 and struct.unpack_from('<Q', shm.buf, SEQ_OFFSET)[0] == seq:
+                break
+        else:
+            return None
+        if magic != MAGIC or version != FORMAT_VERSION or not _fresh(heartbeat):
+            # Escritor encerrado: um novo escritor cria outro segmento com o mesmo nome
+            self._detach()
+            return None
+        cutoff = int(time.time()) - WINDOW
+        events = sum(count for second, count in BUCKET.iter_unpack(data[HEADER.size:]) if second > cutoff)
+        return LiveCounts(rooms, users, connections, events * 60 // WINDOW, updated_at)
@@ -0,0 +1,70 @@
+# chat/management/commands/analyze_messages.py
+import datetime
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chat.analytics import AnalyticsStore, index_batch
+from chat.models import Message
+
+
+class Command(BaseCommand):
+    help = 'Indexa termos e sentimento das mensagens novas para o dashboard social'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--db', default=os.environ.get('CHAT_ANALYTICS_DB',
+                                                           settings.BASE_DIR / 'chat_analytics.sqlite3'),
+                            help='Arquivo SQLite do índice (padrão: $CHAT_ANALYTICS_DB)')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--follow', action='store_true',
+                            help='Continuar acompanhando as mensagens novas')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Segundos entre verificações no modo --follow')
+        parser.add_argument('--settle', type=float, default=2.0,
+                            help='Só indexar mensagens com pelo menos esta idade (segundos), para não '
+                                 'pular ids de transações ainda não confirmadas')
+        parser.add_argument('--keep-days', type=int,
+                            help='Descartar os contadores mais antigos que N dias')
+        parser.add_argument('--rebuild', action='store_true', help='Apagar o índice e reindexar tudo')
+
+    def handle(self, *args, **options):
+        store = AnalyticsStore(options['db'])
+        if options['rebuild']:
+            store.reset()
+
+        try:
+            while True:
+                indexed = self.catch_up(store, options['batch_size'], options['settle'])
+                if indexed:
+                    self.stdout.write(f'{indexed} mensagens indexadas (até o id {store.watermark()})')
+                if options['keep_days']:
+                    store.prune((timezone.localdate() - datetime.timedelta(days=options['keep_days'])).isoformat())
+                if not options['follow']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def catch_up(self, store, batch_size, settle):
+        # Lotes em ordem de id a partir da marca d'água, até alcançar as mensagens recentes.
+        # O lote para na primeira mensagem ainda não assentada: filtrar por timestamp
+        # deixaria a marca d'água passar por cima de um id menor que assenta depois
+        indexed = 0
+        cutoff = timezone.now() - datetime.timedelta(seconds=settle)
+        while True:
+            rows = list(
+                Message.objects.filter(id__gt=store.watermark())
+                .order_by('id')
+                .values_list('id', 'room__name', 'timestamp', 'content')[:batch_size]
+            )
+            settled = next((i for i, row in enumerate(rows) if row[2] >= cutoff), len(rows))
+            index_batch(store, (
+                (message_id, room, timezone.localtime(timestamp).date().isoformat(), content)
+                for message_id, room, timestamp, content in rows[:settled]
+            ))
+            indexed += settled
+            if settled < batch_size:
+                return indexed
@@ -0,0 +1,41 @@
+# chat/management/commands/export_room.py
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.export import EXPORT_FORMATS, parse_bound, stream_transcript
+from chat.models import ChatRoom
+
+
+class Command(BaseCommand):
+    help = 'Exporta o histórico de uma sala em NDJSON ou CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('room_name')
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--start', help='Início (AAAA-MM-DD ou ISO 8601, inclusivo)')
+        parser.add_argument('--end', help='Fim (AAAA-MM-DD ou ISO 8601, exclusivo)')
+        parser.add_argument('--gzip', action='store_true', help='Comprimir a saída com gzip')
+        parser.add_argument('--output', '-o', help='Arquivo de saída (padrão: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            room = ChatRoom.objects.get(name=options['room_name'])
+        except ChatRoom.DoesNotExist:
+            raise CommandError(f"Sala não encontrada: {options['room_name']}")
+
+        try:
+            start = parse_bound(options['start'])
+            end = parse_bound(options['end'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        chunks = stream_transcript(room, options['format'], start, end, options['gzip'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
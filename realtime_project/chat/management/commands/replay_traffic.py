@@ -0,0 +1,215 @@
+# chat/management/commands/replay_traffic.py
+import asyncio
+import collections
+import json
+import time
+
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    import websockets
+except ImportError:  # dependência opcional, só necessária para o replay
+    websockets = None
+
+from chat.admission import RETRY_AFTER_CLOSE_CODE
+from chat.models import ChatRoom
+from chat.traffic import CONNECT, DISCONNECT, RECEIVE, read_traffic_log
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class Connection:
+    # Uma conexão reproduzida: socket, textos aguardando eco e contadores
+    def __init__(self, stats):
+        self.stats = stats
+        self.socket = None
+        self.opened = asyncio.Event()
+        self.pending = collections.deque()
+        self.username = None
+
+    async def open(self, url, cookie, username):
+        self.username = username
+        try:
+            self.socket = await websockets.connect(url, additional_headers={'Cookie': cookie})
+        except Exception:
+            self.stats['connect_failed'] += 1
+        else:
+            self.stats['connected'] += 1
+            asyncio.get_running_loop().create_task(self.read())
+        finally:
+            self.opened.set()
+
+    async def read(self):
+        try:
+            async for raw in self.socket:
+                now = time.perf_counter()
+                data = json.loads(raw)
+                self.stats['received'] += 1
+                self.stats['last_received'] = now
+                if data.get('type') == 'retry':
+                    self.stats['rejected'] += 1
+                # O eco da própria mensagem mede a latência de ida e volta
+                if (self.pending and data.get('username') == self.username
+                        and data.get('message') == self.pending[0][0]):
+                    self.stats['latencies'].append((now - self.pending.popleft()[1]) * 1000)
+        except Exception:
+            pass
+        if self.socket.close_code not in (None, 1000, RETRY_AFTER_CLOSE_CODE):
+            self.stats['dropped'] += 1
+
+    async def send(self, text):
+        await self.opened.wait()
+        if self.socket is None:
+            return
+        self.pending.append((text, time.perf_counter()))
+        try:
+            await self.socket.send(json.dumps({'message': text}))
+            self.stats['sent'] += 1
+        except Exception:
+            self.pending.pop()
+
+    async def close(self):
+        await self.opened.wait()
+        if self.socket is not None:
+            await self.socket.close()
+
+
+class Command(BaseCommand):
+    help = 'Reproduz um log de tráfego gravado (CHAT_TRAFFIC_LOG) contra um servidor local'
+
+    def add_arguments(self, parser):
+        parser.add_argument('log')
+        parser.add_argument('--url', default='ws://127.0.0.1:8000',
+                            help='Endereço base do servidor WebSocket')
+        parser.add_argument('--speed', type=float, default=1.0,
+                            help='Fator de aceleração (2 = duas vezes mais rápido)')
+        parser.add_argument('--drain', type=float, default=2.0,
+                            help='Segundos aguardando ecos ao final do replay')
+        parser.add_argument('--output', '-o', help='Salvar o relatório em JSON')
+        parser.add_argument('--compare', help='Relatório JSON de outro build para comparar')
+
+    def handle(self, *args, **options):
+        if websockets is None:
+            raise CommandError('O replay requer o pacote websockets (pip install websockets)')
+        if options['speed'] <= 0:
+            raise CommandError('--speed deve ser positivo')
+        try:
+            _, events = read_traffic_log(options['log'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Não foi possível ler o log: {exc}")
+        if not events:
+            raise CommandError('Log sem eventos')
+
+        # Preparar usuários, salas e sessões antes de iniciar o event loop
+        cookies = self.prepare(events)
+        report = asyncio.run(self.replay(events, cookies, options))
+        report['log'] = options['log']
+        report['speed'] = options['speed']
+
+        self.stdout.write(json.dumps(report, indent=2))
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+        if options['compare']:
+            with open(options['compare']) as baseline:
+                self.print_comparison(json.load(baseline), report)
+
+    def prepare(self, events):
+        for room_name in {event[3] for event in events}:
+            ChatRoom.objects.get_or_create(name=room_name)
+
+        cookies = {}
+        for username in {event[4] for event in events}:
+            user, created = User.objects.get_or_create(username=username)
+            if created:
+                user.set_unusable_password()
+                user.save()
+            # Sessão autenticada criada direto no banco compartilhado com o servidor
+            session = SessionStore()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            cookies[username] = f'sessionid={session.session_key}'
+        return cookies
+
+    async def replay(self, events, cookies, options):
+        stats = collections.Counter()
+        stats['latencies'] = []
+        connections = {}
+        tasks = []
+        speed = options['speed']
+        base_url = options['url'].rstrip('/')
+
+        start = time.perf_counter()
+        for t_ms, event, conn_id, room, username, *text in events:
+            delay = start + t_ms / 1000 / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if event == CONNECT:
+                connection = connections[conn_id] = Connection(stats)
+                url = f'{base_url}/ws/chat/{room}/'
+                tasks.append(asyncio.create_task(connection.open(url, cookies[username], username)))
+            elif conn_id in connections:
+                connection = connections[conn_id]
+                if event == RECEIVE:
+                    tasks.append(asyncio.create_task(connection.send(text[0])))
+                elif event == DISCONNECT:
+                    tasks.append(asyncio.create_task(connection.close()))
+                    del connections[conn_id]
+
+        await asyncio.gather(*tasks)
+        send_elapsed = time.perf_counter() - start
+        await asyncio.sleep(options['drain'])
+        elapsed = time.perf_counter() - start
+        for connection in connections.values():
+            await connection.close()
+
+        latencies = stats.pop('latencies')
+        # A vazão conta até a última mensagem recebida, e não a espera ociosa do --drain
+        delivery_elapsed = max(send_elapsed, stats.pop('last_received', start) - start)
+        return {
+            'events': len(events),
+            'duration_s': round(elapsed, 3),
+            'send_duration_s': round(send_elapsed, 3),
+            'delivery_duration_s': round(delivery_elapsed, 3),
+            'connected': stats['connected'],
+            'connect_failed': stats['connect_failed'],
+            'rejected': stats['rejected'],
+            'dropped': stats['dropped'],
+            'sent': stats['sent'],
+            'received': stats['received'],
+            'echoed': len(latencies),
+            'sent_msgs_s': round(stats['sent'] / send_elapsed, 2),
+            'throughput_msgs_s': round(stats['received'] / delivery_elapsed, 2),
+            'latency_ms': {
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'max': max(latencies) if latencies else None,
+            },
+        }
+
+    def print_comparison(self, baseline, report):
+        self.stdout.write('\nComparação (base -> atual):')
+        rows = [('throughput_msgs_s', baseline['throughput_msgs_s'], report['throughput_msgs_s'])]
+        rows += [
+            (f'latency_ms.{key}', baseline['latency_ms'][key], report['latency_ms'][key])
+            for key in ('p50', 'p95', 'p99', 'max')
+        ]
+        rows += [(key, baseline[key], report[key]) for key in ('rejected', 'dropped', 'connect_failed')]
+        for name, before, after in rows:
+            if before is None or after is None:
+                self.stdout.write(f'  {name:20} {before} -> {after}')
+                continue
+            delta = f'{(after - before) / before * 100:+.1f}%' if before else 'n/a'
+            self.stdout.write(f'  {name:20} {before:10.2f} -> {after:10.2f}  ({delta})')
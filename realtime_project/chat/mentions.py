@@ -0,0 +1,84 @@
+# chat/mentions.py
+import re
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+# @username no início ou após um caractere que não faz parte de um nome
+MENTION_RE = re.compile(r'(?<![\w@.])@([\w.@+-]{1,150})')
+
+
+def parse_mentions(text):
+    """Retorna os usernames mencionados no texto, sem repetição e na ordem em que aparecem."""
+    names = (name.rstrip('.') for name in MENTION_RE.findall(text))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+class UsernameIndex:
+    """Cache em memória de username -> id de usuário.
+
+    Evita uma consulta ao banco por menção: só os nomes ainda não vistos
+    são buscados, em uma única consulta. Nomes inexistentes também ficam em
+    cache para que '@alguem' repetido não gere consultas. O índice inteiro
+    expira após `ttl` segundos para acompanhar alterações feitas em outros
+    processos.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._ids = {}
+        self._missing = set()
+        self._loaded_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def resolve(self, usernames):
+        """Retorna {username: user_id} para os nomes existentes (chamar fora do event loop)."""
+        with self._lock:
+            if time.monotonic() - self._loaded_at > self.ttl:
+                self._ids.clear()
+                self._missing.clear()
+                self._loaded_at = time.monotonic()
+            found = {name: self._ids[name] for name in usernames if name in self._ids}
+            pending = [name for name in usernames if name not in found and name not in self._missing]
+
+        if pending:
+            rows = dict(
+                User.objects.filter(username__in=pending, is_active=True).values_list('username', 'id')
+            )
+            with self._lock:
+                self._ids.update(rows)
+                self._missing.update(name for name in pending if name not in rows)
+            found.update(rows)
+        return found
+
+    def invalidate(self, username=None):
+        with self._lock:
+            if username is None:
+                self._ids.clear()
+                self._missing.clear()
+            else:
+                self._ids.pop(username, None)
+                self._missing.discard(username)
+
+
+username_index = UsernameIndex()
+
+
+@receiver(post_save, sender=User)
+def _update_username_index(sender, instance, created, update_fields=None, **kwargs):
+    # O login salva apenas `last_login`; só mudanças de nome/estado afetam o índice
+    if update_fields and not {'username', 'is_active'} & set(update_fields):
+        return
+    if created:
+        username_index.invalidate(instance.username)
+    else:
+        # Uma renomeação deixa o nome antigo no índice, então descartamos tudo
+        username_index.invalidate()
+
+
+@receiver(post_delete, sender=User)
+def _remove_from_username_index(sender, instance, **kwargs):
+    username_index.invalidate(instance.username)
@@ -18,4 +18,22 @@ class Message(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.user.username}: {self.content[:20]}"
\ No newline at end of file
+        return f"{self.user.username}: {self.content[:20]}"
+
+class Mention(models.Model):
+    # Menção a um usuário (@username) feita em uma mensagem
+    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='mentions')
+    room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='mentions')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mentions')
+    seen = models.BooleanField(default=False)
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-timestamp']
+        indexes = [
+            # Busca rápida das menções ainda não vistas de um usuário
+            models.Index(fields=['user', 'seen', '-timestamp'], name='chat_mention_unseen_idx'),
+        ]
+
+    def __str__(self):
+        return f"@{self.user.username} em {self.room.name}"
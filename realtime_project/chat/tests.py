@@ -1,3 +1,274 @@
-from django.test import TestCase
+# chat/tests.py
+import asyncio
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from channels.layers import InMemoryChannelLayer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import consumers, export, live_counters
+from .admission import ACCEPT, DEGRADED, REJECT, RETRY_AFTER_CLOSE_CODE, AdmissionController
+from .analytics import AnalyticsStore
+from .live_counters import LiveCounterReader, LiveCounterWriter
+from .management.commands.analyze_messages import Command as AnalyzeMessages
+from .mentions import UsernameIndex, parse_mentions
+from .models import ChatRoom, Mention, Message
+
+
+class ParseMentionsTest(SimpleTestCase):
+    def test_names_in_order_without_duplicates(self):
+        self.assertEqual(parse_mentions('@bia oi @ana, e @bia de novo'), ['bia', 'ana'])
+
+    def test_email_and_trailing_dot(self):
+        # Um e-mail não é menção; o ponto final da frase não faz parte do nome
+        self.assertEqual(parse_mentions('escreva para ana@exemplo.com, @carlos.'), ['carlos'])
+
+    def test_no_mentions(self):
+        self.assertEqual(parse_mentions('sem menções @ aqui'), [])
+
+
+class UsernameIndexTest(TestCase):
+    def test_resolves_existing_and_caches_unknown_names(self):
+        ana = User.objects.create_user('ana')
+        index = UsernameIndex()
+        with self.assertNumQueries(1):
+            self.assertEqual(index.resolve(['ana', 'fantasma', 'ana']), {'ana': ana.id})
+        # Nomes conhecidos e inexistentes já estão em cache
+        with self.assertNumQueries(0):
+            self.assertEqual(index.resolve(['fantasma', 'ana']), {'ana': ana.id})
+
+    def test_new_user_invalidates_missing_name(self):
+        index = UsernameIndex()
+        self.assertEqual(index.resolve(['novo']), {})
+        novo = User.objects.create_user('novo')
+        # O sinal post_save só invalida o índice global; aqui invalidamos este
+        index.invalidate('novo')
+        self.assertEqual(index.resolve(['novo']), {'novo': novo.id})
+
+
+class MentionsViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('ana', password='x')
+        author = User.objects.create_user('bia', password='x')
+        self.room = ChatRoom.objects.create(name='geral')
+        message = Message.objects.create(user=author, room=self.room, content='oi @ana')
+        self.mentions = [Mention.objects.create(message=message, room=self.room, user=self.user)
+                         for _ in range(2)]
+        self.client.force_login(self.user)
+        self.url = reverse('mentions')
+
+    def test_url_does_not_shadow_a_room_named_mentions(self):
+        ChatRoom.objects.create(name='mentions')
+        self.assertEqual(self.url, '/chat/api/mentions/')
+        self.assertEqual(self.client.get('/chat/mentions/').status_code, 200)
+
+    def test_lists_unseen_mentions(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        items = response.json()['mentions']
+        self.assertEqual({item['id'] for item in items}, {mention.id for mention in self.mentions})
+        self.assertEqual(items[0]['username'], 'bia')
+
+    def test_marks_only_given_ids_as_seen(self):
+        response = self.client.post(self.url, {'id': [self.mentions[0].id]})
+        self.assertEqual(response.json(), {'updated': 1})
+        self.assertEqual(Mention.objects.filter(seen=False).get(), self.mentions[1])
+
+    def test_non_integer_id_is_bad_request(self):
+        response = self.client.post(self.url, {'id': ['1', 'abc']})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Mention.objects.filter(seen=True).exists())
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+class AdmissionControllerTest(SimpleTestCase):
+    def controller(self, **config):
+        return AdmissionController({'DEGRADED_SOCKETS': 1, 'MAX_SOCKETS': 2, **config})
+
+    async def test_decide_reserves_slots_up_to_the_limit(self):
+        admission = self.controller()
+        self.assertEqual([admission.decide() for _ in range(3)], [ACCEPT, DEGRADED, REJECT])
+        # A recusa não reserva slot
+        self.assertEqual(admission.open_sockets, 2)
+        admission.socket_closed()
+        self.assertEqual(admission.decide(), DEGRADED)
+
+    async def test_loop_lag_and_db_queue(self):
+        admission = self.controller(MAX_SOCKETS=100, DEGRADED_SOCKETS=100)
+        admission.loop_lag = admission.config['DEGRADED_LOOP_LAG']
+        self.assertEqual(admission.decide(), DEGRADED)
+        admission.loop_lag = 0.0
+        admission.db_pending = admission.config['MAX_DB_QUEUE']
+        self.assertEqual(admission.decide(), REJECT)
+
+    def test_unknown_setting_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            AdmissionController({'MAX_SOCKET': 10})
+
+    def test_retry_after_has_jitter_within_bounds(self):
+        admission = AdmissionController({'RETRY_AFTER': 4})
+        delays = {admission.retry_after() for _ in range(50)}
+        self.assertTrue(all(4 <= delay <= 8 for delay in delays))
+        self.assertGreater(len(delays), 1)
+
+
+class ConsumerAdmissionTest(SimpleTestCase):
+    class User:
+        is_anonymous = False
+        id = 1
+        username = 'ana'
+
+    def setUp(self):
+        # Todas as conexões entram degradadas: sem histórico, sem banco
+        self.admission = AdmissionController({'DEGRADED_SOCKETS': 0, 'MAX_SOCKETS': 3})
+        for target, value in (('admission', self.admission), ('live_counters', None), ('recorder', None)):
+            patcher = mock.patch.object(consumers, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def communicator(self):
+        communicator = WebsocketCommunicator(consumers.ChatConsumer.as_asgi(), '/ws/chat/geral/')
+        communicator.scope['url_route'] = {'kwargs': {'room_name': 'geral'}}
+        communicator.scope['user'] = self.User()
+        return communicator
+
+    async def test_connect_storm_respects_max_sockets(self):
+        communicators = [self.communicator() for _ in range(10)]
+        await asyncio.gather(*(communicator.connect() for communicator in communicators))
+        self.assertEqual(self.admission.open_sockets, 3)
+        rejected = 0
+        for communicator in communicators:
+            message = await communicator.receive_json_from()
+            if message['type'] == 'retry':
+                rejected += 1
+                self.assertEqual((await communicator.receive_output())['code'], RETRY_AFTER_CLOSE_CODE)
+        self.assertEqual(rejected, 7)
+        for communicator in communicators:
+            await communicator.disconnect()
+        self.assertEqual(self.admission.open_sockets, 0)
+
+    async def test_slot_released_when_group_add_fails(self):
+        with mock.patch.object(InMemoryChannelLayer, 'group_add', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                await self.communicator().connect()
+        self.assertEqual(self.admission.open_sockets, 0)
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user('admin', password='x', is_staff=True)
+        self.room = ChatRoom.objects.create(name='geral')
+        self.messages = [Message.objects.create(user=self.staff, room=self.room, content=f'mensagem {i}, "ok"')
+                         for i in range(5)]
+        for day, message in enumerate(self.messages, start=1):
+            Message.objects.filter(id=message.id).update(
+                timestamp=timezone.make_aware(datetime.datetime(2024, 1, day, 12)))
+        self.client.force_login(self.staff)
+
+    def get(self, **params):
+        response = self.client.get(reverse('export_room', args=['geral']), params)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_ndjson_in_id_order(self):
+        response, body = self.get()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [message.id for message in self.messages])
+        self.assertEqual(rows[0]['message'], 'mensagem 0, "ok"')
+
+    def test_csv_with_date_bounds(self):
+        response, body = self.get(format='csv', start='2024-01-02', end='2024-01-04')
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0], export.CSV_HEADER)
+        self.assertEqual([row[3] for row in rows[1:]], ['mensagem 1, "ok"', 'mensagem 2, "ok"'])
+
+    def test_gzip_stream_in_small_chunks(self):
+        with mock.patch.object(export, 'OUTPUT_CHUNK_BYTES', 64):
+            response, body = self.get(gzip='1')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="geral.ndjson.gz"')
+        self.assertEqual(len(gzip.decompress(body).decode().splitlines()), 5)
+
+    def test_chunks_group_lines(self):
+        with mock.patch.object(export, 'OUTPUT_CHUNK_BYTES', 200):
+            chunks = list(export.stream_transcript(self.room))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(chunk.endswith(b'\n') for chunk in chunks))
+
+    def test_invalid_parameters_are_bad_requests(self):
+        self.assertEqual(self.get(format='xml')[0].status_code, 400)
+        self.assertEqual(self.get(start='ontem')[0].status_code, 400)
+
+    def test_requires_staff(self):
+        self.client.force_login(User.objects.create_user('ana', password='x'))
+        self.assertEqual(self.get()[0].status_code, 302)
+
+
+class AnalyzeMessagesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('ana', password='x')
+        self.room = ChatRoom.objects.create(name='geral')
+        self.store = AnalyticsStore(tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False).name)
+
+    def message(self, content, age):
+        message = Message.objects.create(user=self.user, room=self.room, content=content)
+        Message.objects.filter(id=message.id).update(timestamp=timezone.now() - datetime.timedelta(seconds=age))
+        return message
+
+    def test_watermark_stops_at_first_unsettled_id(self):
+        first = self.message('jogo ótimo', age=60)
+        # Id menor, mas ainda dentro do período de assentamento
+        self.message('partida ruim', age=0)
+        self.message('vitória linda', age=60)
+
+        self.assertEqual(AnalyzeMessages().catch_up(self.store, batch_size=10, settle=5), 1)
+        self.assertEqual(self.store.watermark(), first.id)
+
+        Message.objects.update(timestamp=timezone.now() - datetime.timedelta(seconds=60))
+        self.assertEqual(AnalyzeMessages().catch_up(self.store, batch_size=10, settle=5), 2)
+        self.assertEqual(sum(self.store.term_frequencies().values()), 6)
+
+
+class LiveCountersTest(SimpleTestCase):
+    def setUp(self):
+        self.name = f'chat_test_{os.getpid()}'
+        self.writer = LiveCounterWriter(self.name)
+        self.addCleanup(self.writer.close)
+        # Leitor e escritor no mesmo processo dividem o registro do resource_tracker:
+        # o unregister do leitor apagaria o do escritor
+        patcher = mock.patch.object(live_counters.resource_tracker, 'unregister')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reader_sees_writer_counts(self):
+        self.writer.connected('geral', 1)
+        self.writer.connected('geral', 2)
+        self.writer.event(3)
+        counts = LiveCounterReader(self.name).read()
+        self.assertEqual((counts.rooms, counts.users, counts.connections, counts.events_per_minute),
+                         (1, 2, 2, 3))
+
+    def test_writer_without_heartbeat_is_ignored(self):
+        reader = LiveCounterReader(self.name)
+        self.assertIsNotNone(reader.read())
+        # Batimento antigo: o escritor morreu, mesmo que o pid exista em outro namespace
+        stale = time.time() - live_counters.STALE_AFTER - 1
+        with mock.patch.object(live_counters.time, 'time', return_value=stale):
+            self.writer._stop.set()
+            self.writer._publish(changed=False)
+        self.assertIsNone(reader.read())
@@ -0,0 +1,128 @@
+# chat/traffic.py
+import atexit
+import gzip
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+
+# Eventos gravados: conexão, mensagem recebida e desconexão
+CONNECT = 'c'
+RECEIVE = 'r'
+DISCONNECT = 'd'
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+# Eventos aguardando a thread de escrita; acima disso são descartados
+MAX_PENDING = 100000
+_STOP = object()
+
+
+def _open(path, mode):
+    # Arquivos terminados em .gz são comprimidos de forma transparente
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8', buffering=64 * 1024)
+
+
+class TrafficRecorder:
+    """Grava os eventos do ChatConsumer em um log compacto (uma linha por evento).
+
+    Cada linha é um array JSON `[t_ms, evento, conexão, sala, usuário, texto]`,
+    com o tempo relativo ao início da gravação. A primeira linha é um
+    cabeçalho com a versão do formato.
+
+    `record` é chamado no event loop e não faz I/O: só enfileira o evento.
+    Uma thread própria serializa e grava, e descarrega o arquivo quando a
+    fila esvazia. Se o disco não acompanhar e a fila passar de `max_pending`,
+    os eventos novos são descartados e contados em `dropped`.
+    """
+
+    def __init__(self, path, max_pending=MAX_PENDING):
+        self.path = path
+        self.dropped = 0
+        self._file = _open(path, 'a')
+        self._queue = queue.Queue(max_pending)
+        self._start = time.monotonic()
+        self._ids = itertools.count(1)
+        self._closed = False
+        self._queue.put({'version': FORMAT_VERSION, 'started': time.time()})
+        self._writer = threading.Thread(target=self._write_loop, name='traffic-recorder', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_settings(cls):
+        path = getattr(settings, 'CHAT_TRAFFIC_LOG', None)
+        return cls(path) if path else None
+
+    def new_connection_id(self):
+        return next(self._ids)
+
+    def record(self, event, conn_id, room, username, text=None):
+        if self._closed:
+            return
+        t_ms = int((time.monotonic() - self._start) * 1000)
+        entry = [t_ms, event, conn_id, room, username]
+        if text is not None:
+            entry.append(text)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        while True:
+            entry = self._queue.get()
+            if entry is _STOP:
+                break
+            self._write(entry)
+            if self._queue.empty():
+                self._file.flush()
+        self._file.close()
+
+    def _write(self, entry):
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+        try:
+            self._file.write(line)
+        except (OSError, ValueError):
+            # Disco cheio ou arquivo fechado: o chat segue sem gravar este evento
+            logger.exception('Falha gravando o tráfego em %s', self.path)
+
+    def close(self):
+        """Grava o que está na fila e fecha o arquivo."""
+        if self._closed:
+            return
+        self._closed = True
+        # Bloqueia se a fila estiver cheia: o marco de parada não pode se perder
+        self._queue.put(_STOP)
+        self._writer.join()
+        if self.dropped:
+            logger.warning('%d eventos de tráfego descartados (fila cheia)', self.dropped)
+
+
+def read_traffic_log(path):
+    """Lê um log gravado pelo TrafficRecorder, retornando (cabeçalho, eventos)."""
+    header, events = None, []
+    offset, run = 0, 0
+    with _open(path, 'r') as log:
+        for line in log:
+            entry = json.loads(line)
+            if isinstance(entry, dict):
+                # Logs anexados em várias execuções: os tempos continuam do
+                # último evento e os ids de conexão ganham o número da execução
+                header = header or entry
+                offset = events[-1][0] if events else 0
+                run += 1
+                continue
+            entry[0] += offset
+            entry[2] = f'{run}.{entry[2]}'
+            events.append(entry)
+    return header, events
+
+recorder = TrafficRecorder.from_settings()
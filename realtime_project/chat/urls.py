@@ -4,5 +4,8 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
+    # Com dois segmentos, não colide com `<str:room_name>/`: uma sala pode se chamar "mentions"
+    path('api/mentions/', views.mentions, name='mentions'),
     path('<str:room_name>/', views.room, name='room'),
+    path('<str:room_name>/export/', views.export_room, name='export_room'),
 ]
\ No newline at end of file
@@ -4,7 +4,11 @@ from django.shortcuts import render
 # chat/views.py
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from .models import ChatRoom
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET, require_http_methods
+from .export import EXPORT_FORMATS, parse_bound, stream_transcript
+from .models import ChatRoom, Mention
 
 @login_required
 def index(request):
@@ -18,6 +22,59 @@ def room(request, room_name):
         'room': room,
         'username': request.user.username
     })
+
+@login_required
+@require_http_methods(['GET', 'POST'])
+def mentions(request):
+    # Menções ainda não vistas do usuário (usa o índice user/seen/timestamp)
+    unseen = Mention.objects.filter(user=request.user, seen=False)
+
+    if request.method == 'POST':
+        # Marcar como vistas: todas ou apenas os ids informados
+        try:
+            ids = [int(value) for value in request.POST.getlist('id')]
+        except ValueError:
+            return HttpResponseBadRequest("Ids de menção inválidos")
+        if ids:
+            unseen = unseen.filter(id__in=ids)
+        return JsonResponse({'updated': unseen.update(seen=True)})
+
+    items = unseen.select_related('room', 'message__user')[:50]
+    return JsonResponse({
+        'mentions': [
+            {
+                'id': mention.id,
+                'room': mention.room.name,
+                'username': mention.message.user.username,
+                'message': mention.message.content,
+                'timestamp': mention.timestamp.strftime('%d/%m/%Y %H:%M:%S')
+            }
+            for mention in items
+        ]
+    })
+
+@staff_member_required
+@require_GET
+def export_room(request, room_name):
+    # Transcrição completa da sala, enviada em streaming (?format=ndjson|csv&start=&end=&gzip=1)
+    room = get_object_or_404(ChatRoom, name=room_name)
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"Formato inválido: {fmt}")
+    try:
+        start = parse_bound(request.GET.get('start'))
+        end = parse_bound(request.GET.get('end'))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    compress = request.GET.get('gzip') in ('1', 'true')
+    filename = f"{room.name}.{fmt}" + ('.gz' if compress else '')
+    response = StreamingHttpResponse(
+        stream_transcript(room, fmt, start, end, compress),
+        content_type='application/gzip' if compress else f"{EXPORT_FORMATS[fmt]}; charset=utf-8"
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
     
     
 from django.shortcuts import render, redirect
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,6 +50,14 @@ CHANNEL_LAYERS = {
         "BACKEND": "channels.layers.InMemoryChannelLayer"
     }
 }
+# Controle de admissão das conexões WebSocket: só os limites que mudam em relação a
+# chat.admission.DEFAULTS, por exemplo {'MAX_SOCKETS': 8000}
+CHAT_ADMISSION = {}
+# Gravação do tráfego WebSocket para replay (ver chat/traffic.py); desligada se vazio
+CHAT_TRAFFIC_LOG = os.environ.get('CHAT_TRAFFIC_LOG')
+# Segmento de memória compartilhada com os contadores ao vivo lidos pelo dashboard
+# (ver chat/live_counters.py); desligado se vazio
+CHAT_LIVE_COUNTERS = os.environ.get('CHAT_LIVE_COUNTERS')
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
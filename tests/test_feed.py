@@ -0,0 +1,54 @@
+# tests/test_feed.py
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from dashboard import feed
+from dashboard.feed import NDJSONReplaySource
+
+
+def write_events(events):
+    path = os.path.join(tempfile.mkdtemp(), 'eventos.ndjson')
+    with open(path, 'w') as output:
+        for event in events:
+            output.write(json.dumps(event) + '\n')
+    return path
+
+
+class NDJSONReplaySourceTest(unittest.TestCase):
+    def read_all(self, source, now):
+        with mock.patch.object(feed.time, 'monotonic', return_value=now):
+            return source.read_batch(1000)
+
+    def test_zero_duration_file_waits_between_loops(self):
+        source = NDJSONReplaySource(write_events([{'t': 5}, {'t': 5}]), loop=True)
+        self.addCleanup(source.close)
+        first = self.read_all(source, now=100.0)
+        self.assertEqual([e['t'] for e in first], [5, 5])
+        # Sem tempo passando, a volta seguinte ainda não chegou
+        self.assertEqual(self.read_all(source, now=100.0), [])
+        later = self.read_all(source, now=100.0 + feed.LOOP_GAP)
+        self.assertEqual([e['t'] for e in later], [5 + feed.LOOP_GAP] * 2)
+
+    def test_loop_keeps_last_gap(self):
+        source = NDJSONReplaySource(write_events([{'t': 0}, {'t': 2}, {'t': 5}]), loop=True)
+        self.addCleanup(source.close)
+        events = self.read_all(source, now=0.0) + self.read_all(source, now=14.0)
+        self.assertEqual([e['t'] for e in events], [0, 2, 5, 8, 10, 13])
+
+    def test_malformed_lines_are_skipped(self):
+        path = write_events([{'t': 1}])
+        with open(path, 'a') as output:
+            output.write('não é json\n{"match": 1}\n{"t": 2}\n')
+        source = NDJSONReplaySource(path)
+        self.addCleanup(source.close)
+        with self.assertLogs('dashboard.feed', 'WARNING') as logs:
+            events = self.read_all(source, now=0.0) + self.read_all(source, now=1.0)
+        self.assertEqual([e['t'] for e in events], [1, 2])
+        self.assertEqual(len(logs.records), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
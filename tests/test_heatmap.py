@@ -0,0 +1,53 @@
+# tests/test_heatmap.py
+import unittest
+
+import numpy as np
+
+from dashboard.heatmap import HeatmapAccumulator, bin_counts
+
+
+class BinCountsTest(unittest.TestCase):
+    def test_matches_histogram2d(self):
+        rng = np.random.default_rng(0)
+        x, y = rng.uniform(0, 100, 5000), rng.uniform(0, 100, 5000)
+        expected, _, _ = np.histogram2d(y, x, bins=(20, 25), range=((0, 100), (0, 100)))
+        np.testing.assert_array_equal(bin_counts(x, y, (25, 20), (0, 100), (0, 100)), expected)
+
+    def test_upper_edge_and_outside_points(self):
+        grid = bin_counts([0, 100, 100, -1, 101, 50], [0, 100, 0, 50, 50, 100.5], (4, 4), (0, 100), (0, 100))
+        self.assertEqual(grid.sum(), 3)
+        self.assertEqual(grid[0, 0], 1)
+        self.assertEqual(grid[3, 3], 1)
+        self.assertEqual(grid[0, 3], 1)
+
+    def test_weights(self):
+        grid = bin_counts([10, 10, 90], [10, 10, 90], (2, 2), (0, 100), (0, 100), weights=[1.5, 2.0, 4.0])
+        np.testing.assert_array_equal(grid, [[3.5, 0], [0, 4.0]])
+
+
+class HeatmapAccumulatorTest(unittest.TestCase):
+    def test_incremental_adds_bump_version(self):
+        heatmap = HeatmapAccumulator(bins=(2, 2))
+        heatmap.add([10], [10], t=0)
+        heatmap.add([90, 90], [90, 90], t=1)
+        version, grid = heatmap.snapshot()
+        self.assertEqual(version, 2)
+        np.testing.assert_array_equal(grid, [[1, 0], [0, 2]])
+
+    def test_half_life_decay(self):
+        heatmap = HeatmapAccumulator(bins=(1, 1), half_life=10)
+        heatmap.add([50], [50], weights=[8.0], t=0)
+        _, grid = heatmap.snapshot(now=20)
+        self.assertAlmostEqual(grid[0, 0], 2.0)
+
+    def test_window_drops_expired_slots(self):
+        heatmap = HeatmapAccumulator(bins=(1, 1), window=10, slots=5)
+        heatmap.add([50], [50], t=0)
+        heatmap.add([50], [50], t=9)
+        self.assertEqual(heatmap.snapshot(now=9)[1][0, 0], 2)
+        self.assertEqual(heatmap.snapshot(now=11)[1][0, 0], 1)
+        self.assertEqual(heatmap.snapshot(now=30)[1][0, 0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+# tests/test_replay.py
+import unittest
+
+import numpy as np
+
+from dashboard.replay import MatchReplay
+
+
+def batch(t0, n, seed):
+    rng = np.random.default_rng(seed)
+    return {
+        't': t0 + np.arange(n, dtype=np.float64),
+        'type': rng.integers(0, 8, n).astype(np.int8),
+        'player': rng.integers(0, 10, n).astype(np.int32),
+        'team': rng.integers(0, 2, n).astype(np.int32),
+        'x': rng.uniform(0, 100, n).astype(np.float32),
+        'y': rng.uniform(0, 100, n).astype(np.float32),
+        'value': np.ones(n),
+    }
+
+
+class MatchReplayTest(unittest.TestCase):
+    def test_history_is_bounded_and_seek_matches_full_log(self):
+        full = MatchReplay([0, 1], keyframe_every=100, max_keyframes=10 ** 9)
+        bounded = MatchReplay([0, 1], keyframe_every=100, max_keyframes=5)
+        for i in range(30):
+            columns = batch(i * 137, 137, seed=i)
+            full.extend(columns)
+            bounded.extend(columns)
+
+        self.assertEqual(len(bounded.segments), 5)
+        self.assertEqual(len(bounded.keyframes), 5)
+        self.assertGreater(bounded.start_t, full.start_t)
+        self.assertEqual(bounded.end_t, full.end_t)
+        for t in (bounded.start_t, bounded.start_t + 50.5, bounded.end_t - 1, bounded.end_t + 10):
+            expected, state = full.seek(t), bounded.seek(t)
+            np.testing.assert_allclose(state.grid, expected.grid)
+            np.testing.assert_allclose(state.players, expected.players)
+            np.testing.assert_allclose(state.teams, expected.teams)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+# tests/test_serialization.py
+import base64
+import unittest
+
+import numpy as np
+
+from dashboard.serialization import compact_array
+
+
+def decode(spec):
+    arr = np.frombuffer(base64.b64decode(spec['bdata']), dtype=np.dtype(spec['dtype']).newbyteorder('<'))
+    return arr.astype(np.float64)
+
+
+class CompactArrayTest(unittest.TestCase):
+    def test_large_magnitude_floats_keep_float64(self):
+        # Timestamps em segundos: float32 juntaria valores distintos
+        x = 1.7e9 + np.arange(100, dtype=np.float64) + 0.5
+        spec = compact_array(x)
+        self.assertEqual(spec['dtype'], 'f8')
+        np.testing.assert_array_equal(decode(spec), x)
+        self.assertEqual(len(np.unique(decode(spec))), 100)
+
+    def test_exact_floats_are_downcast(self):
+        y = np.arange(100, dtype=np.float64) / 4
+        spec = compact_array(y)
+        self.assertEqual(spec['dtype'], 'f4')
+        np.testing.assert_array_equal(decode(spec), y)
+
+    def test_inexact_small_floats_keep_float64(self):
+        y = np.linspace(0, 1, 100)
+        spec = compact_array(y)
+        self.assertEqual(spec['dtype'], 'f8')
+        np.testing.assert_array_equal(decode(spec), y)
+
+    def test_nan_is_preserved(self):
+        y = np.arange(20, dtype=np.float64)
+        y[3] = np.nan
+        self.assertEqual(compact_array(y)['dtype'], 'f4')
+
+
+if __name__ == '__main__':
+    unittest.main()
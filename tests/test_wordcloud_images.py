@@ -0,0 +1,24 @@
+# tests/test_wordcloud_images.py
+import hashlib
+import unittest
+
+from dashboard.wordcloud_images import RENDER_PARAMS, image_key, render_png
+
+FREQUENCIES = {'partida': 30, 'vitória': 22, 'time': 18, 'jogador': 12, 'mapa': 7, 'torre': 3}
+
+
+class RenderPngTest(unittest.TestCase):
+    def test_same_input_renders_same_bytes(self):
+        params = {**RENDER_PARAMS, 'width': 200, 'height': 100}
+        first = render_png(FREQUENCIES, params)
+        second = render_png(dict(reversed(list(FREQUENCIES.items()))), params)
+        self.assertEqual(hashlib.md5(first).hexdigest(), hashlib.md5(second).hexdigest())
+
+    def test_random_state_is_part_of_the_key(self):
+        self.assertIn('random_state', RENDER_PARAMS)
+        self.assertNotEqual(image_key(FREQUENCIES, RENDER_PARAMS),
+                            image_key(FREQUENCIES, {**RENDER_PARAMS, 'random_state': 7}))
+
+
+if __name__ == '__main__':
+    unittest.main()